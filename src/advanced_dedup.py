@@ -15,7 +15,7 @@ import random
 import subprocess
 import tempfile
 from dataclasses import dataclass, field
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Dict, Callable
 from pathlib import Path
 from enum import Enum
 
@@ -482,9 +482,9 @@ class WeixinDedupConfig:
     )
 
 
-# 预设配置
-WEIXIN_DEDUP_PRESETS = {
-    "light": WeixinDedupConfig(
+# 预设配置（工厂函数，每次调用生成独立的配置，修改不会影响预设本身）
+WEIXIN_DEDUP_PRESETS: Dict[str, Callable[[], WeixinDedupConfig]] = {
+    "light": lambda: WeixinDedupConfig(
         segment_shuffle=SegmentShuffleConfig(enabled=False),
         pip=PictureInPictureConfig(enabled=False),
         intro_outro=IntroOutroMaterialConfig(enabled=False),
@@ -498,7 +498,7 @@ WEIXIN_DEDUP_PRESETS = {
             saturation_range=(0.97, 1.03),
         ),
     ),
-    "medium": WeixinDedupConfig(
+    "medium": lambda: WeixinDedupConfig(
         segment_shuffle=SegmentShuffleConfig(
             enabled=True,
             segment_count=3,
@@ -515,7 +515,7 @@ WEIXIN_DEDUP_PRESETS = {
             color_shift_enabled=True,
         ),
     ),
-    "heavy": WeixinDedupConfig(
+    "heavy": lambda: WeixinDedupConfig(
         segment_shuffle=SegmentShuffleConfig(
             enabled=True,
             segment_count=5,
@@ -544,5 +544,5 @@ WEIXIN_DEDUP_PRESETS = {
 
 
 def get_weixin_preset(name: str = "medium") -> WeixinDedupConfig:
-    """获取微信视频号去重预设"""
-    return WEIXIN_DEDUP_PRESETS.get(name, WEIXIN_DEDUP_PRESETS["medium"])
+    """获取微信视频号去重预设（返回新建的配置，可直接修改）"""
+    return WEIXIN_DEDUP_PRESETS.get(name, WEIXIN_DEDUP_PRESETS["medium"])()
@@ -6,43 +6,43 @@ VideoMixer - 高级混剪处理器
 """
 
 import os
+import shutil
 import subprocess
 import random
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Tuple
+import copy
+import functools
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from typing import (
+    List, Optional, Dict, Any, Tuple, Callable, Iterable, Iterator, Union, TYPE_CHECKING
+)
 from pathlib import Path
 from enum import Enum
 
-# 导入视频分析模块
-from .video_analyzer import (
-    VideoAnalyzer, ContentType, VideoAnalysisResult,
-    analyze_video, get_video_type, get_recommended_strategy
+from .ffmpeg_utils import (
+    HW_ENCODERS, hw_encoder_args, mark_hw_encoder_failed, resolve_hw_encoder, run_ffmpeg
 )
 
-# 导入所有子模块
-from .subtitle_effects import (
-    SubtitleConfig, SubtitleStyle, build_subtitle_filter,
-    get_subtitle_preset, LyricLine, build_lyric_sync_subtitles
-)
-from .background_effects import (
-    BackgroundConfig, BackgroundEffect, build_background_filter,
-    get_background_preset, WaterRippleConfig, BlurBorderConfig
-)
-from .particle_effects import (
-    ParticleConfig, ParticleType, build_particle_filter,
-    get_particle_preset
-)
-from .ui_templates import (
-    UITemplate, MusicPlayerConfig, ProgressBarConfig, RecIndicatorConfig,
-    build_ui_template, get_ui_preset
-)
-from .layout_engine import (
-    LayoutConfig, LayoutType, build_layout, get_layout_preset
-)
-from .title_effects import (
-    TitleConfig, TitleStyle, build_title_filter,
-    get_title_preset, build_animated_title
-)
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+# 子模块（视频分析依赖较重）只在实际处理时导入，导入本模块只为使用配置类时不会连带加载
+if TYPE_CHECKING:
+    from .video_analyzer import ContentType
+    from .subtitle_effects import SubtitleConfig, LyricLine
+    from .background_effects import BackgroundConfig
+    from .particle_effects import ParticleConfig
+    from .layout_engine import LayoutConfig
+    from .title_effects import TitleConfig
 
 
 class VideoType(Enum):
@@ -65,35 +65,56 @@ class AdvancedRemixConfig:
     output_width: int = 720
     output_height: int = 1280
     output_fps: float = 30.0
+    ffmpeg_threads: int = 0  # 单个ffmpeg使用的线程数，0为ffmpeg默认
+    hw_encoder: str = "auto"  # 硬件编码器: auto/nvenc/qsv/vaapi/videotoolbox/none
 
     # 字幕配置
     subtitle_enabled: bool = True
-    subtitle_config: Optional[SubtitleConfig] = None
-    lyrics: List[LyricLine] = field(default_factory=list)
+    subtitle_config: Optional["SubtitleConfig"] = None
+    lyrics: List["LyricLine"] = field(default_factory=list)
 
     # 标题配置
     title_enabled: bool = True
-    title_config: Optional[TitleConfig] = None
+    title_config: Optional["TitleConfig"] = None
 
     # 背景效果
     background_enabled: bool = False
-    background_config: Optional[BackgroundConfig] = None
+    background_config: Optional["BackgroundConfig"] = None
 
     # 粒子效果
     particle_enabled: bool = True
-    particle_config: Optional[ParticleConfig] = None
+    particle_config: Optional["ParticleConfig"] = None
 
     # UI模板
     ui_enabled: bool = False
     ui_templates: List[Dict[str, Any]] = field(default_factory=list)
 
     # 布局
-    layout_config: Optional[LayoutConfig] = None
+    layout_config: Optional["LayoutConfig"] = None
 
     # 节日主题
     festival_theme: str = ""  # spring_festival/christmas/none
 
 
+# 效果开关 -> 效果名称: (开关字段, 额外要求的配置字段, 名称)
+EFFECT_TABLE = (
+    ("background_enabled", None, "背景效果"),
+    ("title_enabled", "title_config", "标题"),
+    ("subtitle_enabled", None, "字幕"),
+    ("particle_enabled", None, "粒子特效"),
+    ("ui_enabled", None, "UI模板"),
+)
+
+
+@dataclass
+class VideoProbe:
+    """输入视频信息"""
+    width: int = 720
+    height: int = 1280
+    duration: float = 60.0
+    square_pixels: bool = True  # 像素宽高比(SAR)为1:1或未设置
+
+
 @dataclass
 class RemixResult:
     """混剪结果"""
@@ -108,8 +129,10 @@ class RemixResult:
 # 内容类型映射
 # ============================================================
 
-def content_type_to_video_type(content_type: ContentType) -> VideoType:
+def content_type_to_video_type(content_type: "ContentType") -> VideoType:
     """将视频分析的内容类型映射到混剪视频类型"""
+    from .video_analyzer import ContentType
+
     mapping = {
         ContentType.DIGITAL_HUMAN: VideoType.DIGITAL_HUMAN,
         ContentType.REAL_PERSON: VideoType.DIGITAL_HUMAN,  # 真人与数字人使用相似策略
@@ -136,6 +159,8 @@ def auto_detect_video_type(video_path: str, verbose: bool = True) -> Tuple[Video
     Returns:
         (视频类型, 置信度, 原因说明)
     """
+    from .video_analyzer import analyze_video
+
     result = analyze_video(video_path, verbose=verbose)
     video_type = content_type_to_video_type(result.content_type)
     return video_type, result.confidence, result.strategy_reason
@@ -145,8 +170,14 @@ def auto_detect_video_type(video_path: str, verbose: bool = True) -> Tuple[Video
 # 视频类型策略
 # ============================================================
 
-def get_strategy_for_type(video_type: VideoType, festival: str = "") -> AdvancedRemixConfig:
-    """根据视频类型获取推荐策略配置"""
+@functools.lru_cache(maxsize=64)
+def _strategy_template(video_type: VideoType, festival: str) -> AdvancedRemixConfig:
+    """构建策略配置模板（按类型和节日缓存，调用方不得修改）"""
+    from .subtitle_effects import get_subtitle_preset
+    from .background_effects import get_background_preset
+    from .particle_effects import get_particle_preset
+    from .ui_templates import UITemplate, get_ui_preset
+    from .title_effects import get_title_preset
 
     config = AdvancedRemixConfig(video_type=video_type)
 
@@ -215,27 +246,166 @@ def get_strategy_for_type(video_type: VideoType, festival: str = "") -> Advanced
     return config
 
 
+def get_strategy_for_type(video_type: VideoType, festival: str = "") -> AdvancedRemixConfig:
+    """根据视频类型获取推荐策略配置（返回缓存模板的独立副本，可直接修改）"""
+    return copy.deepcopy(_strategy_template(video_type, festival))
+
+
 # ============================================================
 # 滤镜构建
 # ============================================================
 
+# 滤镜流标签（预先构造，避免每次拼接时重复生成相同的短字符串）
+LABEL_INPUT = "[0:v]"
+LABEL_SCALED = "[vscaled]"
+LABEL_BG = "[vbg]"
+LABEL_TITLE = "[vtitle]"
+LABEL_SUB = "[vsub]"
+LABEL_PARTICLE = "[vparticle]"
+LABEL_OUT = "[vout]"
+
+# 滤镜片段缓存上限
+FILTER_CACHE_SIZE = 32
+
+# 与输入无关的片段缓存: (配置摘要, 宽, 高) -> (标题, 字幕, 歌词列表)
+_static_fragment_cache: Dict[Tuple[str, int, int], Tuple[str, str, Tuple[str, ...]]] = {}
+
+# 不含随机效果的完整滤镜缓存: (配置摘要, 时长, 缩放滤镜) -> 滤镜字符串
+_filter_complex_cache: Dict[Tuple[str, float, str], str] = {}
+
+
+def _config_key(config: AdvancedRemixConfig) -> str:
+    """配置摘要（dataclass的repr覆盖所有嵌套字段，配置被修改后摘要随之变化）"""
+    return repr(config)
+
+
+def _cache_put(cache: Dict, key, value):
+    if len(cache) >= FILTER_CACHE_SIZE:
+        cache.clear()
+    cache[key] = value
+
+
+def _render_static_fragments(config: AdvancedRemixConfig, config_key: str,
+                             out_w: int, out_h: int) -> Tuple[str, str, Tuple[str, ...]]:
+    """构建与输入视频无关的滤镜片段（标题、字幕、歌词），按配置缓存"""
+    cache_key = (config_key, out_w, out_h)
+    cached = _static_fragment_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    from .subtitle_effects import SubtitleConfig, build_subtitle_filter, build_lyric_sync_subtitles
+    from .title_effects import build_title_filter
+
+    title_filter = ""
+    if config.title_enabled and config.title_config and config.title_config.text:
+        title_filter = build_title_filter(config.title_config, out_w, out_h)
+        if title_filter == "null":
+            title_filter = ""
+
+    sub_filter = ""
+    if config.subtitle_enabled and config.subtitle_config and config.subtitle_config.text:
+        sub_filter = build_subtitle_filter(config.subtitle_config, out_w, out_h) or ""
+
+    lyric_filters: Tuple[str, ...] = ()
+    if config.lyrics:
+        lyric_filters = tuple(build_lyric_sync_subtitles(
+            config.lyrics, config.subtitle_config or SubtitleConfig(), out_w, out_h
+        ))
+
+    fragments = (title_filter, sub_filter, lyric_filters)
+    _cache_put(_static_fragment_cache, cache_key, fragments)
+    return fragments
+
+
+def needs_video_duration(config: AdvancedRemixConfig) -> bool:
+    """滤镜是否依赖视频时长（仅背景、粒子、UI模板使用时长）"""
+    return bool(
+        (config.background_enabled and config.background_config)
+        or (config.particle_enabled and config.particle_config)
+        or (config.ui_enabled and config.ui_templates)
+    )
+
+
+def build_scale_filter(out_w: int, out_h: int, probe: Optional[VideoProbe] = None) -> str:
+    """
+    构建缩放到输出尺寸的滤镜
+
+    已知输入尺寸且宽高比与输出一致时只需一次 scale，省去 pad；
+    输入像素为方形时缩放后的SAR本身就是1:1，省去 setsar。
+    未知输入信息时使用完整的 scale+pad+setsar 链。
+    """
+    if probe is not None and probe.width * out_h == probe.height * out_w:
+        if probe.square_pixels:
+            return f"scale={out_w}:{out_h}"
+        return f"scale={out_w}:{out_h},setsar=1"
+    return (
+        f"scale={out_w}:{out_h}:force_original_aspect_ratio=decrease,"
+        f"pad={out_w}:{out_h}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+    )
+
+
+def has_video_effects(config: AdvancedRemixConfig) -> bool:
+    """是否启用了任何画面效果（缩放以外的滤镜）"""
+    return bool(
+        needs_video_duration(config)
+        or (config.title_enabled and config.title_config and config.title_config.text)
+        or (config.subtitle_enabled and config.subtitle_config and config.subtitle_config.text)
+        or config.lyrics
+        or config.layout_config
+    )
+
+
+def is_passthrough(config: AdvancedRemixConfig, probe: VideoProbe,
+                   input_path: str, output_path: str) -> bool:
+    """无画面效果时，输入尺寸、像素比、容器格式均与输出一致，处理结果等同原文件"""
+    return (
+        not has_video_effects(config)
+        and probe.width == config.output_width
+        and probe.height == config.output_height
+        and probe.square_pixels
+        and Path(input_path).suffix.lower() == Path(output_path).suffix.lower()
+    )
+
+
 def build_remix_filter_complex(config: AdvancedRemixConfig,
-                                video_duration: float,
-                                input_width: int, input_height: int) -> str:
-    """构建完整的滤镜复合字符串"""
-    filters = []
-    current_stream = "[0:v]"
+                                video_duration: float = 0.0,
+                                probe: Optional[VideoProbe] = None) -> str:
+    """
+    构建完整的滤镜复合字符串
+
+    标题/字幕/歌词片段与输入无关，按配置缓存；背景和粒子效果含随机参数，
+    每次重新生成。未启用背景和粒子时整个滤镜字符串按配置与时长缓存。
+    """
+    config_key = _config_key(config)
+    has_random = ((config.background_enabled and config.background_config is not None)
+                  or (config.particle_enabled and config.particle_config is not None))
 
     # 获取输出尺寸
     out_w = config.output_width
     out_h = config.output_height
+    scale_filter = build_scale_filter(out_w, out_h, probe)
 
-    # 1. 缩放到输出尺寸
-    filters.append(
-        f"{current_stream}scale={out_w}:{out_h}:force_original_aspect_ratio=decrease,"
-        f"pad={out_w}:{out_h}:(ow-iw)/2:(oh-ih)/2,setsar=1[vscaled]"
+    duration_key = round(video_duration, 3) if needs_video_duration(config) else 0.0
+    full_key = (config_key, duration_key, scale_filter)
+    if not has_random:
+        cached = _filter_complex_cache.get(full_key)
+        if cached is not None:
+            return cached
+
+    from .background_effects import build_background_filter
+    from .particle_effects import build_particle_filter
+    from .ui_templates import build_ui_template
+
+    filters = []
+    current_stream = LABEL_INPUT
+
+    title_filter, sub_filter, lyric_filters = _render_static_fragments(
+        config, config_key, out_w, out_h
     )
-    current_stream = "[vscaled]"
+
+    # 1. 缩放到输出尺寸
+    filters.append(f"{current_stream}{scale_filter}{LABEL_SCALED}")
+    current_stream = LABEL_SCALED
 
     # 2. 背景效果
     if config.background_enabled and config.background_config:
@@ -243,32 +413,24 @@ def build_remix_filter_complex(config: AdvancedRemixConfig,
             config.background_config, out_w, out_h, video_duration
         )
         if bg_filter:
-            filters.append(f"{current_stream}{bg_filter}[vbg]")
-            current_stream = "[vbg]"
+            filters.append(f"{current_stream}{bg_filter}{LABEL_BG}")
+            current_stream = LABEL_BG
 
     # 3. 标题
-    if config.title_enabled and config.title_config and config.title_config.text:
-        title_filter = build_title_filter(config.title_config, out_w, out_h)
-        if title_filter and title_filter != "null":
-            filters.append(f"{current_stream}{title_filter}[vtitle]")
-            current_stream = "[vtitle]"
+    if title_filter:
+        filters.append(f"{current_stream}{title_filter}{LABEL_TITLE}")
+        current_stream = LABEL_TITLE
 
     # 4. 字幕
-    if config.subtitle_enabled and config.subtitle_config and config.subtitle_config.text:
-        sub_filter = build_subtitle_filter(config.subtitle_config, out_w, out_h)
-        if sub_filter:
-            filters.append(f"{current_stream}{sub_filter}[vsub]")
-            current_stream = "[vsub]"
+    if sub_filter:
+        filters.append(f"{current_stream}{sub_filter}{LABEL_SUB}")
+        current_stream = LABEL_SUB
 
     # 5. 歌词同步
-    if config.lyrics:
-        lyric_filters = build_lyric_sync_subtitles(
-            config.lyrics, config.subtitle_config or SubtitleConfig(), out_w, out_h
-        )
-        for i, lf in enumerate(lyric_filters):
-            label = f"[vlyric{i}]"
-            filters.append(f"{current_stream}{lf}{label}")
-            current_stream = label
+    for i, lf in enumerate(lyric_filters):
+        label = f"[vlyric{i}]"
+        filters.append(f"{current_stream}{lf}{label}")
+        current_stream = label
 
     # 6. 粒子效果
     if config.particle_enabled and config.particle_config:
@@ -276,8 +438,8 @@ def build_remix_filter_complex(config: AdvancedRemixConfig,
             config.particle_config, out_w, out_h, video_duration
         )
         if particle_filter and particle_filter != "null":
-            filters.append(f"{current_stream}{particle_filter}[vparticle]")
-            current_stream = "[vparticle]"
+            filters.append(f"{current_stream}{particle_filter}{LABEL_PARTICLE}")
+            current_stream = LABEL_PARTICLE
 
     # 7. UI模板
     if config.ui_enabled and config.ui_templates:
@@ -294,15 +456,128 @@ def build_remix_filter_complex(config: AdvancedRemixConfig,
     # 8. 最终输出
     # 重命名最后一个流为 [vout]
     if filters:
-        last_filter = filters[-1]
-        # 替换最后一个标签为 [vout]
-        import re
-        last_filter = re.sub(r'\[v\w+\]$', '[vout]', last_filter)
-        filters[-1] = last_filter
+        # 最后一个滤镜必定以 current_stream 标签结尾，直接替换为 [vout]
+        filters[-1] = filters[-1][:-len(current_stream)] + LABEL_OUT
     else:
-        filters.append(f"{current_stream}null[vout]")
+        filters.append(f"{current_stream}null{LABEL_OUT}")
 
-    return ";".join(filters)
+    filter_complex = ";".join(filters)
+    if not has_random:
+        _cache_put(_filter_complex_cache, full_key, filter_complex)
+    return filter_complex
+
+
+# ============================================================
+# 视频信息
+# ============================================================
+
+def _probe_with_pyav(input_path: str) -> VideoProbe:
+    """使用 PyAV 在进程内读取视频信息"""
+    with av.open(input_path) as container:
+        vs = container.streams.video[0]
+        probe = VideoProbe(width=vs.width or 720, height=vs.height or 1280)
+        if container.duration is not None:
+            probe.duration = float(container.duration) / av.time_base
+        elif vs.duration is not None and vs.time_base is not None:
+            probe.duration = float(vs.duration * vs.time_base)
+        sar = vs.sample_aspect_ratio
+        probe.square_pixels = not sar or sar == 1
+    return probe
+
+
+def _probe_with_ffprobe(input_path: str) -> VideoProbe:
+    """使用 ffprobe 子进程读取视频信息"""
+    probe_cmd = [
+        'ffprobe', '-v', 'quiet', '-print_format', 'json',
+        '-show_format', '-show_streams', input_path
+    ]
+    # 保持bytes输出，直接交给JSON解析器，省去Python层的UTF-8解码
+    probe_result = subprocess.run(probe_cmd, capture_output=True)
+    probe_data = _json.loads(probe_result.stdout)
+
+    video_stream = next(
+        (s for s in probe_data.get('streams', []) if s.get('codec_type') == 'video'),
+        {}
+    )
+
+    sar = video_stream.get('sample_aspect_ratio', '1:1')
+    return VideoProbe(
+        width=video_stream.get('width', 720),
+        height=video_stream.get('height', 1280),
+        duration=float(probe_data.get('format', {}).get('duration', 60)),
+        square_pixels=sar in ('1:1', '0:1', 'N/A', ''),
+    )
+
+
+def probe_video(input_path: str) -> VideoProbe:
+    """
+    获取视频宽高、时长和像素宽高比
+
+    优先使用 PyAV 直接调用 libavformat（无需 fork ffprobe 和解析JSON），
+    PyAV 未安装或读取失败时回退到 ffprobe。
+    """
+    if PYAV_AVAILABLE:
+        try:
+            return _probe_with_pyav(input_path)
+        except Exception:
+            pass
+    return _probe_with_ffprobe(input_path)
+
+
+# ============================================================
+# 编码器选择
+# ============================================================
+
+SOFTWARE_ENCODER_ARGS = ['-c:v', 'libx264', '-preset', 'fast', '-crf', '20']
+
+# 硬件编码质量值，大致对应 SOFTWARE_ENCODER_ARGS 的 crf
+HW_ENCODE_QUALITY = 20
+
+def build_remix_command(input_path: str, output_path: str, filter_complex: str,
+                        config: AdvancedRemixConfig, hw_encoder: str = "") -> List[str]:
+    """构建混剪的ffmpeg命令，hw_encoder 为空时使用 libx264 软件编码"""
+    if hw_encoder:
+        input_args, filter_tail, encode_args = hw_encoder_args(hw_encoder, HW_ENCODE_QUALITY)
+    else:
+        input_args, filter_tail, encode_args = [], "", SOFTWARE_ENCODER_ARGS
+
+    if filter_tail:
+        filter_complex = f"{filter_complex[:-len(LABEL_OUT)]},{filter_tail}{LABEL_OUT}"
+
+    cmd = ['ffmpeg', '-y', *input_args, '-i', input_path,
+           '-filter_complex', filter_complex,
+           '-map', LABEL_OUT, '-map', '0:a?',
+           *encode_args,
+           '-c:a', 'aac', '-b:a', '128k']
+    if not filter_tail:
+        cmd.extend(['-pix_fmt', 'yuv420p'])
+    if config.ffmpeg_threads > 0:
+        cmd.extend(['-threads', str(config.ffmpeg_threads)])
+    cmd.append(output_path)
+    return cmd
+
+
+# ============================================================
+# FFmpeg 执行
+# ============================================================
+
+def _print_progress(seconds: float):
+    """原地刷新 ffmpeg 进度"""
+    print(f"\r  已处理 {seconds:.1f}秒", end="", flush=True)
+
+
+def _run_ffmpeg(cmd: List[str], verbose: bool = False,
+                timeout: float = 3600) -> Tuple[int, str]:
+    """
+    执行ffmpeg命令（verbose 时原地输出进度）
+
+    Returns:
+        (返回码, stderr末尾内容)
+    """
+    returncode, tail = run_ffmpeg(cmd, timeout, _print_progress if verbose else None)
+    if verbose:
+        print()
+    return returncode, tail
 
 
 # ============================================================
@@ -314,7 +589,8 @@ def advanced_remix(
     output_path: Optional[str] = None,
     config: Optional[AdvancedRemixConfig] = None,
     auto_detect: bool = True,
-    verbose: bool = True
+    verbose: bool = True,
+    ffmpeg_threads: int = 0
 ) -> RemixResult:
     """
     高级混剪处理
@@ -325,6 +601,7 @@ def advanced_remix(
         config: 混剪配置，为None时自动检测
         auto_detect: 是否自动检测视频类型（当config为None或类型为GENERAL时）
         verbose: 是否输出详细信息
+        ffmpeg_threads: 配置（含自动检测得到的配置）未指定线程数时使用的ffmpeg线程数，0为ffmpeg默认
 
     Returns:
         RemixResult 处理结果
@@ -358,11 +635,16 @@ def advanced_remix(
         if confidence > 0.5:  # 置信度足够高时更新策略
             if verbose:
                 print(f"[自动检测] 更新为: {detected_type.value} (置信度: {confidence*100:.1f}%)")
+            threads = config.ffmpeg_threads
             config = get_strategy_for_type(detected_type)
+            config.ffmpeg_threads = threads
         else:
             if verbose:
                 print(f"[自动检测] 置信度较低，保持通用策略")
 
+    if config.ffmpeg_threads <= 0 and ffmpeg_threads > 0:
+        config = replace(config, ffmpeg_threads=ffmpeg_threads)
+
     # 生成输出路径
     if output_path is None:
         input_p = Path(input_path)
@@ -377,48 +659,38 @@ def advanced_remix(
             print(f"输入: {input_path}")
             print(f"视频类型: {config.video_type.value}")
 
-        # 1. 获取视频信息
-        probe_cmd = [
-            'ffprobe', '-v', 'quiet', '-print_format', 'json',
-            '-show_format', '-show_streams', input_path
-        ]
-        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True)
-
-        import json
-        probe_data = json.loads(probe_result.stdout)
-
-        video_stream = next(
-            (s for s in probe_data.get('streams', []) if s.get('codec_type') == 'video'),
-            {}
-        )
-
-        input_width = video_stream.get('width', 720)
-        input_height = video_stream.get('height', 1280)
-        duration = float(probe_data.get('format', {}).get('duration', 60))
+        # 1. 获取视频信息（滤镜只需要时长，不依赖时长时跳过探测）
+        duration = 0.0
+        probe = None
+        if needs_video_duration(config):
+            probe = probe_video(input_path)
+            duration = probe.duration
 
-        if verbose:
-            print(f"输入分辨率: {input_width}x{input_height}")
-            print(f"时长: {duration:.1f}秒")
+            if verbose:
+                print(f"输入分辨率: {probe.width}x{probe.height}")
+                print(f"时长: {duration:.1f}秒")
+
+        elif not has_video_effects(config):
+            # 没有任何画面效果时，尺寸也一致就无需转码，直接复制文件
+            probe = probe_video(input_path)
+            if is_passthrough(config, probe, input_path, output_path):
+                shutil.copyfile(input_path, output_path)
+                result.success = True
+                if verbose:
+                    print("未启用任何效果且尺寸一致，直接复制文件")
+                return result
 
         # 2. 构建滤镜
         if verbose:
             print("\n[1/3] 构建滤镜...")
 
-        filter_complex = build_remix_filter_complex(
-            config, duration, input_width, input_height
-        )
+        filter_complex = build_remix_filter_complex(config, duration, probe)
 
         # 记录应用的效果
-        if config.background_enabled:
-            result.applied_effects.append("背景效果")
-        if config.title_enabled and config.title_config:
-            result.applied_effects.append("标题")
-        if config.subtitle_enabled:
-            result.applied_effects.append("字幕")
-        if config.particle_enabled:
-            result.applied_effects.append("粒子特效")
-        if config.ui_enabled:
-            result.applied_effects.append("UI模板")
+        result.applied_effects = [
+            name for flag, required, name in EFFECT_TABLE
+            if getattr(config, flag) and (required is None or getattr(config, required))
+        ]
 
         if verbose:
             print(f"  应用效果: {', '.join(result.applied_effects)}")
@@ -427,25 +699,25 @@ def advanced_remix(
         if verbose:
             print("\n[2/3] 处理视频...")
 
-        cmd = [
-            'ffmpeg', '-y', '-i', input_path,
-            '-filter_complex', filter_complex,
-            '-map', '[vout]', '-map', '0:a?',
-            '-c:v', 'libx264', '-preset', 'fast', '-crf', '20',
-            '-c:a', 'aac', '-b:a', '128k',
-            '-pix_fmt', 'yuv420p',
-            output_path
-        ]
+        hw_encoder = resolve_hw_encoder(config.hw_encoder)
+        if verbose:
+            print(f"  编码器: {HW_ENCODERS[hw_encoder][0] if hw_encoder else 'libx264'}")
 
-        process = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=3600
-        )
+        cmd = build_remix_command(input_path, output_path, filter_complex, config, hw_encoder)
+        returncode, stderr_tail = _run_ffmpeg(cmd, verbose=verbose)
 
-        if process.returncode != 0:
-            result.error_message = process.stderr[-500:] if process.stderr else "未知错误"
+        if returncode != 0 and hw_encoder:
+            # ffmpeg编译了硬件编码器不代表设备可用，失败时回退到软件编码
+            if verbose:
+                print("  硬件编码失败，回退到 libx264...")
+            cmd = build_remix_command(input_path, output_path, filter_complex, config)
+            returncode, stderr_tail = _run_ffmpeg(cmd, verbose=verbose)
+            if returncode == 0:
+                # 软件编码成功说明问题在硬件编码器，本进程之后的任务不再尝试
+                mark_hw_encoder_failed(hw_encoder)
+
+        if returncode != 0:
+            result.error_message = stderr_tail[-500:] if stderr_tail else "未知错误"
             if verbose:
                 print(f"  处理失败: {result.error_message[:200]}")
             return result
@@ -473,12 +745,99 @@ def advanced_remix(
     except Exception as e:
         result.error_message = str(e)
         if verbose:
-            import traceback
             traceback.print_exc()
 
     return result
 
 
+# ============================================================
+# 批量并行处理
+# ============================================================
+
+# 每个ffmpeg实例限制的线程数（libx264 preset=fast 通常用满4~8线程）
+REMIX_JOB_THREADS = 4
+
+
+def _remix_job(input_path: str, config: Optional[AdvancedRemixConfig],
+               auto_detect: bool) -> RemixResult:
+    """进程池中执行的单个混剪任务"""
+    try:
+        return advanced_remix(input_path, None, config, auto_detect=auto_detect,
+                              verbose=False, ffmpeg_threads=REMIX_JOB_THREADS)
+    except Exception as e:
+        return RemixResult(input_path=input_path, error_message=str(e))
+
+
+def _auto_remix_job(input_path: str, title_text: str, subtitle_text: str,
+                    festival: str) -> RemixResult:
+    """进程池中执行的单个自动混剪任务"""
+    try:
+        return auto_remix(input_path, None, title_text, subtitle_text, festival,
+                          verbose=False, ffmpeg_threads=REMIX_JOB_THREADS)
+    except Exception as e:
+        return RemixResult(input_path=input_path, error_message=str(e))
+
+
+def remix_many(
+    paths: Iterable[str],
+    config_or_fn: Union[AdvancedRemixConfig, Callable[[str], AdvancedRemixConfig], None] = None,
+    workers: Optional[int] = None,
+    auto_detect: bool = True
+) -> Iterator[RemixResult]:
+    """
+    并行批量混剪
+
+    多个 advanced_remix 任务在进程池中并发执行，每个 ffmpeg 限制
+    REMIX_JOB_THREADS 个线程，避免单个编码独占全部核心。
+
+    Args:
+        paths: 输入视频路径列表
+        config_or_fn: 混剪配置，或根据输入路径返回配置的函数，为None时自动检测
+        workers: 并发进程数，默认 CPU核数/4
+        auto_detect: 是否自动检测视频类型
+
+    Yields:
+        RemixResult 按完成顺序返回
+    """
+    jobs = []
+    for path in paths:
+        config = config_or_fn(path) if callable(config_or_fn) else config_or_fn
+        jobs.append((path, config, auto_detect))
+    return _run_pool(_remix_job, jobs, workers)
+
+
+def auto_remix_many(
+    paths: Iterable[str],
+    title_text: str = "",
+    subtitle_text: str = "",
+    festival: str = "",
+    workers: Optional[int] = None
+) -> Iterator[RemixResult]:
+    """
+    并行批量自动混剪（每个进程内自动检测视频类型并应用文字）
+
+    Yields:
+        RemixResult 按完成顺序返回
+    """
+    jobs = [(path, title_text, subtitle_text, festival) for path in paths]
+    return _run_pool(_auto_remix_job, jobs, workers)
+
+
+def _run_pool(job: Callable[..., RemixResult], jobs: List[tuple],
+              workers: Optional[int]) -> Iterator[RemixResult]:
+    """在进程池中执行任务，按完成顺序返回结果（每个任务的第一个参数为输入路径）"""
+    workers = workers or max(1, (os.cpu_count() or 1) // 4)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(job, *args): args[0] for args in jobs}
+
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield RemixResult(input_path=futures[future], error_message=str(e))
+
+
 # ============================================================
 # 快捷函数
 # ============================================================
@@ -504,6 +863,8 @@ def remix_handwriting(input_path: str, output_path: str = None,
 def remix_music_player(input_path: str, output_path: str = None,
                         song_title: str = "", festival: str = "") -> RemixResult:
     """音乐播放器风格快捷混剪"""
+    from .ui_templates import UITemplate
+
     config = get_strategy_for_type(VideoType.MUSIC_PLAYER, festival)
     if song_title:
         config.title_config.text = song_title
@@ -525,7 +886,8 @@ def remix_emotional(input_path: str, output_path: str = None,
 
 def auto_remix(input_path: str, output_path: str = None,
                title_text: str = "", subtitle_text: str = "",
-               festival: str = "", verbose: bool = True) -> RemixResult:
+               festival: str = "", verbose: bool = True,
+               ffmpeg_threads: int = 0) -> RemixResult:
     """
     自动混剪 - 智能分析视频内容并选择最佳策略
 
@@ -542,6 +904,7 @@ def auto_remix(input_path: str, output_path: str = None,
         subtitle_text: 字幕文字（可选）
         festival: 节日主题（可选）
         verbose: 是否输出详细信息
+        ffmpeg_threads: ffmpeg线程数，0为ffmpeg默认
 
     Returns:
         RemixResult 处理结果
@@ -578,6 +941,8 @@ def auto_remix(input_path: str, output_path: str = None,
     if subtitle_text and config.subtitle_config:
         config.subtitle_config.text = subtitle_text
 
+    config.ffmpeg_threads = ffmpeg_threads
+
     # 执行混剪
     return advanced_remix(input_path, output_path, config, auto_detect=False, verbose=verbose)
 
@@ -588,92 +953,94 @@ def auto_remix(input_path: str, output_path: str = None,
 
 if __name__ == "__main__":
     import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m src.advanced_remix",
+        description="高级混剪处理器",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+    # 自动检测（推荐）
+    python -m src.advanced_remix video.mp4 --auto
+    python -m src.advanced_remix video.mp4 --auto --title '我的标题'
+
+    # 手动指定类型
+    python -m src.advanced_remix video.mp4 --type digital_human
+    python -m src.advanced_remix video.mp4 --type music_player --title '前程似锦'
+    python -m src.advanced_remix video.mp4 --type emotional --festival spring_festival
+
+    # 批量并行
+    python -m src.advanced_remix videos/*.mp4 --auto --jobs 4
+        """
+    )
+    parser.add_argument("input_paths", nargs="+", metavar="视频路径", help="输入视频（可多个）")
+    parser.add_argument("--auto", action="store_true", help="[推荐] 自动检测视频类型并选择最佳策略")
+    parser.add_argument("--type", dest="video_type", choices=[t.value for t in VideoType],
+                        help="手动指定视频类型")
+    parser.add_argument("--title", default="", help="添加标题文字")
+    parser.add_argument("--subtitle", default="", help="添加字幕文字")
+    parser.add_argument("--festival", default="", help="节日主题: spring_festival/christmas")
+    parser.add_argument("--output", help="指定输出路径（仅单个输入时有效）")
+    parser.add_argument("--jobs", type=int, default=1, help="并行处理的任务数（默认: 1）")
+
+    args = parser.parse_args()
+    input_paths = args.input_paths
+    title_text = args.title
+    subtitle_text = args.subtitle
+    festival = args.festival
+    output_path = args.output
+    jobs = max(1, args.jobs)
+
+    if len(input_paths) > 1 and output_path:
+        print("多个输入时忽略 --output，输出到各输入文件所在目录")
+        output_path = None
+
+    manual_config = None
+    if not args.auto and args.video_type is not None:
+        # 手动指定模式
+        manual_config = get_strategy_for_type(VideoType(args.video_type), festival)
 
-    if len(sys.argv) < 2:
-        print("高级混剪处理器")
-        print("\n用法:")
-        print("  python -m src.advanced_remix <视频路径> [选项]")
-        print("\n选项:")
-        print("  --auto            [推荐] 自动检测视频类型并选择最佳策略")
-        print("  --type <类型>     手动指定视频类型: digital_human/handwriting/music_player/gaming/emotional/general")
-        print("  --title <标题>    添加标题文字")
-        print("  --subtitle <字幕> 添加字幕文字")
-        print("  --festival <节日> 节日主题: spring_festival/christmas")
-        print("  --output <路径>   指定输出路径")
-        print("\n示例:")
-        print("  # 自动检测（推荐）")
-        print("  python -m src.advanced_remix video.mp4 --auto")
-        print("  python -m src.advanced_remix video.mp4 --auto --title '我的标题'")
-        print("")
-        print("  # 手动指定类型")
-        print("  python -m src.advanced_remix video.mp4 --type digital_human")
-        print("  python -m src.advanced_remix video.mp4 --type music_player --title '前程似锦'")
-        print("  python -m src.advanced_remix video.mp4 --type emotional --festival spring_festival")
-        sys.exit(1)
+        if title_text and manual_config.title_config:
+            manual_config.title_config.text = title_text
 
-    input_path = sys.argv[1]
-
-    # 解析参数
-    video_type = None  # None表示未指定
-    auto_mode = False
-    title_text = ""
-    subtitle_text = ""
-    festival = ""
-    output_path = None
-
-    i = 2
-    while i < len(sys.argv):
-        if sys.argv[i] == "--auto":
-            auto_mode = True
-            i += 1
-        elif sys.argv[i] == "--type" and i + 1 < len(sys.argv):
-            type_map = {
-                "digital_human": VideoType.DIGITAL_HUMAN,
-                "handwriting": VideoType.HANDWRITING,
-                "music_player": VideoType.MUSIC_PLAYER,
-                "gaming": VideoType.GAMING,
-                "emotional": VideoType.EMOTIONAL,
-                "general": VideoType.GENERAL,
-            }
-            video_type = type_map.get(sys.argv[i + 1], VideoType.GENERAL)
-            i += 2
-        elif sys.argv[i] == "--title" and i + 1 < len(sys.argv):
-            title_text = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == "--subtitle" and i + 1 < len(sys.argv):
-            subtitle_text = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == "--festival" and i + 1 < len(sys.argv):
-            festival = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == "--output" and i + 1 < len(sys.argv):
-            output_path = sys.argv[i + 1]
-            i += 2
-        else:
-            i += 1
+        if subtitle_text and manual_config.subtitle_config:
+            manual_config.subtitle_config.text = subtitle_text
 
     # 执行混剪
-    if auto_mode or video_type is None:
-        # 自动模式
-        result = auto_remix(
-            input_path,
-            output_path=output_path,
-            title_text=title_text,
-            subtitle_text=subtitle_text,
-            festival=festival
-        )
+    if jobs > 1 and len(input_paths) > 1:
+        if manual_config is None:
+            results = auto_remix_many(input_paths, title_text, subtitle_text,
+                                      festival, workers=jobs)
+        else:
+            results = remix_many(input_paths, manual_config, workers=jobs,
+                                 auto_detect=False)
     else:
-        # 手动指定模式
-        config = get_strategy_for_type(video_type, festival)
-
-        if title_text and config.title_config:
-            config.title_config.text = title_text
-
-        if subtitle_text and config.subtitle_config:
-            config.subtitle_config.text = subtitle_text
+        def _sequential():
+            for path in input_paths:
+                if manual_config is None:
+                    # 自动模式
+                    yield auto_remix(
+                        path,
+                        output_path=output_path,
+                        title_text=title_text,
+                        subtitle_text=subtitle_text,
+                        festival=festival
+                    )
+                else:
+                    yield advanced_remix(path, output_path, manual_config, auto_detect=False)
+        results = _sequential()
+
+    failed = 0
+    for result in results:
+        if result.success:
+            print(f"[完成] {result.input_path} -> {result.output_path}")
+        else:
+            failed += 1
+            print(f"[失败] {result.input_path}: {result.error_message}")
 
-        result = advanced_remix(input_path, output_path, config, auto_detect=False)
+    if len(input_paths) > 1:
+        print(f"\n共 {len(input_paths)} 个，成功 {len(input_paths) - failed}，失败 {failed}")
 
-    if not result.success:
-        print(f"\n处理失败: {result.error_message}")
+    if failed:
         sys.exit(1)
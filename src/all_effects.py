@@ -4,23 +4,29 @@ VideoMixer - 综合效果模块
 """
 
 import os
-import tempfile
+import copy
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
 # 导入各个功能模块
 try:
-    from .video_dedup import DedupConfig, apply_dedup
+    from .video_dedup import DedupConfig, apply_dedup, build_dedup_filter_chain, get_video_info
 except ImportError:
     DedupConfig = None
     apply_dedup = None
+    build_dedup_filter_chain = None
+    get_video_info = None
 
 from .transitions import TransitionType, add_transition, add_flash_effect
 from .split_screen import SplitType, create_horizontal_split, create_vertical_split, create_pip
-from .background_blur import create_blur_background, create_gradient_blur_background
+from .background_blur import build_blur_background_filter
 from .text_effects import TextStyle, add_static_text, add_scroll_text, add_fade_text
+from .compat import DATACLASS_SLOTS
+from .ffmpeg_utils import run_ffmpeg
 
 
 class EffectCategory(Enum):
@@ -33,7 +39,7 @@ class EffectCategory(Enum):
     TEXT = "text"              # 文字效果
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class EffectConfig:
     """综合效果配置"""
     # 去重配置
@@ -78,8 +84,11 @@ class EffectConfig:
     output_width: int = 720
     output_height: int = 1280
 
+    # 批量并行数（0=自动: min(视频数, CPU核数/2)，1=串行）
+    max_parallel: int = 0
 
-@dataclass
+
+@dataclass(**DATACLASS_SLOTS)
 class ProcessingResult:
     """处理结果"""
     success: bool
@@ -94,13 +103,13 @@ class AllEffectsProcessor:
 
     def __init__(self, config: EffectConfig = None):
         self.config = config or EffectConfig()
-        self.temp_files = []
 
     def process_video(
         self,
         input_path: str,
         output_path: str,
-        verbose: bool = True
+        verbose: bool = True,
+        _skip_check: bool = False
     ) -> ProcessingResult:
         """
         处理单个视频，应用所有配置的效果
@@ -109,6 +118,7 @@ class AllEffectsProcessor:
             input_path: 输入视频路径
             output_path: 输出视频路径
             verbose: 是否输出详情
+            _skip_check: 跳过输入文件存在检查（process_batch 已统一检查）
 
         Returns:
             ProcessingResult 处理结果
@@ -119,64 +129,45 @@ class AllEffectsProcessor:
             output_path=output_path
         )
 
-        if not os.path.exists(input_path):
-            result.error_message = f"文件不存在: {input_path}"
+        if not _skip_check and not os.path.exists(input_path):
+            result.error_message = _missing_message(input_path)
             return result
 
-        current = input_path
-        self.temp_files = []
-
-        try:
-            # 1. 应用去重效果
-            if self.config.enable_dedup and self.config.dedup_config and apply_dedup:
-                if verbose:
-                    print("应用去重效果...")
-                temp = self._get_temp_file()
-                if apply_dedup(current, temp, self.config.dedup_config, verbose=False):
-                    current = temp
-                    result.effects_applied.append("dedup")
-
-            # 2. 应用背景模糊
-            if self.config.enable_blur_background:
+        # 所有效果合并为一次ffmpeg处理
+        fused_cmd = self._build_fused_command(input_path, output_path)
+        if fused_cmd is not None:
+            cmd, effects = fused_cmd
+            if verbose:
+                print(f"合并处理: {', '.join(effects)}")
+            try:
+                returncode, tail = run_ffmpeg(cmd, timeout=3600)
+                if returncode == 0:
+                    result.success = True
+                    result.effects_applied.extend(effects)
+                    if verbose:
+                        print(f"处理完成: {output_path}")
+                        print(f"应用的效果: {', '.join(result.effects_applied)}")
+                else:
+                    result.error_message = tail[-500:] if tail else "处理失败"
+                    if verbose:
+                        print(f"处理失败: {result.error_message[:200]}")
+            except Exception as e:
+                result.error_message = str(e)
                 if verbose:
-                    print("应用背景模糊...")
-                temp = self._get_temp_file()
-                if create_blur_background(
-                    current, temp,
-                    target_width=self.config.output_width,
-                    target_height=self.config.output_height,
-                    blur_strength=self.config.blur_strength,
-                    verbose=False
-                ):
-                    current = temp
-                    result.effects_applied.append("blur_background")
-
-            # 3. 应用视觉效果（需要使用enhanced处理器）
-            # 这里简化处理，实际可以调用对应的enhanced模块
-
-            # 4. 最终输出
-            if current != input_path:
-                # 复制到最终输出
-                import shutil
-                shutil.copy2(current, output_path)
-            else:
-                # 没有应用任何效果，直接复制
-                import shutil
-                shutil.copy2(input_path, output_path)
+                    print(f"处理失败: {e}")
+            return result
 
+        # 没有启用可处理的效果，直接复制
+        try:
+            shutil.copy2(input_path, output_path)
             result.success = True
             if verbose:
                 print(f"处理完成: {output_path}")
-                print(f"应用的效果: {', '.join(result.effects_applied)}")
-
         except Exception as e:
             result.error_message = str(e)
             if verbose:
                 print(f"处理失败: {e}")
 
-        finally:
-            self._cleanup_temp_files()
-
         return result
 
     def process_batch(
@@ -197,48 +188,181 @@ class AllEffectsProcessor:
             处理结果列表
         """
         os.makedirs(output_dir, exist_ok=True)
-        results = []
-
-        for i, input_path in enumerate(input_paths, 1):
-            if verbose:
-                print(f"\n[{i}/{len(input_paths)}] 处理: {os.path.basename(input_path)}")
-
-            output_name = f"processed_{os.path.basename(input_path)}"
-            output_path = os.path.join(output_dir, output_name)
+        total = len(input_paths)
+        output_paths = [
+            os.path.join(output_dir, f"processed_{os.path.basename(p)}")
+            for p in input_paths
+        ]
+
+        max_parallel = self.config.max_parallel
+        if max_parallel <= 0:
+            max_parallel = min(total, (os.cpu_count() or 1) // 2)
+        parallel = max_parallel > 1
+
+        # 一次性检查所有输入是否存在（并行时顺带取文件大小用于排序）
+        sizes = _scan_inputs(input_paths, with_size=parallel)
+
+        if not parallel:
+            results = []
+            for i, (input_path, output_path) in enumerate(zip(input_paths, output_paths), 1):
+                if verbose:
+                    print(f"\n[{i}/{total}] 处理: {os.path.basename(input_path)}")
+
+                if input_path in sizes:
+                    result = self.process_video(input_path, output_path, verbose, _skip_check=True)
+                else:
+                    result = ProcessingResult(
+                        success=False,
+                        input_path=input_path,
+                        output_path=output_path,
+                        error_message=_missing_message(input_path)
+                    )
+                results.append(result)
+
+            return results
+
+        # 并行处理：每个进程使用独立的处理器实例，
+        # 子进程不输出详情，由主进程按完成顺序汇总打印。
+        # 进程池按提交顺序逐个领取任务，空闲进程立即处理下一个视频；
+        # 按文件大小（近似时长）降序提交，让最长的任务先开始，避免最后只剩一个长任务在跑
+        results: List[Optional[ProcessingResult]] = [None] * total
+        done = 0
+        for idx, input_path in enumerate(input_paths):
+            if input_path not in sizes:
+                results[idx] = ProcessingResult(
+                    success=False,
+                    input_path=input_path,
+                    output_path=output_paths[idx],
+                    error_message=_missing_message(input_path)
+                )
+                done += 1
+                if verbose:
+                    print(f"[{done}/{total}] {os.path.basename(input_path)} 失败: {results[idx].error_message}")
 
-            result = self.process_video(input_path, output_path, verbose)
-            results.append(result)
+        order = sorted(
+            (idx for idx in range(total) if results[idx] is None),
+            key=lambda idx: sizes[input_paths[idx]], reverse=True
+        )
+        with ProcessPoolExecutor(max_workers=max_parallel) as executor:
+            future_to_idx = {
+                executor.submit(_process_one, (self.config, input_paths[idx], output_paths[idx])): idx
+                for idx in order
+            }
+            for future in as_completed(future_to_idx):
+                idx = future_to_idx[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = ProcessingResult(
+                        success=False,
+                        input_path=input_paths[idx],
+                        output_path=output_paths[idx],
+                        error_message=str(e)
+                    )
+                results[idx] = result
+                done += 1
+                if verbose:
+                    status = "完成" if result.success else f"失败: {result.error_message}"
+                    print(f"[{done}/{total}] {os.path.basename(result.input_path)} {status}")
 
         return results
 
-    def _get_temp_file(self) -> str:
-        """获取临时文件路径"""
-        temp = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
-        temp.close()
-        self.temp_files.append(temp.name)
-        return temp.name
-
-    def _cleanup_temp_files(self):
-        """清理临时文件"""
-        for f in self.temp_files:
-            if os.path.exists(f):
-                try:
-                    os.unlink(f)
-                except:
-                    pass
-        self.temp_files = []
-
+    def _build_fused_command(
+        self,
+        input_path: str,
+        output_path: str
+    ) -> Optional[Tuple[List[str], List[str]]]:
+        """
+        把启用的效果合并为一条ffmpeg命令（去重滤镜链接在模糊背景的split之前），
+        只解码编码一次，不产生中间文件
 
-def create_preset_config(preset: str) -> EffectConfig:
+        Returns:
+            (ffmpeg命令, 效果列表)，没有可合并的效果时返回None（逐个处理）
+        """
+        cfg = self.config
+        use_dedup = bool(cfg.enable_dedup and cfg.dedup_config and build_dedup_filter_chain)
+        if not use_dedup and not cfg.enable_blur_background:
+            return None
+
+        effects = []
+        vf, af, target_fps = "", "", 0
+        if use_dedup:
+            info = get_video_info(input_path)
+            vf, af, target_fps, _ = build_dedup_filter_chain(cfg.dedup_config, info)
+            if vf == "null":
+                vf = ""
+            effects.append("dedup")
+
+        if cfg.enable_blur_background:
+            filter_complex = build_blur_background_filter(
+                cfg.output_width, cfg.output_height, cfg.blur_strength, pre_filter=vf
+            )
+            effects.append("blur_background")
+        else:
+            filter_complex = f"[0:v]{vf or 'null'}[v]"
+
+        cmd = [
+            'ffmpeg', '-y', '-i', input_path,
+            '-filter_complex', filter_complex,
+            '-map', '[v]', '-map', '0:a?',
+        ]
+        if af and af != "anull":
+            cmd.extend(['-af', af])
+        if target_fps:
+            cmd.extend(['-r', str(target_fps)])
+        cmd.extend([
+            '-c:v', 'libx264', '-preset', 'fast', '-crf', '18',
+            '-c:a', 'aac', '-b:a', '128k',
+            '-pix_fmt', 'yuv420p',
+            output_path
+        ])
+        return cmd, effects
+
+
+def _missing_message(path: str) -> str:
+    return f"文件不存在: {path}"
+
+
+def _scan_inputs(paths: List[str], with_size: bool = False) -> Dict[str, int]:
     """
-    创建预设配置
-
-    Args:
-        preset: 预设名称 (light/medium/strong/extreme)
+    批量检查输入文件是否存在：每个目录只 scandir 一次
 
     Returns:
-        EffectConfig
+        {存在的路径: 文件大小}（with_size=False 时大小为0）
     """
+    by_dir: Dict[str, List[str]] = {}
+    for p in paths:
+        by_dir.setdefault(os.path.dirname(p) or ".", []).append(p)
+
+    found: Dict[str, int] = {}
+    for d, dir_paths in by_dir.items():
+        try:
+            with os.scandir(d) as it:
+                entries = {entry.name: entry for entry in it}
+        except OSError:
+            entries = {}
+
+        for p in dir_paths:
+            entry = entries.get(os.path.basename(p))
+            try:
+                if entry is not None:
+                    found[p] = entry.stat().st_size if with_size else 0
+                elif os.path.exists(p):
+                    # 大小写不敏感的文件系统上名称可能对不上，逐个确认
+                    found[p] = os.path.getsize(p) if with_size else 0
+            except OSError:
+                pass
+    return found
+
+
+def _process_one(args: tuple) -> ProcessingResult:
+    """进程池任务：用独立的处理器实例处理单个视频"""
+    config, input_path, output_path = args
+    return AllEffectsProcessor(config).process_video(input_path, output_path, verbose=False, _skip_check=True)
+
+
+def _build_preset_config(preset: str) -> EffectConfig:
+    """按预设名称构建配置（仅在导入时为每个预设调用一次）"""
     config = EffectConfig()
 
     if preset == "light":
@@ -281,6 +405,29 @@ def create_preset_config(preset: str) -> EffectConfig:
     return config
 
 
+# 预设是固定集合，导入时构建一次
+_PRESETS: Dict[str, EffectConfig] = {
+    name: _build_preset_config(name) for name in ("light", "medium", "strong", "extreme")
+}
+
+
+def create_preset_config(preset: str) -> EffectConfig:
+    """
+    创建预设配置
+
+    Args:
+        preset: 预设名称 (light/medium/strong/extreme)，未知名称返回默认配置
+
+    Returns:
+        EffectConfig（独立副本，调用方可自由修改）
+    """
+    config = _PRESETS.get(preset)
+    if config is None:
+        return EffectConfig()
+    # 字段都是不可变值，浅拷贝即可
+    return copy.copy(config)
+
+
 # 便捷函数
 def quick_process(
     input_path: str,
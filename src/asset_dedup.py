@@ -13,10 +13,20 @@ assets/
 
 import os
 import random
+import tempfile
 from pathlib import Path
-from dataclasses import dataclass, field
-from typing import List, Optional, Tuple
+from dataclasses import dataclass, field, replace
+from typing import Callable, List, Optional, Tuple, Dict
 from enum import Enum
+from operator import attrgetter
+
+from .compat import DATACLASS_SLOTS
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
 
 # ============================================================
@@ -28,9 +38,14 @@ def get_asset_dir() -> Path:
     return Path(__file__).parent.parent / "assets"
 
 
+# list_assets 缓存: (类别, 扩展名) -> (目录mtime, 素材列表)
+# 目录中增删文件会改变目录mtime，缓存随之失效
+_ASSET_CACHE: Dict[Tuple[str, Tuple[str, ...]], Tuple[int, List[Path]]] = {}
+
+
 def list_assets(category: str, extensions: List[str] = None) -> List[Path]:
     """
-    列出指定类别的素材
+    列出指定类别的素材（按目录mtime缓存，扩展名不区分大小写）
 
     Args:
         category: 素材类别 (stickers, titles, frames, particles, animated)
@@ -40,18 +55,31 @@ def list_assets(category: str, extensions: List[str] = None) -> List[Path]:
         素材文件路径列表
     """
     asset_dir = get_asset_dir() / category
-    if not asset_dir.exists():
+    try:
+        mtime = asset_dir.stat().st_mtime_ns
+    except OSError:
         return []
 
     if extensions is None:
         extensions = ['.png', '.gif', '.mp4', '.mov']
 
-    files = []
-    for ext in extensions:
-        files.extend(asset_dir.glob(f"*{ext}"))
-        files.extend(asset_dir.glob(f"*{ext.upper()}"))
+    exts = tuple(ext.lower() for ext in extensions)
+    key = (category, exts)
+    cached = _ASSET_CACHE.get(key)
+    if cached is not None and cached[0] == mtime:
+        return list(cached[1])
+
+    # 一次 scandir 按后缀过滤，代替每个扩展名大小写各 glob 一次
+    # 对文件名字符串排序，比较 Path 对象要慢得多
+    with os.scandir(asset_dir) as it:
+        names = sorted(
+            entry.name for entry in it
+            if entry.name.lower().endswith(exts) and entry.is_file()
+        )
+    files = [asset_dir / name for name in names]
 
-    return sorted(files)
+    _ASSET_CACHE[key] = (mtime, files)
+    return list(files)
 
 
 def random_select(files: List[Path], count: int) -> List[Path]:
@@ -80,7 +108,7 @@ class OverlayPosition(Enum):
     RIGHT_EDGE = "right_edge"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class StickerConfig:
     """贴纸配置"""
     enabled: bool = True
@@ -94,7 +122,7 @@ class StickerConfig:
     fade_duration: float = 0.3          # 淡入淡出时长
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class AnimatedStickerConfig:
     """动态贴纸配置"""
     enabled: bool = True
@@ -106,7 +134,7 @@ class AnimatedStickerConfig:
     ])
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class TitleConfig:
     """标题框配置"""
     enabled: bool = True
@@ -117,7 +145,7 @@ class TitleConfig:
     fade_duration: float = 0.5
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class FrameConfig:
     """边框配置"""
     enabled: bool = False
@@ -125,7 +153,7 @@ class FrameConfig:
     opacity: float = 0.8
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ParticleConfig:
     """粒子效果配置"""
     enabled: bool = True
@@ -134,7 +162,7 @@ class ParticleConfig:
     duration_range: Tuple[float, float] = (4.0, 8.0)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class AssetDedupConfig:
     """素材去重总配置"""
     sticker: StickerConfig = field(default_factory=StickerConfig)
@@ -148,6 +176,29 @@ class AssetDedupConfig:
 # 位置计算
 # ============================================================
 
+# 固定位置的表达式模板（只依赖边距 {m}），查表代替逐个分支判断
+_STATIC_POS = {
+    OverlayPosition.TOP_LEFT: ("{m}", "{m}"),
+    OverlayPosition.TOP_RIGHT: ("W-w-{m}", "{m}"),
+    OverlayPosition.TOP_CENTER: ("(W-w)/2", "{m}"),
+    OverlayPosition.BOTTOM_LEFT: ("{m}", "H-h-{m}"),
+    OverlayPosition.BOTTOM_RIGHT: ("W-w-{m}", "H-h-{m}"),
+    OverlayPosition.BOTTOM_CENTER: ("(W-w)/2", "H-h-{m}"),
+    OverlayPosition.CENTER: ("(W-w)/2", "(H-h)/2"),
+}
+
+# 默认边距30的结果在导入时算好，相同位置共享同一个元组
+_POS30 = {
+    pos: (x.format(m=30), y.format(m=30)) for pos, (x, y) in _STATIC_POS.items()
+}
+
+# 边缘位置的x表达式模板（y随机）
+_EDGE_X = {
+    OverlayPosition.LEFT_EDGE: "{m}",
+    OverlayPosition.RIGHT_EDGE: "W-w-{m}",
+}
+
+
 def calculate_position(
     pos: OverlayPosition,
     video_width: int,
@@ -162,58 +213,136 @@ def calculate_position(
     Returns:
         (x_expr, y_expr) FFmpeg位置表达式
     """
-    if pos == OverlayPosition.TOP_LEFT:
-        return (str(margin), str(margin))
-    elif pos == OverlayPosition.TOP_RIGHT:
-        return (f"W-w-{margin}", str(margin))
-    elif pos == OverlayPosition.TOP_CENTER:
-        return ("(W-w)/2", str(margin))
-    elif pos == OverlayPosition.BOTTOM_LEFT:
-        return (str(margin), f"H-h-{margin}")
-    elif pos == OverlayPosition.BOTTOM_RIGHT:
-        return (f"W-w-{margin}", f"H-h-{margin}")
-    elif pos == OverlayPosition.BOTTOM_CENTER:
-        return ("(W-w)/2", f"H-h-{margin}")
-    elif pos == OverlayPosition.CENTER:
-        return ("(W-w)/2", "(H-h)/2")
-    elif pos == OverlayPosition.LEFT_EDGE:
-        y_offset = random.randint(margin, max(margin, video_height - element_height - margin))
-        return (str(margin), str(y_offset))
-    elif pos == OverlayPosition.RIGHT_EDGE:
+    if margin == 30:
+        static = _POS30.get(pos)
+        if static is not None:
+            return static
+    else:
+        template = _STATIC_POS.get(pos)
+        if template is not None:
+            return (template[0].format(m=margin), template[1].format(m=margin))
+
+    edge_x = _EDGE_X.get(pos)
+    if edge_x is not None:
         y_offset = random.randint(margin, max(margin, video_height - element_height - margin))
-        return (f"W-w-{margin}", str(y_offset))
-    else:  # RANDOM
-        max_x = max(margin, video_width - element_width - margin)
-        max_y = max(margin, video_height - element_height - margin)
-        return (str(random.randint(margin, max_x)), str(random.randint(margin, max_y)))
+        return (edge_x.format(m=margin), str(y_offset))
+    # RANDOM
+    max_x = max(margin, video_width - element_width - margin)
+    max_y = max(margin, video_height - element_height - margin)
+    return (str(random.randint(margin, max_x)), str(random.randint(margin, max_y)))
 
 
-def get_random_timestamps(duration: float, count: int, min_gap: float = 5.0) -> List[float]:
-    """生成随机时间点"""
+def calculate_positions(
+    positions: List[OverlayPosition],
+    video_width: int,
+    video_height: int,
+    element_widths: List[int],
+    margin: int = 30
+) -> Tuple[List[str], List[str]]:
+    """
+    批量计算叠加位置(元素按正方形估算高度)
+
+    有 numpy 时随机坐标一次性向量化生成，最后才转成字符串
+
+    Returns:
+        (x表达式列表, y表达式列表)
+    """
+    if not NUMPY_AVAILABLE or not positions:
+        pairs = [
+            calculate_position(pos, video_width, video_height, ew, ew, margin=margin)
+            for pos, ew in zip(positions, element_widths)
+        ]
+        return [p[0] for p in pairs], [p[1] for p in pairs]
+
+    widths = np.asarray(element_widths, dtype=np.int64)
+    max_x = np.maximum(margin, video_width - widths - margin)
+    max_y = np.maximum(margin, video_height - widths - margin)
+    rng = np.random.default_rng()
+    rand_x = rng.integers(margin, max_x + 1).tolist()
+    rand_y = rng.integers(margin, max_y + 1).tolist()
+
+    xs, ys = [], []
+    for i, pos in enumerate(positions):
+        template = _STATIC_POS.get(pos)
+        if template is not None:
+            if margin == 30:
+                x_expr, y_expr = _POS30[pos]
+            else:
+                x_expr, y_expr = template[0].format(m=margin), template[1].format(m=margin)
+        else:
+            edge_x = _EDGE_X.get(pos)
+            x_expr = edge_x.format(m=margin) if edge_x is not None else str(rand_x[i])
+            y_expr = str(rand_y[i])
+        xs.append(x_expr)
+        ys.append(y_expr)
+    return xs, ys
+
+
+def get_random_timestamps(
+    duration: float,
+    count: int,
+    min_gap: float = 5.0,
+    rng=None
+) -> List[float]:
+    """
+    生成随机时间点
+
+    一次生成一批有序候选点，单次遍历按最小间隔贪心选取；
+    候选点不够时退化为均匀分布的时间点。rng 为 numpy Generator 时批量采样。
+    """
+    if count <= 0:
+        return []
     if duration < min_gap * count:
         count = max(1, int(duration / min_gap))
 
     start = duration * 0.1
     end = duration * 0.85
 
-    timestamps = []
-    attempts = 0
-    max_attempts = count * 20
+    size = max(count * 4, 32)
+    if rng is not None:
+        candidates = np.sort(rng.uniform(start, end, size=size)).tolist()
+    else:
+        candidates = sorted(random.uniform(start, end) for _ in range(size))
 
-    while len(timestamps) < count and attempts < max_attempts:
-        t = random.uniform(start, end)
-        if all(abs(t - existing) >= min_gap for existing in timestamps):
+    timestamps = []
+    last = float("-inf")
+    for t in candidates:
+        if t - last >= min_gap:
             timestamps.append(t)
-        attempts += 1
-
-    return sorted(timestamps)
+            last = t
+            if len(timestamps) == count:
+                return timestamps
+
+    # 均匀分布兜底
+    step = (end - start) / (count - 1)
+    return [start + i * step for i in range(count)]
+
+
+def _random_overlay_params(
+    rng,
+    count: int,
+    scale_range: Tuple[float, float],
+    duration_range: Tuple[float, float],
+    positions: List[OverlayPosition]
+) -> List[Tuple[float, float, OverlayPosition]]:
+    """批量生成 count 组 (缩放, 时长, 位置)"""
+    if rng is not None:
+        scales = rng.uniform(*scale_range, size=count).tolist()
+        durations = rng.uniform(*duration_range, size=count).tolist()
+        pos_idx = rng.integers(0, len(positions), size=count).tolist()
+        return [(sc, du, positions[pi]) for sc, du, pi in zip(scales, durations, pos_idx)]
+
+    return [
+        (random.uniform(*scale_range), random.uniform(*duration_range), random.choice(positions))
+        for _ in range(count)
+    ]
 
 
 # ============================================================
 # 滤镜构建
 # ============================================================
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class OverlayItem:
     """叠加项"""
     asset_path: Path
@@ -227,6 +356,47 @@ class OverlayItem:
     fade_duration: float = 0.3
 
 
+@dataclass(**DATACLASS_SLOTS)
+class OverlayLayout:
+    """叠加项的预计算布局（生成滤镜前一次算好）"""
+    scaled_width: int
+    x: str
+    y: str
+    end_time: float
+    fade_out_start: float   # 相对素材自身起点的淡出时间
+
+
+def compute_overlay_layouts(
+    items: List[OverlayItem],
+    video_width: int,
+    video_height: int,
+    margin: int = 30
+) -> List[OverlayLayout]:
+    """
+    一次性计算所有叠加项的缩放宽度、位置和时间
+
+    动态素材 scale>=1.0 时铺满画面，宽度取视频宽度；随机坐标由 calculate_positions 批量生成
+    """
+    widths = [
+        int(video_width * item.scale)
+        if item.scale < 1.0 or not (item.is_animated or item.is_video) else video_width
+        for item in items
+    ]
+    xs, ys = calculate_positions(
+        [item.position for item in items], video_width, video_height, widths, margin=margin
+    )
+    return [
+        OverlayLayout(
+            scaled_width=scaled_width,
+            x=x_expr,
+            y=y_expr,
+            end_time=item.start_time + item.duration,
+            fade_out_start=max(0.0, item.duration - item.fade_duration)
+        )
+        for item, scaled_width, x_expr, y_expr in zip(items, widths, xs, ys)
+    ]
+
+
 def build_overlay_filter_complex(
     video_width: int,
     video_height: int,
@@ -279,9 +449,9 @@ def build_overlay_filter_complex(
 
         # 透明度处理
         if item.opacity < 1.0:
-            alpha_filter = f",format=rgba,colorchannelmixer=aa={item.opacity}"
+            alpha_frag = _alpha_fragment(item.opacity)
         else:
-            alpha_filter = ""
+            alpha_frag = ""
 
         # 淡入淡出效果
         if item.fade_duration > 0:
@@ -295,7 +465,7 @@ def build_overlay_filter_complex(
             fade_filter = ""
 
         filter_parts.append(
-            f"{input_label}{scale_filter}{alpha_filter}{fade_filter}{processed_label}"
+            f"{input_label}{scale_filter}{alpha_frag}{fade_filter}{processed_label}"
         )
 
         # 叠加滤镜
@@ -352,7 +522,7 @@ def build_movie_overlay_chain(
         movie_filter += f",scale={scaled_width}:-1"
 
         if item.opacity < 1.0:
-            movie_filter += f",format=rgba,colorchannelmixer=aa={item.opacity}"
+            movie_filter += _alpha_fragment(item.opacity)
 
         # 叠加
         overlay = (
@@ -375,15 +545,21 @@ def generate_dedup_overlays(
     video_width: int,
     video_height: int,
     duration: float,
-    config: AssetDedupConfig
+    config: AssetDedupConfig,
+    sort: bool = True
 ) -> List[OverlayItem]:
     """
     根据配置生成叠加项列表
 
+    Args:
+        sort: 是否按开始时间排序（仅用于展示；滤镜图由 enable 控制时间，不依赖顺序）
+
     Returns:
         OverlayItem列表
     """
     items = []
+    # 有 numpy 时每个类别的随机数一次批量生成
+    rng = np.random.default_rng() if NUMPY_AVAILABLE else None
 
     # 1. 标题框（视频开头）
     if config.title.enabled:
@@ -404,13 +580,13 @@ def generate_dedup_overlays(
         stickers = list_assets("stickers", [".png"])
         if stickers:
             selected = random_select(stickers, config.sticker.count)
-            timestamps = get_random_timestamps(duration, len(selected), min_gap=4.0)
-
-            for sticker, ts in zip(selected, timestamps):
-                scale = random.uniform(*config.sticker.scale_range)
-                sticker_duration = random.uniform(*config.sticker.duration_range)
-                position = random.choice(config.sticker.positions)
+            timestamps = get_random_timestamps(duration, len(selected), min_gap=4.0, rng=rng)
+            params = _random_overlay_params(
+                rng, len(timestamps), config.sticker.scale_range,
+                config.sticker.duration_range, config.sticker.positions
+            )
 
+            for sticker, ts, (scale, sticker_duration, position) in zip(selected, timestamps, params):
                 items.append(OverlayItem(
                     asset_path=sticker,
                     start_time=ts,
@@ -425,13 +601,13 @@ def generate_dedup_overlays(
         animated = list_assets("animated", [".gif"])
         if animated:
             selected = random_select(animated, config.animated.count)
-            timestamps = get_random_timestamps(duration, len(selected), min_gap=6.0)
-
-            for gif, ts in zip(selected, timestamps):
-                scale = random.uniform(*config.animated.scale_range)
-                gif_duration = random.uniform(*config.animated.duration_range)
-                position = random.choice(config.animated.positions)
+            timestamps = get_random_timestamps(duration, len(selected), min_gap=6.0, rng=rng)
+            params = _random_overlay_params(
+                rng, len(timestamps), config.animated.scale_range,
+                config.animated.duration_range, config.animated.positions
+            )
 
+            for gif, ts, (scale, gif_duration, position) in zip(selected, timestamps, params):
                 items.append(OverlayItem(
                     asset_path=gif,
                     start_time=ts,
@@ -447,11 +623,13 @@ def generate_dedup_overlays(
         particles = list_assets("particles", [".mp4", ".mov"])
         if particles:
             selected = random_select(particles, config.particle.count)
-            timestamps = get_random_timestamps(duration, len(selected), min_gap=10.0)
-
-            for particle, ts in zip(selected, timestamps):
-                particle_duration = random.uniform(*config.particle.duration_range)
+            timestamps = get_random_timestamps(duration, len(selected), min_gap=10.0, rng=rng)
+            if rng is not None:
+                durations = rng.uniform(*config.particle.duration_range, size=len(timestamps)).tolist()
+            else:
+                durations = [random.uniform(*config.particle.duration_range) for _ in timestamps]
 
+            for particle, ts, particle_duration in zip(selected, timestamps, durations):
                 items.append(OverlayItem(
                     asset_path=particle,
                     start_time=ts,
@@ -464,11 +642,279 @@ def generate_dedup_overlays(
                 ))
 
     # 按开始时间排序
-    items.sort(key=lambda x: x.start_time)
+    if sort:
+        items.sort(key=attrgetter("start_time"))
 
     return items
 
 
+def prune_overlays(items: List[OverlayItem], duration: float) -> List[OverlayItem]:
+    """
+    去掉不会产生画面效果的叠加项（保持原顺序）
+
+    - 开始时间不早于视频结尾、或时长<=0 的丢弃，结束时间截到视频时长
+      （截短后可能短于两段淡入淡出，生成滤镜时只保留淡入）
+    - 同一素材、同一固定位置和缩放，且时间窗被另一项完全覆盖的丢弃
+      （随机/贴边位置每项坐标不同，不参与合并）
+
+    duration<=0（时长未知）时只丢弃时长<=0 的项
+    """
+    kept = []
+    for item in items:
+        if item.duration <= 0:
+            continue
+        if duration > 0:
+            if item.start_time >= duration:
+                continue
+            if item.start_time + item.duration > duration:
+                item = replace(item, duration=duration - item.start_time)
+        kept.append(item)
+
+    # 固定位置的相同叠加项按键分组，检查时间窗覆盖
+    groups: Dict[tuple, List[OverlayItem]] = {}
+    for item in kept:
+        if item.position in _STATIC_POS:
+            key = (item.asset_path, item.position, item.scale, item.opacity)
+            groups.setdefault(key, []).append(item)
+
+    covered = set()
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        for a in group:
+            a_end = a.start_time + a.duration
+            for b in group:
+                if b is a or id(b) in covered:
+                    continue
+                if b.start_time <= a.start_time and a_end <= b.start_time + b.duration:
+                    covered.add(id(a))
+                    break
+
+    if not covered:
+        return kept
+    return [item for item in kept if id(item) not in covered]
+
+
+# 编码参数对所有视频相同，只构建一次
+_ENCODER_TAIL: Tuple[str, ...] = (
+    '-c:v', 'libx264', '-preset', 'fast', '-crf', '22',
+    '-c:a', 'aac', '-b:a', '128k',
+)
+
+def alpha_filter(opacity: float) -> str:
+    """
+    按不透明度缩放alpha平面的滤镜（RGBA输入），不透明时返回空字符串
+
+    lut 只查表处理alpha一个平面，colorchannelmixer 要对4个通道逐像素做矩阵运算
+    """
+    if opacity >= 1.0:
+        return ""
+    return f"lut=a=val*{opacity:.2f}"
+
+
+# 透明度滤镜片段（按两位小数取整的不透明度），预设用到的值导入时生成
+_ALPHA_FRAG: Dict[float, str] = {
+    o: ",format=rgba" + (f",{alpha_filter(o)}" if o < 1.0 else "") for o in (0.6, 0.7, 0.8, 1.0)
+}
+
+# 淡入滤镜片段，预设用到的淡入时长导入时生成
+_FADE_IN_FRAG: Dict[float, str] = {
+    fd: f"fade=t=in:st=0:d={fd}:alpha=1" for fd in (0.2, 0.3, 0.5)
+}
+
+
+def _alpha_fragment(opacity: float) -> str:
+    """返回 ",format=rgba,lut=a=..." 片段，相同不透明度复用同一字符串"""
+    key = round(opacity, 2)
+    frag = _ALPHA_FRAG.get(key)
+    if frag is None:
+        alpha = alpha_filter(key)
+        frag = _ALPHA_FRAG[key] = ",format=rgba" + (f",{alpha}" if alpha else "")
+    return frag
+
+
+def _escape_movie_path(path: str) -> str:
+    """转义 movie 滤镜参数中的路径"""
+    return path.replace("'", "'\\''").replace(":", "\\:")
+
+
+# filter_complex 超过该长度（字节）时改用 -filter_complex_script 传递
+FILTER_SCRIPT_THRESHOLD = 32 * 1024
+
+
+def write_filter_script(filter_complex: str) -> str:
+    """
+    把滤镜图写入临时脚本文件
+
+    Returns:
+        脚本文件路径（调用方执行完命令后用 remove_filter_script 清理）
+    """
+    with tempfile.NamedTemporaryFile(
+        'w', suffix='.txt', prefix='asset_filter_', delete=False, encoding='utf-8'
+    ) as f:
+        f.write(filter_complex)
+        return f.name
+
+
+def remove_filter_script(cmd: List[str]) -> None:
+    """删除命令中 -filter_complex_script 引用的临时脚本文件（如果有）"""
+    try:
+        idx = cmd.index('-filter_complex_script')
+    except ValueError:
+        return
+    try:
+        os.remove(cmd[idx + 1])
+    except (IndexError, OSError):
+        pass
+
+
+def build_overlay_filter_parts(
+    items: List[OverlayItem],
+    video_width: int,
+    video_height: int,
+    extra_vf: str = "",
+    source: str = "[0:v]",
+    first_input: int = 1,
+    out_label: str = "[vout]",
+    prefix: str = "",
+    video_input: Callable[[str], str] = str,
+    verbose_labels: bool = False
+) -> Tuple[List[str], List[str]]:
+    """
+    构建特效+素材叠加的滤镜片段
+
+    build_asset_dedup_command、asset_processor 的单版本和多版本单进程处理共用：
+    同一素材、同一缩放宽度的静态贴纸只加载一次（split 复用），淡入淡出接在贴纸链上，
+    透明度和淡入片段复用同一字符串
+
+    Args:
+        items: 叠加项（已经过 prune_overlays）
+        video_width, video_height: 视频尺寸
+        extra_vf: 基础特效滤镜链
+        source: 输入视频流标签
+        first_input: 第一个动态素材的输入序号
+        out_label: 最终输出标签
+        prefix: 中间标签前缀（同一滤镜图中有多条叠加链时区分）
+        video_input: 粒子视频的实际输入路径（如解码缓存），默认原路径
+        verbose_labels: 使用可读的长标签（调试用），默认使用短标签
+
+    Returns:
+        (滤镜片段列表, 动态素材的输入参数)，没有特效和素材时片段列表为空
+    """
+    # 分离静态和动态素材
+    static_items = [it for it in items if not it.is_animated and not it.is_video]
+    dynamic_items = [it for it in items if it.is_animated or it.is_video]
+    layouts = compute_overlay_layouts(static_items + dynamic_items, video_width, video_height)
+    static_layouts = layouts[:len(static_items)]
+    dynamic_layouts = layouts[len(static_items):]
+
+    # 添加动态素材输入
+    extra_inputs: List[str] = []
+    for item in dynamic_items:
+        if item.is_video:
+            extra_inputs.extend(['-stream_loop', '-1', '-i', video_input(str(item.asset_path))])
+        else:  # GIF
+            extra_inputs.extend(['-ignore_loop', '0', '-i', str(item.asset_path)])
+
+    # 流标签：默认单字母+十六进制序号，缩短命令长度和解析开销；最终输出用 out_label
+    if verbose_labels:
+        base_label = f"[{prefix}vbase]"
+        sl = lambda i: f"[{prefix}stk{i}]"
+        pl = lambda i: f"[{prefix}png{i}]"
+        vl = lambda i: f"[{prefix}vs{i}]"
+        dl = lambda i: f"[{prefix}dyn{i}]"
+        ol = lambda i: f"[{prefix}vd{i}]"
+    else:
+        base_label = f"[{prefix}v]"
+        sl = lambda i: f"[{prefix}a{i:x}]"
+        pl = lambda i: f"[{prefix}e{i:x}]"
+        vl = lambda i: f"[{prefix}b{i:x}]"
+        dl = lambda i: f"[{prefix}c{i:x}]"
+        ol = lambda i: f"[{prefix}d{i:x}]"
+
+    parts: List[str] = []
+    current_stream = source
+    n_overlays = len(static_items) + len(dynamic_items)
+
+    # 先应用基础特效
+    if extra_vf:
+        label = base_label if n_overlays else out_label
+        parts.append(f"{current_stream}{extra_vf}{label}")
+        current_stream = label
+
+    # 叠加静态贴纸（使用movie滤镜）
+    # 同一素材、同一缩放宽度、同一不透明度的贴纸只加载一次，用 split 分给各个叠加
+    groups: Dict[Tuple[str, int, float], List[int]] = {}
+    for i, (item, lay) in enumerate(zip(static_items, static_layouts)):
+        key = (str(item.asset_path), lay.scaled_width, round(item.opacity, 2))
+        groups.setdefault(key, []).append(i)
+
+    shared = set()
+    for (path, width, opacity), indices in groups.items():
+        if len(indices) > 1:
+            outs = "".join(pl(i) for i in indices)
+            parts.append(
+                f"movie='{_escape_movie_path(path)}',scale={width}:-1"
+                f"{_alpha_fragment(opacity)},split={len(indices)}{outs}"
+            )
+            shared.update(indices)
+
+    for i, (item, lay) in enumerate(zip(static_items, static_layouts)):
+        # 淡入淡出放在 split 之后，每个实例可以有各自的时间
+        fades = []
+        if item.fade_duration > 0:
+            fades.append(
+                _FADE_IN_FRAG.get(item.fade_duration)
+                or f"fade=t=in:st=0:d={item.fade_duration}:alpha=1"
+            )
+            # 显示时间不超过两段淡入淡出时只保留淡入，结束由 enable 截断
+            if item.fade_duration * 2 < item.duration:
+                fades.append(f"fade=t=out:st={lay.fade_out_start}:d={item.fade_duration}:alpha=1")
+
+        if i in shared:
+            if fades:
+                parts.append(f"{pl(i)}{','.join(fades)}{sl(i)}")
+                sticker = sl(i)
+            else:
+                sticker = pl(i)
+        else:
+            # movie滤镜加载PNG并处理（movie是源滤镜，没有输入标签）
+            movie_chain = (
+                f"movie='{_escape_movie_path(str(item.asset_path))}',scale={lay.scaled_width}:-1"
+                f"{_alpha_fragment(item.opacity)}"
+            )
+            if fades:
+                movie_chain += "," + ",".join(fades)
+            parts.append(f"{movie_chain}{sl(i)}")
+            sticker = sl(i)
+
+        label = out_label if i == n_overlays - 1 else vl(i)
+        parts.append(
+            f"{current_stream}{sticker}overlay={lay.x}:{lay.y}"
+            f":enable='between(t,{item.start_time:.2f},{lay.end_time:.2f})'{label}"
+        )
+        current_stream = label
+
+    # 叠加动态素材（不透明时也转成 RGBA，保证叠加链像素格式一致）
+    n_static = len(static_items)
+    for i, (item, lay) in enumerate(zip(dynamic_items, dynamic_layouts)):
+        if item.scale < 1.0:
+            scale_filter = f"scale={lay.scaled_width}:-1"
+        else:
+            scale_filter = f"scale={video_width}:{video_height}"
+        parts.append(f"[{first_input + i}:v]{scale_filter}{_alpha_fragment(item.opacity)}{dl(i)}")
+
+        label = out_label if n_static + i == n_overlays - 1 else ol(i)
+        parts.append(
+            f"{current_stream}{dl(i)}overlay={lay.x}:{lay.y}"
+            f":enable='between(t,{item.start_time:.2f},{lay.end_time:.2f})'"
+            f":shortest=1{label}"
+        )
+        current_stream = label
+
+    return parts, extra_inputs
+
+
 def build_asset_dedup_command(
     input_path: str,
     output_path: str,
@@ -477,7 +923,8 @@ def build_asset_dedup_command(
     duration: float,
     config: AssetDedupConfig,
     extra_vf: str = "",
-    extra_af: str = ""
+    extra_af: str = "",
+    verbose_labels: bool = False
 ) -> List[str]:
     """
     构建完整的FFmpeg命令
@@ -491,12 +938,16 @@ def build_asset_dedup_command(
         config: 去重配置
         extra_vf: 额外的视频滤镜（特效等）
         extra_af: 额外的音频滤镜
+        verbose_labels: 使用可读的长标签（调试用），默认使用短标签
 
     Returns:
-        FFmpeg命令列表
+        FFmpeg命令列表（滤镜图过大时通过临时脚本文件传入，
+        执行后可用 remove_filter_script 清理）
     """
     # 生成叠加项
-    items = generate_dedup_overlays(video_width, video_height, duration, config)
+    items = prune_overlays(
+        generate_dedup_overlays(video_width, video_height, duration, config, sort=False), duration
+    )
 
     if not items:
         # 没有素材，使用简单命令
@@ -505,124 +956,28 @@ def build_asset_dedup_command(
             cmd.extend(['-vf', extra_vf])
         if extra_af:
             cmd.extend(['-af', extra_af])
-        cmd.extend([
-            '-c:v', 'libx264', '-preset', 'fast', '-crf', '22',
-            '-c:a', 'aac', '-b:a', '128k',
-            output_path
-        ])
+        cmd.extend(_ENCODER_TAIL)
+        cmd.append(output_path)
         return cmd
 
-    # 分离静态和动态素材
-    static_items = [it for it in items if not it.is_animated and not it.is_video]
-    dynamic_items = [it for it in items if it.is_animated or it.is_video]
-
-    # 构建命令
-    cmd = ['ffmpeg', '-y', '-i', input_path]
-
-    # 添加动态素材输入
-    for item in dynamic_items:
-        if item.is_video:
-            cmd.extend(['-stream_loop', '-1', '-i', str(item.asset_path)])
-        else:  # GIF
-            cmd.extend(['-ignore_loop', '0', '-i', str(item.asset_path)])
-
-    # 构建filter_complex
-    filter_parts = []
-    current_stream = "[0:v]"
-
-    # 先应用基础特效
-    if extra_vf:
-        filter_parts.append(f"{current_stream}{extra_vf}[vbase]")
-        current_stream = "[vbase]"
-
-    # 叠加静态贴纸（使用movie滤镜）
-    for i, item in enumerate(static_items):
-        asset_path = str(item.asset_path).replace("'", "'\\''").replace(":", "\\:")
-        scaled_width = int(video_width * item.scale)
-
-        x_expr, y_expr = calculate_position(
-            item.position, video_width, video_height,
-            scaled_width, scaled_width, margin=30
-        )
-
-        end_time = item.start_time + item.duration
-        fade_out_start = end_time - item.fade_duration
-
-        # movie滤镜加载PNG并处理
-        movie_chain = f"movie='{asset_path}',scale={scaled_width}:-1"
-        if item.fade_duration > 0:
-            movie_chain += (
-                f",fade=t=in:st=0:d={item.fade_duration}:alpha=1"
-                f",fade=t=out:st={item.duration - item.fade_duration}:d={item.fade_duration}:alpha=1"
-            )
-
-        out_label = f"[vs{i}]"
-        overlay = (
-            f"{current_stream}{movie_chain}[stk{i}];"
-            f"{current_stream}[stk{i}]overlay={x_expr}:{y_expr}"
-            f":enable='between(t,{item.start_time:.2f},{end_time:.2f})'{out_label}"
-        )
-        filter_parts.append(overlay)
-        current_stream = out_label
-
-    # 叠加动态素材
-    for i, item in enumerate(dynamic_items):
-        input_idx = i + 1  # 动态素材从输入1开始
-        scaled_width = int(video_width * item.scale) if item.scale < 1.0 else video_width
-
-        x_expr, y_expr = calculate_position(
-            item.position, video_width, video_height,
-            scaled_width, scaled_width, margin=30
-        )
-
-        end_time = item.start_time + item.duration
-
-        # 处理输入流
-        proc_label = f"[dyn{i}]"
-        if item.scale < 1.0:
-            scale_filter = f"[{input_idx}:v]scale={scaled_width}:-1"
-        else:
-            scale_filter = f"[{input_idx}:v]scale={video_width}:{video_height}"
-
-        if item.opacity < 1.0:
-            scale_filter += f",format=rgba,colorchannelmixer=aa={item.opacity}"
-
-        filter_parts.append(f"{scale_filter}{proc_label}")
-
-        # 叠加
-        out_label = f"[vd{i}]" if i < len(dynamic_items) - 1 else "[vout]"
-        overlay = (
-            f"{current_stream}{proc_label}overlay={x_expr}:{y_expr}"
-            f":enable='between(t,{item.start_time:.2f},{end_time:.2f})'"
-            f":shortest=1{out_label}"
-        )
-        filter_parts.append(overlay)
-        current_stream = out_label
-
-    # 如果没有动态素材，最终输出标签
-    if not dynamic_items:
-        # 修改最后一个filter的输出标签
-        if filter_parts:
-            last_part = filter_parts[-1]
-            last_part = last_part.rsplit('[', 1)[0] + "[vout]"
-            filter_parts[-1] = last_part
-        current_stream = "[vout]"
+    filter_parts, extra_inputs = build_overlay_filter_parts(
+        items, video_width, video_height, extra_vf, verbose_labels=verbose_labels
+    )
+    cmd = ['ffmpeg', '-y', '-i', input_path, *extra_inputs]
 
-    filter_complex = ";".join(filter_parts)
-
-    if filter_complex:
+    filter_complex = ";\n".join(filter_parts)
+    if len(filter_complex) > FILTER_SCRIPT_THRESHOLD:
+        # 滤镜图过大时写入脚本文件，避免命令行超过 ARG_MAX
+        cmd.extend(['-filter_complex_script', write_filter_script(filter_complex)])
+    else:
         cmd.extend(['-filter_complex', filter_complex])
-        cmd.extend(['-map', '[vout]', '-map', '0:a?'])
+    cmd.extend(['-map', '[vout]', '-map', '0:a?'])
 
     if extra_af:
         cmd.extend(['-af', extra_af])
 
-    cmd.extend([
-        '-c:v', 'libx264', '-preset', 'fast', '-crf', '22',
-        '-c:a', 'aac', '-b:a', '128k',
-        '-shortest',
-        output_path
-    ])
+    cmd.extend(_ENCODER_TAIL)
+    cmd.extend(['-shortest', output_path])
 
     return cmd
 
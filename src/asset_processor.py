@@ -7,11 +7,16 @@ VideoMixer - 素材驱动去重处理器
 """
 
 import os
+import copy
+import hashlib
+import tempfile
 import subprocess
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 
 from .video_classifier_v2 import (
     analyze_video_v2, VideoAnalysisResult, VideoCategory,
@@ -22,9 +27,13 @@ from .video_effects import (
     EffectsConfig, build_effects_filter_chain, build_audio_filter
 )
 from .asset_dedup import (
-    AssetDedupConfig, generate_dedup_overlays, list_assets,
+    AssetDedupConfig, generate_dedup_overlays, prune_overlays, list_assets,
     create_light_asset_config, create_medium_asset_config, create_strong_asset_config,
-    calculate_position, OverlayItem
+    build_overlay_filter_parts,
+    FILTER_SCRIPT_THRESHOLD, write_filter_script, remove_filter_script
+)
+from .ffmpeg_utils import (
+    HW_ENCODERS, hw_encoder_args, mark_hw_encoder_failed, resolve_hw_encoder, run_ffmpeg
 )
 
 
@@ -44,24 +53,251 @@ class AssetDedupResult:
     category: VideoCategory = VideoCategory.GENERAL
     category_name: str = ""
     strength: str = ""
-    overlays_used: List[str] = None
+    overlays_used: List[Tuple[str, float]] = None   # (素材文件名, 开始时间)
     error_message: str = ""
 
     def __post_init__(self):
         if self.overlays_used is None:
             self.overlays_used = []
 
+    def describe(self) -> List[str]:
+        """叠加素材的可读描述，如 star.png @ 3.2s"""
+        return [f"{name} @ {start:.1f}s" for name, start in self.overlays_used]
+
+
+_ASSET_CONFIG_FACTORIES = {
+    DedupStrength.LIGHT: create_light_asset_config,
+    DedupStrength.MEDIUM: create_medium_asset_config,
+    DedupStrength.STRONG: create_strong_asset_config,
+}
+
+# 各强度的素材配置，首次使用时构建，之后只读共享
+_ASSET_CONFIGS: Dict[str, AssetDedupConfig] = {}
+
+
+def _shared_asset_config(strength: str) -> AssetDedupConfig:
+    """获取强度对应的共享素材配置（只读，调用方不得修改）"""
+    if strength not in _ASSET_CONFIG_FACTORIES:
+        strength = DedupStrength.MEDIUM
+    config = _ASSET_CONFIGS.get(strength)
+    if config is None:
+        config = _ASSET_CONFIGS[strength] = _ASSET_CONFIG_FACTORIES[strength]()
+    return config
+
 
 def get_asset_config(strength: str) -> AssetDedupConfig:
-    """根据强度获取素材配置"""
-    if strength == DedupStrength.LIGHT:
-        return create_light_asset_config()
-    elif strength == DedupStrength.MEDIUM:
-        return create_medium_asset_config()
-    elif strength == DedupStrength.STRONG:
-        return create_strong_asset_config()
+    """根据强度获取素材配置（返回独立副本，可自由修改）"""
+    return copy.deepcopy(_shared_asset_config(strength))
+
+
+# ============================================================
+# 编码器
+# ============================================================
+
+SOFTWARE_ENCODE_ARGS = ['-c:v', 'libx264', '-preset', 'fast', '-crf', '22']
+
+# 硬件编码质量值（编码器表见 advanced_remix.HW_ENCODERS），与 libx264 crf 22 对应
+HW_ENCODE_QUALITY = 22
+
+
+# 只输出警告和错误，stderr 量减少一个数量级
+FFMPEG_LOG_ARGS = ['-hide_banner', '-loglevel', 'warning']
+
+# 失败时保留的 stderr 行数
+STDERR_TAIL_LINES = 40
+
+
+# 单个ffmpeg进程的线程数上限（overlay 等滤镜的分片线程超过16收益很小）
+FFMPEG_MAX_THREADS = 16
+
+
+def ffmpeg_thread_count(parallel: int = 1) -> int:
+    """
+    每个ffmpeg进程的线程数
+
+    ffmpeg 默认 filter_complex 只用单线程，显式指定后滤镜图可按帧切片并行；
+    同时运行 parallel 个进程时平分，避免超订CPU
+    """
+    n = max(2, min(os.cpu_count() or 1, FFMPEG_MAX_THREADS))
+    return max(1, n // max(1, parallel))
+
+
+def _thread_args(threads: int) -> Tuple[List[str], List[str]]:
+    """(全局滤镜线程参数, 输出编码线程参数)，threads<=0 时按 ffmpeg_thread_count 计算"""
+    n = str(threads if threads > 0 else ffmpeg_thread_count())
+    return ['-filter_complex_threads', n, '-filter_threads', n], ['-threads', n]
+
+
+def _filter_complex_args(filter_complex: str) -> List[str]:
+    """滤镜图参数；过大时写入脚本文件，避免超过 ARG_MAX（执行后用 remove_filter_script 清理）"""
+    if len(filter_complex) > FILTER_SCRIPT_THRESHOLD:
+        return ['-filter_complex_script', write_filter_script(filter_complex)]
+    return ['-filter_complex', filter_complex]
+
+
+def build_asset_command(
+    input_path: str,
+    extra_inputs: List[str],
+    filter_complex: str,
+    video_filter: str,
+    audio_filter: str,
+    output_path: str,
+    hw_encoder: str = "",
+    threads: int = 0
+) -> List[str]:
+    """
+    组装素材去重的ffmpeg命令
+
+    Args:
+        input_path: 主视频
+        extra_inputs: 动态素材的输入参数
+        filter_complex: 叠加滤镜图（输出 [vout]），为空时使用 video_filter
+        video_filter: 只有特效没有素材时的 -vf
+        audio_filter: 音频滤镜
+        output_path: 输出路径
+        hw_encoder: resolve_hw_encoder 返回的名称，空字符串使用 libx264
+        threads: 滤镜图和编码线程数（0=按 ffmpeg_thread_count 计算）
+
+    Returns:
+        FFmpeg命令列表（可能引用临时滤镜脚本，执行后用 remove_filter_script 清理）
+    """
+    if hw_encoder:
+        input_args, filter_tail, encode_args = hw_encoder_args(hw_encoder, HW_ENCODE_QUALITY)
     else:
-        return create_medium_asset_config()
+        input_args, filter_tail, encode_args = [], "", SOFTWARE_ENCODE_ARGS
+    filter_thread_args, encode_thread_args = _thread_args(threads)
+
+    cmd = ['ffmpeg', '-y', *FFMPEG_LOG_ARGS, *filter_thread_args,
+           *input_args, '-i', input_path, *extra_inputs]
+
+    # 滤镜图末尾统一转换一次像素格式（叠加链中是 RGBA），避免编码前隐式插入转换
+    format_tail = filter_tail or "format=yuv420p"
+
+    if filter_complex:
+        filter_complex = f"{filter_complex[:-len('[vout]')]},{format_tail}[vout]"
+        cmd.extend(_filter_complex_args(filter_complex))
+        cmd.extend(['-map', '[vout]', '-map', '0:a?'])
+    elif video_filter or filter_tail:
+        cmd.extend(['-vf', ",".join(f for f in (video_filter, format_tail) if f)])
+
+    if audio_filter:
+        cmd.extend(['-af', audio_filter])
+
+    cmd.extend(encode_args)
+    if not filter_tail:
+        cmd.extend(['-pix_fmt', 'yuv420p'])
+    cmd.extend(encode_thread_args)
+    cmd.extend([
+        '-c:a', 'aac',
+        '-b:a', '128k',
+        '-shortest',
+        output_path
+    ])
+    return cmd
+
+
+# ============================================================
+# 粒子素材解码缓存
+# ============================================================
+
+# 短粒子视频按输出视频宽度缩小后转码为 fastdecode 的 H.264 缓存，之后各版本直接循环读取；
+# 缓存不窄于叠加尺寸，叠加时不会再放大（输出宽度不同时各自缓存）
+# （无损中间格式每个素材动辄上GB，缓存上限内放不下几个文件，会不断淘汰重建）
+PARTICLE_CACHE_DIR = os.path.join(tempfile.gettempdir(), "videomixer_particle_cache")
+PARTICLE_CACHE_VERSION = 3                    # 缓存格式变化时递增，旧文件按最久未用淘汰
+PARTICLE_CACHE_MAX_DURATION = 30.0            # 只缓存短于该时长(秒)的素材
+PARTICLE_CACHE_MAX_BYTES = 1024 ** 3         # 缓存总大小上限（1080p 宽每个文件约几十到上百MB），超出时删除最久未用的文件
+# 最近该时长内用过的文件不淘汰：正在运行的任务（多版本单进程最长 1200 秒×版本数）可能还在读取
+PARTICLE_CACHE_MIN_AGE = 4 * 3600
+
+# 带透明通道的像素格式前缀；这类素材 H.264 无法保留 alpha，不缓存
+_ALPHA_PIX_FMTS = ('yuva', 'rgba', 'bgra', 'argb', 'abgr', 'gbrap', 'ya8', 'ya16', 'pal8')
+
+
+def _evict_particle_cache():
+    """缓存超过上限时按最近使用时间删除旧文件（跳过 PARTICLE_CACHE_MIN_AGE 内用过的）"""
+    try:
+        entries = [e for e in os.scandir(PARTICLE_CACHE_DIR) if e.is_file()]
+    except OSError:
+        return
+    stats = []
+    for e in entries:
+        try:
+            stats.append((e.stat(), e.path))
+        except OSError:
+            pass  # 已被其他进程删除
+    stats.sort(key=lambda item: item[0].st_mtime)
+    total = sum(st.st_size for st, _ in stats)
+    protect_after = time.time() - PARTICLE_CACHE_MIN_AGE
+    for st, path in stats:
+        if total <= PARTICLE_CACHE_MAX_BYTES or st.st_mtime > protect_after:
+            break
+        try:
+            os.remove(path)
+            total -= st.st_size
+        except OSError:
+            pass
+
+
+def cached_particle_path(asset_path: str, width: int) -> str:
+    """
+    获取粒子视频的解码缓存路径，首次使用时转码
+
+    缓存按 (路径, 大小, 修改时间, 宽度) 命名；素材过长、带透明通道、转码失败时返回原路径
+
+    Args:
+        asset_path: 粒子素材路径
+        width: 输出视频宽度，缓存缩小到该宽度（素材更窄时保持原尺寸）
+    """
+    try:
+        st = os.stat(asset_path)
+    except OSError:
+        return asset_path
+
+    key = hashlib.sha1(
+        f"{PARTICLE_CACHE_VERSION}|{os.path.abspath(asset_path)}|{st.st_size}|{st.st_mtime_ns}|{width}".encode()
+    ).hexdigest()
+    cache_path = os.path.join(PARTICLE_CACHE_DIR, f"{key}.mkv")
+    try:
+        os.utime(cache_path)  # 记录最近使用，供淘汰排序，同时保护本次任务期间不被淘汰
+        return cache_path
+    except FileNotFoundError:
+        pass  # 没有缓存，或刚被其他进程淘汰：重新转码
+    except OSError:
+        return asset_path
+
+    info = run_ffprobe(asset_path)
+    try:
+        duration = float(info.get("format", {}).get("duration", 0))
+    except (TypeError, ValueError):
+        duration = 0.0
+    if not 0 < duration <= PARTICLE_CACHE_MAX_DURATION:
+        return asset_path
+    video = next((s for s in info.get("streams", []) if s.get("codec_type") == "video"), {})
+    if video.get("pix_fmt", "").startswith(_ALPHA_PIX_FMTS):
+        return asset_path
+
+    os.makedirs(PARTICLE_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp.mkv"
+    cmd = ['ffmpeg', '-y', '-v', 'error', '-i', asset_path, '-an',
+           '-vf', f"scale=w='min({width},iw)':h=-2",
+           '-c:v', 'libx264', '-preset', 'veryfast', '-tune', 'fastdecode', '-crf', '18',
+           '-pix_fmt', 'yuv420p', tmp_path]
+    try:
+        r = subprocess.run(cmd, capture_output=True, timeout=300)
+        if r.returncode != 0:
+            raise OSError(r.stderr[-200:])
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return asset_path
+
+    # 新文件 mtime 是当前时间，不会被这次淘汰删除
+    _evict_particle_cache()
+    return cache_path
 
 
 def process_with_assets(
@@ -69,7 +305,10 @@ def process_with_assets(
     output_path: Optional[str] = None,
     strength: str = DedupStrength.MEDIUM,
     apply_effects: bool = True,
-    verbose: bool = True
+    verbose: bool = True,
+    hw_encoder: str = "auto",
+    threads: int = 0,
+    precomputed_analysis: Optional[VideoAnalysisResult] = None
 ) -> AssetDedupResult:
     """
     使用素材进行视频去重处理
@@ -80,6 +319,9 @@ def process_with_assets(
         strength: 去重强度 (light/medium/strong)
         apply_effects: 是否同时应用智能特效
         verbose: 是否输出详细信息
+        hw_encoder: 硬件编码器 auto/nvenc/qsv/vaapi/videotoolbox/none，不可用时用 libx264
+        threads: ffmpeg 线程数（0=按CPU核数自动，并行批处理时用于限制总线程数）
+        precomputed_analysis: 已有的视频分析结果（同一视频生成多个版本时复用）
 
     Returns:
         AssetDedupResult 处理结果
@@ -95,6 +337,7 @@ def process_with_assets(
         input_p = Path(input_path)
         output_path = str(input_p.parent / f"{input_p.stem}_dedup_{strength}{input_p.suffix}")
     result.output_path = output_path
+    cmd: List[str] = []
 
     try:
         if verbose:
@@ -108,7 +351,9 @@ def process_with_assets(
         if verbose:
             print("\n[1/5] 分析视频...")
 
-        analysis = analyze_video_v2(input_path, verbose=False)
+        analysis = precomputed_analysis
+        if analysis is None:
+            analysis = analyze_video_v2(input_path, verbose=False)
         result.category = analysis.category
         result.category_name = CATEGORY_NAMES_V2.get(analysis.category, "未知")
 
@@ -121,19 +366,15 @@ def process_with_assets(
         if verbose:
             print("\n[2/5] 准备素材...")
 
-        asset_config = get_asset_config(strength)
-
-        # 显示可用素材
-        sticker_count = len(list_assets("stickers", [".png"]))
-        animated_count = len(list_assets("animated", [".gif"]))
-        title_count = len(list_assets("titles", [".png"]))
-        particle_count = len(list_assets("particles", [".mp4", ".mov"]))
+        # 只读使用，直接取共享配置
+        asset_config = _shared_asset_config(strength)
 
+        # 显示可用素材（list_assets 按目录mtime缓存）
         if verbose:
-            print(f"  贴纸库: {sticker_count} 个")
-            print(f"  动态贴纸: {animated_count} 个")
-            print(f"  标题框: {title_count} 个")
-            print(f"  粒子效果: {particle_count} 个")
+            print(f"  贴纸库: {len(list_assets('stickers', ['.png']))} 个")
+            print(f"  动态贴纸: {len(list_assets('animated', ['.gif']))} 个")
+            print(f"  标题框: {len(list_assets('titles', ['.png']))} 个")
+            print(f"  粒子效果: {len(list_assets('particles', ['.mp4', '.mov']))} 个")
 
         # Step 3: 生成叠加项
         if verbose:
@@ -144,12 +385,11 @@ def process_with_assets(
         fps = int(analysis.fps) or 30
         duration = analysis.duration
 
-        overlays = generate_dedup_overlays(width, height, duration, asset_config)
+        overlays = prune_overlays(
+            generate_dedup_overlays(width, height, duration, asset_config), duration
+        )
 
-        for ov in overlays:
-            result.overlays_used.append(
-                f"{ov.asset_path.name} @ {ov.start_time:.1f}s"
-            )
+        result.overlays_used = [(ov.asset_path.name, ov.start_time) for ov in overlays]
 
         if verbose:
             print(f"  将叠加 {len(overlays)} 个素材:")
@@ -181,135 +421,40 @@ def process_with_assets(
         if verbose:
             print("\n[5/5] 处理视频...")
 
-        # 分离静态和动态素材
-        static_overlays = [ov for ov in overlays if not ov.is_animated and not ov.is_video]
-        dynamic_overlays = [ov for ov in overlays if ov.is_animated or ov.is_video]
-
-        cmd = ['ffmpeg', '-y', '-i', input_path]
-
-        # 添加动态素材输入
-        for ov in dynamic_overlays:
-            if ov.is_video:
-                cmd.extend(['-stream_loop', '-1', '-i', str(ov.asset_path)])
-            else:  # GIF
-                cmd.extend(['-ignore_loop', '0', '-i', str(ov.asset_path)])
-
-        # 构建filter_complex
-        filter_parts = []
-        current_stream = "[0:v]"
-
-        # 先应用基础特效
-        if effects_filter:
-            filter_parts.append(f"{current_stream}{effects_filter}[vbase]")
-            current_stream = "[vbase]"
-
-        # 叠加静态贴纸（使用movie滤镜）
-        for i, ov in enumerate(static_overlays):
-            asset_path = str(ov.asset_path).replace("'", "'\\''").replace(":", "\\:")
-            scaled_width = int(width * ov.scale)
-
-            x_expr, y_expr = calculate_position(
-                ov.position, width, height,
-                scaled_width, scaled_width, margin=30
-            )
-
-            end_time = ov.start_time + ov.duration
-
-            # movie滤镜加载PNG (movie不需要输入标签)
-            movie_chain = f"movie='{asset_path}',scale={scaled_width}:-1,format=rgba"
-
-            if ov.fade_duration > 0:
-                movie_chain += (
-                    f",fade=t=in:st=0:d={ov.fade_duration}:alpha=1"
-                    f",fade=t=out:st={ov.duration - ov.fade_duration}:d={ov.fade_duration}:alpha=1"
-                )
-
-            out_label = f"[vs{i}]"
-            # movie是独立的source filter，不需要输入标签
-            filter_parts.append(
-                f"{movie_chain}[stk{i}];"
-                f"{current_stream}[stk{i}]overlay={x_expr}:{y_expr}"
-                f":enable='between(t,{ov.start_time:.2f},{end_time:.2f})'{out_label}"
-            )
-            current_stream = out_label
-
-        # 叠加动态素材
-        for i, ov in enumerate(dynamic_overlays):
-            input_idx = i + 1
-            scaled_width = int(width * ov.scale) if ov.scale < 1.0 else width
-
-            x_expr, y_expr = calculate_position(
-                ov.position, width, height,
-                scaled_width, scaled_width, margin=30
-            )
-
-            end_time = ov.start_time + ov.duration
-
-            # 处理输入流
-            proc_label = f"[dyn{i}]"
-            if ov.scale < 1.0:
-                scale_filter = f"[{input_idx}:v]scale={scaled_width}:-1,format=rgba"
-            else:
-                scale_filter = f"[{input_idx}:v]scale={width}:{height},format=rgba"
+        filter_parts, extra_inputs = build_overlay_filter_parts(
+            overlays, width, height, effects_filter,
+            video_input=lambda path: cached_particle_path(path, width)
+        )
+        filter_complex = ";".join(filter_parts)
 
-            if ov.opacity < 1.0:
-                scale_filter += f",colorchannelmixer=aa={ov.opacity}"
+        hw = resolve_hw_encoder(hw_encoder)
+        cmd = build_asset_command(
+            input_path, extra_inputs, filter_complex, effects_filter,
+            audio_filter, output_path, hw, threads
+        )
 
-            filter_parts.append(f"{scale_filter}{proc_label}")
+        if verbose:
+            print(f"  正在编码... (编码器: {HW_ENCODERS[hw][0] if hw else 'libx264'})")
 
-            # 叠加
-            is_last = (i == len(dynamic_overlays) - 1)
-            out_label = "[vout]" if is_last else f"[vd{i}]"
+        # 执行命令（20分钟超时）
+        returncode, stderr_tail = run_ffmpeg(cmd, timeout=1200, tail_lines=STDERR_TAIL_LINES)
 
-            filter_parts.append(
-                f"{current_stream}{proc_label}overlay={x_expr}:{y_expr}"
-                f":enable='between(t,{ov.start_time:.2f},{end_time:.2f})'"
-                f":shortest=1{out_label}"
+        if returncode != 0 and hw:
+            # 硬件编码失败（驱动/会话数限制等），回退到软件编码
+            if verbose:
+                print("  硬件编码失败，回退到 libx264...")
+            remove_filter_script(cmd)
+            cmd = build_asset_command(
+                input_path, extra_inputs, filter_complex, effects_filter,
+                audio_filter, output_path, threads=threads
             )
-            current_stream = out_label
-
-        # 如果没有动态素材，修正最终输出
-        if not dynamic_overlays and filter_parts:
-            last = filter_parts[-1]
-            # 替换最后一个输出标签为[vout]
-            import re
-            last = re.sub(r'\[vs\d+\]$', '[vout]', last)
-            filter_parts[-1] = last
-
-        if filter_parts:
-            filter_complex = ";".join(filter_parts)
-            cmd.extend(['-filter_complex', filter_complex])
-            cmd.extend(['-map', '[vout]', '-map', '0:a?'])
-        elif effects_filter:
-            # 只有特效没有素材
-            cmd.extend(['-vf', effects_filter])
-
-        if audio_filter:
-            cmd.extend(['-af', audio_filter])
-
-        cmd.extend([
-            '-c:v', 'libx264',
-            '-preset', 'fast',
-            '-crf', '22',
-            '-c:a', 'aac',
-            '-b:a', '128k',
-            '-shortest',
-            output_path
-        ])
-
-        if verbose:
-            print("  正在编码...")
-
-        # 执行命令
-        process = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=1200  # 20分钟超时
-        )
+            returncode, stderr_tail = run_ffmpeg(cmd, timeout=1200, tail_lines=STDERR_TAIL_LINES)
+            if returncode == 0:
+                # 软件编码成功说明问题在硬件编码器，本进程之后的任务直接用 libx264
+                mark_hw_encoder_failed(hw)
 
-        if process.returncode != 0:
-            result.error_message = process.stderr[-800:] if process.stderr else "未知错误"
+        if returncode != 0:
+            result.error_message = stderr_tail or "未知错误"
             if verbose:
                 print(f"\n处理失败: {result.error_message}")
             return result
@@ -337,22 +482,163 @@ def process_with_assets(
         if verbose:
             import traceback
             traceback.print_exc()
+    finally:
+        remove_filter_script(cmd)
 
     return result
 
 
+def build_fan_out_command(
+    input_path: str,
+    extra_inputs: List[str],
+    filter_parts: List[str],
+    output_paths: List[str],
+    audio_filters: List[str],
+    hw_encoder: str = ""
+) -> List[str]:
+    """
+    组装一次生成多个版本的ffmpeg命令
+
+    filter_parts 中第 k 个版本的叠加链输出 [vout{k}]
+    """
+    if hw_encoder:
+        input_args, filter_tail, encode_args = hw_encoder_args(hw_encoder, HW_ENCODE_QUALITY)
+    else:
+        input_args, filter_tail, encode_args = [], "", SOFTWARE_ENCODE_ARGS
+    format_tail = filter_tail or "format=yuv420p"
+
+    filter_thread_args, encode_thread_args = _thread_args(0)
+
+    parts = list(filter_parts)
+    for k in range(len(output_paths)):
+        parts.append(f"[vout{k}]{format_tail}[o{k}]")
+
+    cmd = ['ffmpeg', '-y', *FFMPEG_LOG_ARGS, *filter_thread_args,
+           *input_args, '-i', input_path, *extra_inputs]
+    cmd.extend(_filter_complex_args(";".join(parts)))
+    for k, (output_path, audio_filter) in enumerate(zip(output_paths, audio_filters)):
+        cmd.extend(['-map', f'[o{k}]', '-map', '0:a?'])
+        if audio_filter:
+            cmd.extend(['-af', audio_filter])
+        cmd.extend(encode_args)
+        if not filter_tail:
+            cmd.extend(['-pix_fmt', 'yuv420p'])
+        cmd.extend(encode_thread_args)
+        cmd.extend(['-c:a', 'aac', '-b:a', '128k', '-shortest', output_path])
+    return cmd
+
+
+def _batch_fan_out(
+    input_path: str,
+    output_paths: List[str],
+    strength: str,
+    apply_effects: bool,
+    hw_encoder: str,
+    analysis: Optional[VideoAnalysisResult],
+    verbose: bool
+) -> List[AssetDedupResult]:
+    """
+    单个ffmpeg进程生成所有版本：源视频只解码一次，split 后每个版本各自叠加、编码
+
+    省去每个版本的进程启动和编码器初始化
+    """
+    count = len(output_paths)
+    results = [
+        AssetDedupResult(input_path=input_path, output_path=output_path, strength=strength)
+        for output_path in output_paths
+    ]
+    cmd: List[str] = []
+
+    try:
+        if analysis is None:
+            analysis = analyze_video_v2(input_path, verbose=False)
+        category_name = CATEGORY_NAMES_V2.get(analysis.category, "未知")
+        width = analysis.width or 720
+        height = analysis.height or 1280
+        fps = int(analysis.fps) or 30
+        asset_config = _shared_asset_config(strength)
+
+        filter_parts = [f"[0:v]split={count}" + "".join(f"[s{k}]" for k in range(count))]
+        extra_inputs: List[str] = []
+        audio_filters: List[str] = []
+        for k, result in enumerate(results):
+            overlays = prune_overlays(
+                generate_dedup_overlays(width, height, analysis.duration, asset_config),
+                analysis.duration
+            )
+            effects_filter = audio_filter = ""
+            if apply_effects:
+                effects_config = get_smart_effect_config_v2(analysis)
+                effects_filter = build_effects_filter_chain(width, height, effects_config, fps)
+                audio_filter = build_audio_filter(effects_config.audio)
+
+            parts, inputs = build_overlay_filter_parts(
+                overlays, width, height, effects_filter,
+                source=f"[s{k}]", first_input=1 + extra_inputs.count('-i'),
+                out_label=f"[vout{k}]", prefix=f"x{k:x}_",
+                video_input=lambda path: cached_particle_path(path, width)
+            )
+            filter_parts.extend(parts or [f"[s{k}]null[vout{k}]"])
+            extra_inputs.extend(inputs)
+            audio_filters.append(audio_filter)
+
+            result.category = analysis.category
+            result.category_name = category_name
+            result.overlays_used = [(ov.asset_path.name, ov.start_time) for ov in overlays]
+
+        hw = resolve_hw_encoder(hw_encoder)
+        if hw == "nvenc" and count > NVENC_MAX_SESSIONS:
+            hw = ""  # 每个输出占一个编码会话
+
+        if verbose:
+            print(f"  单进程生成 {count} 个版本 (编码器: {HW_ENCODERS[hw][0] if hw else 'libx264'})")
+
+        cmd = build_fan_out_command(input_path, extra_inputs, filter_parts, output_paths, audio_filters, hw)
+        returncode, stderr_tail = run_ffmpeg(cmd, timeout=1200 * count, tail_lines=STDERR_TAIL_LINES)
+
+        if returncode != 0 and hw:
+            if verbose:
+                print("  硬件编码失败，回退到 libx264...")
+            remove_filter_script(cmd)
+            cmd = build_fan_out_command(input_path, extra_inputs, filter_parts, output_paths, audio_filters)
+            returncode, stderr_tail = run_ffmpeg(cmd, timeout=1200 * count, tail_lines=STDERR_TAIL_LINES)
+            if returncode == 0:
+                # 软件编码成功说明问题在硬件编码器，本进程之后的任务直接用 libx264
+                mark_hw_encoder_failed(hw)
+
+        error = "" if returncode == 0 else (stderr_tail or "未知错误")
+    except subprocess.TimeoutExpired:
+        error = "处理超时"
+    except Exception as e:
+        error = str(e)
+    finally:
+        remove_filter_script(cmd)
+
+    for result in results:
+        result.success = not error
+        result.error_message = error
+    return results
+
+
+# 消费级N卡的并发编码会话上限（保守取2）
+NVENC_MAX_SESSIONS = 2
+
+
 def batch_asset_dedup(
     input_path: str,
     output_dir: Optional[str] = None,
     count: int = 3,
     strength: str = DedupStrength.MEDIUM,
     apply_effects: bool = True,
-    verbose: bool = True
+    verbose: bool = True,
+    max_parallel: int = 0,
+    hw_encoder: str = "auto",
+    fan_out: bool = False
 ) -> List[AssetDedupResult]:
     """
     从同一视频生成多个去重版本
 
-    每个版本使用不同的随机素材组合
+    每个版本使用不同的随机素材组合，多个版本在进程池中并行生成
 
     Args:
         input_path: 输入视频路径
@@ -361,6 +647,9 @@ def batch_asset_dedup(
         strength: 去重强度
         apply_effects: 是否应用特效
         verbose: 是否输出详细信息
+        max_parallel: 并行数（0=自动: min(数量, CPU核数/4)，NVENC 最多2个；1=串行）
+        hw_encoder: 硬件编码器 auto/nvenc/qsv/vaapi/videotoolbox/none
+        fan_out: 用一个ffmpeg进程生成所有版本（解码一次，多路编码；忽略 max_parallel）
 
     Returns:
         处理结果列表
@@ -382,20 +671,71 @@ def batch_asset_dedup(
         print(f"批量素材去重 - 生成 {count} 个唯一版本")
         print("=" * 60)
 
-    for i in range(1, count + 1):
-        if verbose:
-            print(f"\n>>> 版本 {i}/{count}")
+    output_paths = [os.path.join(output_dir, f"{input_name}_v{i}.mp4") for i in range(1, count + 1)]
 
-        output_path = os.path.join(output_dir, f"{input_name}_v{i}.mp4")
+    # 所有版本来自同一视频，只分析一次（失败时由各版本自行分析并报告错误）
+    try:
+        analysis = analyze_video_v2(input_path, verbose=False)
+    except Exception:
+        analysis = None
 
-        result = process_with_assets(
-            input_path,
-            output_path,
-            strength=strength,
-            apply_effects=apply_effects,
-            verbose=verbose
+    # 编码器只在主进程检测一次（含试编码），不可用时各版本直接用 libx264
+    hw_encoder = resolve_hw_encoder(hw_encoder) or "none"
+
+    if max_parallel <= 0 and not fan_out:
+        max_parallel = min(count, max(1, (os.cpu_count() or 1) // 4))
+        # 消费级N卡同时编码会话数有限
+        if hw_encoder == "nvenc":
+            max_parallel = min(max_parallel, NVENC_MAX_SESSIONS)
+
+    if fan_out:
+        results = _batch_fan_out(
+            input_path, output_paths, strength, apply_effects, hw_encoder, analysis, verbose
         )
-        results.append(result)
+    elif max_parallel <= 1:
+        for i, output_path in enumerate(output_paths, 1):
+            if verbose:
+                print(f"\n>>> 版本 {i}/{count}")
+
+            result = process_with_assets(
+                input_path,
+                output_path,
+                strength=strength,
+                apply_effects=apply_effects,
+                verbose=verbose,
+                hw_encoder=hw_encoder,
+                precomputed_analysis=analysis
+            )
+            results.append(result)
+    else:
+        # 并行生成：子进程不输出详情，主进程按完成顺序打印；
+        # 限制每个ffmpeg的线程数，使总线程数不超过CPU核数
+        threads = ffmpeg_thread_count(max_parallel)
+        slots: List[Optional[AssetDedupResult]] = [None] * count
+        with ProcessPoolExecutor(max_workers=max_parallel) as executor:
+            future_to_idx = {
+                executor.submit(
+                    _asset_job,
+                    (input_path, output_path, strength, apply_effects, hw_encoder, threads, analysis)
+                ): idx
+                for idx, output_path in enumerate(output_paths)
+            }
+            for done, future in enumerate(as_completed(future_to_idx), 1):
+                idx = future_to_idx[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = AssetDedupResult(
+                        input_path=input_path,
+                        output_path=output_paths[idx],
+                        strength=strength,
+                        error_message=str(e)
+                    )
+                slots[idx] = result
+                if verbose:
+                    status = "完成" if result.success else f"失败: {result.error_message[-200:]}"
+                    print(f"[{done}/{count}] 版本 {idx + 1} {status}")
+        results = slots
 
     # 汇总
     success_count = sum(1 for r in results if r.success)
@@ -408,6 +748,23 @@ def batch_asset_dedup(
     return results
 
 
+def _asset_job(args: tuple) -> AssetDedupResult:
+    """进程池任务：生成一个去重版本"""
+    input_path, output_path, strength, apply_effects, hw_encoder, threads, analysis = args
+    # fork 出的子进程继承父进程的随机状态，重新播种保证各版本素材组合不同
+    random.seed()
+    return process_with_assets(
+        input_path,
+        output_path,
+        strength=strength,
+        apply_effects=apply_effects,
+        verbose=False,
+        hw_encoder=hw_encoder,
+        threads=threads,
+        precomputed_analysis=analysis
+    )
+
+
 # 便捷函数
 def dedup(input_path: str, strength: str = "medium") -> AssetDedupResult:
     """简化接口"""
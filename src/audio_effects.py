@@ -4,13 +4,27 @@ VideoMixer - 音频去重特效模块
 """
 
 import random
-from dataclasses import dataclass, field
+import re
+from dataclasses import dataclass, replace
 from typing import Tuple, List, Optional
 
+from .ffmpeg_utils import ffmpeg_caps
 
-@dataclass
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+@dataclass(frozen=True)
 class AudioDedupConfig:
-    """音频去重配置"""
+    """
+    音频去重配置
+
+    不可变（预设被所有调用方共享），需要修改时用 dataclasses.replace 生成新对象；
+    所有字段可哈希，可直接作为缓存键
+    """
 
     # 变速变调
     tempo_enabled: bool = True
@@ -27,47 +41,115 @@ class AudioDedupConfig:
     noise_enabled: bool = True
     noise_volume: float = 0.01  # 白噪音音量
     eq_enabled: bool = True
-    eq_bands: List[Tuple[int, float]] = field(default_factory=lambda: [
+    eq_bands: Tuple[Tuple[int, float], ...] = (
         (100, 0),    # 低频
         (1000, 0),   # 中频
         (8000, 0),   # 高频
-    ])
+    )
     echo_enabled: bool = False
     echo_delay: float = 0.1  # 回声延迟 (秒)
     echo_decay: float = 0.3  # 回声衰减
 
+    # 已确定的随机值（由 randomize_audio_config 填入；未设置时构建滤镜时再随机）
+    tempo_value: Optional[float] = None
+    pitch_cents: Optional[float] = None
+
+
+# 滤镜末尾的输出标签，如 "[abgm]"
+_TRAILING_LABEL = re.compile(r'\[[^\]]+\]$')
+
+# EQ 频段及增益随机范围: 低频 ±3dB、中频 ±2dB、高频 ±3dB
+_EQ_FREQS = (100, 1000, 8000)
+_EQ_LOW = (-3.0, -2.0, -3.0)
+_EQ_HIGH = (3.0, 2.0, 3.0)
+
 
-def randomize_audio_config(config: AudioDedupConfig) -> AudioDedupConfig:
+def randomize_audio_config(config: AudioDedupConfig, seed: Optional[int] = None) -> AudioDedupConfig:
     """
     随机化音频配置参数
 
-    在配置的范围内随机选择具体的值
+    在配置的范围内一次性随机选择 EQ 增益、变速和变调的具体值
+
+    Args:
+        config: 音频去重配置（不会被修改）
+        seed: 随机种子，相同种子得到相同结果（有无 numpy 时结果不同）
     """
-    new_config = AudioDedupConfig(
-        tempo_enabled=config.tempo_enabled,
-        tempo_range=config.tempo_range,
-        pitch_shift_enabled=config.pitch_shift_enabled,
-        pitch_range=config.pitch_range,
-        bgm_enabled=config.bgm_enabled,
-        bgm_path=config.bgm_path,
-        bgm_volume=config.bgm_volume,
-        noise_enabled=config.noise_enabled,
-        noise_volume=config.noise_volume,
-        eq_enabled=config.eq_enabled,
-        echo_enabled=config.echo_enabled,
-        echo_delay=config.echo_delay,
-        echo_decay=config.echo_decay,
-    )
+    low = [*_EQ_LOW, config.tempo_range[0], config.pitch_range[0]]
+    high = [*_EQ_HIGH, config.tempo_range[1], config.pitch_range[1]]
+    if NUMPY_AVAILABLE:
+        values = np.random.default_rng(seed).uniform(low, high).tolist()
+    else:
+        rng = random.Random(seed) if seed is not None else random
+        values = [rng.uniform(lo, hi) for lo, hi in zip(low, high)]
 
-    # 随机化 EQ
     if config.eq_enabled:
-        new_config.eq_bands = [
-            (100, random.uniform(-3, 3)),   # 低频 ±3dB
-            (1000, random.uniform(-2, 2)),  # 中频 ±2dB
-            (8000, random.uniform(-3, 3)),  # 高频 ±3dB
-        ]
+        eq_bands = tuple(zip(_EQ_FREQS, values[:3]))
+    else:
+        eq_bands = tuple((freq, 0) for freq in _EQ_FREQS)
+
+    return replace(config, eq_bands=eq_bands, tempo_value=values[3], pitch_cents=values[4])
+
+
+def _pick_tempo(config: AudioDedupConfig) -> float:
+    if config.tempo_value is not None:
+        return config.tempo_value
+    return random.uniform(config.tempo_range[0], config.tempo_range[1])
+
+
+def _pick_pitch_cents(config: AudioDedupConfig) -> float:
+    if config.pitch_cents is not None:
+        return config.pitch_cents
+    return random.uniform(config.pitch_range[0], config.pitch_range[1])
 
-    return new_config
+
+# atempo 单个滤镜支持的倍率范围
+ATEMPO_MIN = 0.5
+ATEMPO_MAX = 2.0
+
+def _atempo_chain(tempo: float) -> List[str]:
+    """把任意倍率拆成多个 atempo，每个都在 0.5-2.0 之内"""
+    parts = []
+    while tempo > ATEMPO_MAX:
+        parts.append(f"atempo={ATEMPO_MAX}")
+        tempo /= ATEMPO_MAX
+    while tempo < ATEMPO_MIN:
+        parts.append(f"atempo={ATEMPO_MIN}")
+        tempo /= ATEMPO_MIN
+    parts.append(f"atempo={tempo:.4f}")
+    return parts
+
+
+def _tempo_pitch_filters(config: AudioDedupConfig) -> List[str]:
+    """
+    变速和变调滤镜
+
+    有 librubberband 时用一个 rubberband 同时完成；否则 atempo 变速，
+    asetrate + aresample 变调（提高采样率 = 降低音调，反之亦然）
+    """
+    tempo = _pick_tempo(config) if config.tempo_enabled else None
+    ratio = None
+    if config.pitch_shift_enabled:
+        # 将音分转换为频率比例: cents = 1200 * log2(ratio)
+        # 100 cents = 1 半音 = 2^(1/12) ≈ 1.0595
+        ratio = 2 ** (_pick_pitch_cents(config) / 1200)
+
+    if tempo is None and ratio is None:
+        return []
+
+    if "rubberband" in ffmpeg_caps().filters:
+        options = []
+        if tempo is not None:
+            options.append(f"tempo={tempo:.4f}")
+        if ratio is not None:
+            options.append(f"pitch={ratio:.6f}")
+        return [f"rubberband={':'.join(options)}"]
+
+    filters = []
+    if tempo is not None:
+        filters.extend(_atempo_chain(tempo))
+    if ratio is not None:
+        filters.append(f"asetrate=44100*{ratio:.6f},aresample=44100")
+    return filters
 
 
 def build_audio_dedup_filter(config: AudioDedupConfig) -> str:
@@ -82,23 +164,8 @@ def build_audio_dedup_filter(config: AudioDedupConfig) -> str:
     """
     filters = []
 
-    # 1. 变速 (atempo)
-    if config.tempo_enabled:
-        tempo = random.uniform(config.tempo_range[0], config.tempo_range[1])
-        # atempo 范围是 0.5-2.0，我们使用的范围在此之内
-        filters.append(f"atempo={tempo:.4f}")
-
-    # 2. 变调 (asetrate + aresample)
-    # 变调通过改变采样率实现：提高采样率 = 降低音调，反之亦然
-    if config.pitch_shift_enabled:
-        cents = random.uniform(config.pitch_range[0], config.pitch_range[1])
-        # 将音分转换为采样率比例
-        # 100 cents = 1 半音 = 2^(1/12) ≈ 1.0595
-        # cents = 1200 * log2(ratio)
-        # ratio = 2^(cents/1200)
-        ratio = 2 ** (cents / 1200)
-        # 为了保持时长，需要用 asetrate 改变采样率，然后用 aresample 恢复
-        filters.append(f"asetrate=44100*{ratio:.6f},aresample=44100")
+    # 1-2. 变速 (atempo) + 变调 (asetrate + aresample)，有 rubberband 时合并为一个滤镜
+    filters.extend(_tempo_pitch_filters(config))
 
     # 3. EQ 调整
     if config.eq_enabled and config.eq_bands:
@@ -151,16 +218,8 @@ def build_audio_complex_filter(
     # 基础音频处理链
     basic_filters = []
 
-    # 1. 变速
-    if config.tempo_enabled:
-        tempo = random.uniform(config.tempo_range[0], config.tempo_range[1])
-        basic_filters.append(f"atempo={tempo:.4f}")
-
-    # 2. 变调
-    if config.pitch_shift_enabled:
-        cents = random.uniform(config.pitch_range[0], config.pitch_range[1])
-        ratio = 2 ** (cents / 1200)
-        basic_filters.append(f"asetrate=44100*{ratio:.6f},aresample=44100")
+    # 1-2. 变速 + 变调
+    basic_filters.extend(_tempo_pitch_filters(config))
 
     # 3. EQ
     if config.eq_enabled and config.eq_bands:
@@ -205,8 +264,7 @@ def build_audio_complex_filter(
         # 替换最后一个输出标签
         last_part = filter_parts[-1]
         # 找到最后一个方括号标签并替换
-        import re
-        last_part = re.sub(r'\[[^\]]+\]$', output_label, last_part)
+        last_part = _TRAILING_LABEL.sub(output_label, last_part)
         filter_parts[-1] = last_part
     else:
         # 没有滤镜，直接复制
@@ -4,12 +4,18 @@ VideoMixer - 背景虚化填充模块
 """
 
 import os
+import asyncio
+import threading
 import subprocess
-import json
-from pathlib import Path
-from typing import Optional, Tuple
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple, List, Dict
 from enum import Enum
 
+from .background_effects import blur_filter, AVGBLUR_MAX_RADIUS
+from .ffmpeg_utils import (ffmpeg_caps, hw_encoder_args, hw_encoder_works, mark_hw_encoder_failed,
+                           resolve_hw_encoder, run_ffmpeg, run_ffmpeg_async)
+
 
 class AspectMode(Enum):
     """画幅转换模式"""
@@ -20,34 +26,450 @@ class AspectMode(Enum):
     AUTO = "auto"                   # 自动检测
 
 
+class EncodeQuality(Enum):
+    """libx264 编码档位（硬件编码不受影响）"""
+    DEFAULT = "default"        # veryfast + crf20
+    FAST = "fast"              # faster 预设展开参数，平滑画面上质量接近、速度更快
+    QUALITY = "quality"        # medium + crf20
+    FASTDECODE = "fastdecode"  # veryfast + crf20 + fastdecode，降低播放端解码开销
+
+
+@functools.lru_cache(maxsize=4096)
+def _probe_dimensions(video_path: str, mtime_ns: int, size: int) -> Tuple[int, int]:
+    """ffprobe 只读取第一个视频流的宽高（mtime/size 参与缓存键，文件变化后重新探测）"""
+    cmd = ['ffprobe', '-v', 'quiet', '-select_streams', 'v:0',
+           '-show_entries', 'stream=width,height', '-of', 'csv=p=0', video_path]
+    result = subprocess.run(cmd, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    try:
+        width, height = result.stdout.strip().splitlines()[0].split(',')[:2]
+        return int(width), int(height)
+    except (IndexError, ValueError):
+        return 720, 1280
+
+
 def get_video_dimensions(video_path: str) -> Tuple[int, int]:
-    """获取视频尺寸"""
-    cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json',
-           '-show_streams', video_path]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    data = json.loads(result.stdout)
-
-    video_stream = next(
-        (s for s in data.get('streams', []) if s.get('codec_type') == 'video'),
-        {}
+    """获取视频尺寸（同一进程内按路径+修改时间+大小缓存）"""
+    try:
+        st = os.stat(video_path)
+    except OSError:
+        return 720, 1280
+    return _probe_dimensions(video_path, st.st_mtime_ns, st.st_size)
+
+
+# 宽高比桶: 0=接近方形, 1=横屏(>1.2), -1=竖屏(<0.8)
+ASPECT_LANDSCAPE_RATIO = 1.2
+ASPECT_PORTRAIT_RATIO = 0.8
+
+# _MODE_TABLE[target_vertical][bucket]，bucket=-1 取最后一项
+_MODE_TABLE = (
+    (AspectMode.SQUARE_TO_HORIZONTAL, AspectMode.VERTICAL_TO_HORIZONTAL, AspectMode.VERTICAL_TO_HORIZONTAL),
+    (AspectMode.SQUARE_TO_VERTICAL, AspectMode.HORIZONTAL_TO_VERTICAL, AspectMode.HORIZONTAL_TO_VERTICAL),
+)
+
+
+def aspect_bucket(width: int, height: int) -> int:
+    """宽高比分桶: 1=横屏, -1=竖屏, 0=接近方形"""
+    ratio = width / height
+    return (ratio > ASPECT_LANDSCAPE_RATIO) - (ratio < ASPECT_PORTRAIT_RATIO)
+
+
+@functools.lru_cache(maxsize=64)
+def detect_aspect_mode(width: int, height: int, target_vertical: bool = True) -> AspectMode:
+    """自动检测画幅转换模式"""
+    return _MODE_TABLE[bool(target_vertical)][aspect_bucket(width, height)]
+
+
+def _blur(radius: int) -> str:
+    """按 ffmpeg 支持情况选择模糊滤镜：avgblur/gblur 不可用时退回 boxblur（探测失败时按可用处理）"""
+    filters = ffmpeg_caps().filters
+    wanted = "avgblur" if max(1, int(radius)) <= AVGBLUR_MAX_RADIUS else "gblur"
+    if not filters or wanted in filters:
+        return blur_filter(radius)
+    radius = max(1, int(radius))
+    return f"boxblur={radius}:1"
+
+
+# ============================================================
+# 模糊背景滤镜
+# ============================================================
+
+# 背景先缩小到 1/BLUR_DOWNSCALE 再模糊、放大回目标尺寸：
+# 模糊处理的像素数减少约64倍，放大后的观感与全尺寸大半径模糊基本一致
+BLUR_DOWNSCALE = 8
+
+
+def _even(value: float) -> int:
+    """取不小于2的偶数（yuv420p 要求宽高为偶数）"""
+    return max(2, int(value) // 2 * 2)
+
+
+def _blur_small_size(target_width: int, target_height: int, blur_strength: int) -> Tuple[int, int, int]:
+    """缩小后的背景宽高和模糊半径（半径不超过色度平面允许的范围）"""
+    small_w = _even(target_width / BLUR_DOWNSCALE)
+    small_h = _even(target_height / BLUR_DOWNSCALE)
+    radius = max(1, min(blur_strength // 4, min(small_w, small_h) // 4))
+    return small_w, small_h, radius
+
+
+@functools.lru_cache(maxsize=64)
+def _blur_bg_chain(target_width: int, target_height: int, blur_strength: int) -> str:
+    """背景模糊滤镜链：缩小 -> 裁剪 -> 小半径均值模糊 -> 双线性放大到目标尺寸"""
+    small_w, small_h, radius = _blur_small_size(target_width, target_height, blur_strength)
+    return (
+        f"scale={small_w}:{small_h}:force_original_aspect_ratio=increase,"
+        f"crop={small_w}:{small_h},"
+        f"{_blur(radius)},"
+        f"scale={target_width}:{target_height}:flags=bilinear"
+    )
+
+
+# 模糊背景填充的滤镜图模板：分割 -> 背景模糊 -> 前景保持比例缩放 -> 前景居中叠加
+# post_blur/post_overlay 为各版本追加的滤镜（以逗号开头），所有单输出版本共用
+_BG_TEMPLATE = (
+    "{source}split=2[blur][original];"
+    "[blur]{blur_chain}{post_blur}[blurred];"
+    "[original]scale={w}:{h}:force_original_aspect_ratio=decrease[scaled];"
+    "[blurred][scaled]overlay=(W-w)/2:(H-h)/2{post_overlay}{out}"
+)
+
+
+def _format_bg_template(
+    target_width: int,
+    target_height: int,
+    blur_strength: int,
+    post_blur: str = "",
+    post_overlay: str = "",
+    source: str = "[0:v]",
+    out: str = "[v]"
+) -> str:
+    return _BG_TEMPLATE.format(
+        source=source, blur_chain=_blur_bg_chain(target_width, target_height, blur_strength),
+        post_blur=post_blur, w=target_width, h=target_height,
+        post_overlay=post_overlay, out=out
     )
 
+
+def build_blur_background_filter(
+    target_width: int = 720,
+    target_height: int = 1280,
+    blur_strength: int = 20,
+    blur_brightness: float = 0.5,
+    pre_filter: str = ""
+) -> str:
+    """
+    构建模糊背景填充的滤镜（输入 [0:v]，输出 [v]）
+
+    方法：先放大模糊作为背景，再叠加原视频居中
+
+    Args:
+        pre_filter: 分割前先执行的滤镜链，用于和其它效果合并为一次ffmpeg处理
+    """
+    pre = f"{pre_filter}," if pre_filter else ""
+    return _format_bg_template(
+        target_width, target_height, blur_strength,
+        post_blur=f",eq=brightness={blur_brightness - 1}",
+        source=f"[0:v]{pre}"
+    )
+
+
+# ============================================================
+# 编码参数
+# ============================================================
+
+# 模糊填充画面大面积平滑，veryfast + crf20 编码耗时约减半，体积和画质差异很小
+SOFTWARE_ENCODE_ARGS = ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '20',
+                        '-pix_fmt', 'yuv420p', '-profile:v', 'high']
+AUDIO_ENCODE_ARGS = ['-c:a', 'aac', '-b:a', '128k']
+# MP4 输出: moov 前置便于边下边播，加大复用队列避免高分辨率输出时复用器阻塞
+MUX_ARGS = ['-movflags', '+faststart', '-max_muxing_queue_size', '1024']
+
+# 硬件编码质量（大致对应 libx264 crf，与 SOFTWARE_ENCODE_ARGS 一致）
+HW_ENCODE_QUALITY = 20
+# 硬件编码器在共用参数上追加的像素格式：默认 4:2:0，QSV 需要 nv12，
+# vaapi 由滤镜尾部上传为 nv12，不再指定
+HW_PIX_FMTS = {"qsv": "nv12", "vaapi": ""}
+
+
+def _hw_encode_args(hw_encoder: str, gpu_frames: bool = False) -> List[str]:
+    """
+    共用硬件编码参数 + 模糊背景统一的 High profile 和像素格式
+
+    gpu_frames=True 时输入已是显存帧（CUDA 管线），不指定像素格式
+    """
+    _, _, encode_args = hw_encoder_args(hw_encoder, HW_ENCODE_QUALITY)
+    if '-profile:v' not in encode_args:
+        encode_args += ['-profile:v', 'high']
+    pix_fmt = "" if gpu_frames else HW_PIX_FMTS.get(hw_encoder, 'yuv420p')
+    return encode_args + (['-pix_fmt', pix_fmt] if pix_fmt else [])
+
+
+# 各编码档位的 libx264 参数
+SOFTWARE_ENCODE_PROFILES: Dict[EncodeQuality, List[str]] = {
+    EncodeQuality.DEFAULT: SOFTWARE_ENCODE_ARGS,
+    EncodeQuality.FAST: [
+        '-c:v', 'libx264', '-preset', 'faster', '-crf', '20',
+        '-x264-params', 'keyint=48:ref=2:bframes=3:aq-mode=1:rc-lookahead=20:me=hex:subme=4:trellis=1',
+        '-pix_fmt', 'yuv420p', '-profile:v', 'high',
+    ],
+    EncodeQuality.QUALITY: ['-c:v', 'libx264', '-preset', 'medium', '-crf', '20',
+                            '-pix_fmt', 'yuv420p', '-profile:v', 'high'],
+    EncodeQuality.FASTDECODE: [*SOFTWARE_ENCODE_ARGS, '-tune', 'fastdecode'],
+}
+
+
+def _encode_setup(
+    hw_encoder: str,
+    filter_complex: str,
+    out_labels: List[str],
+    quality: EncodeQuality = EncodeQuality.DEFAULT
+) -> Tuple[List[str], str, List[str]]:
+    """
+    CPU滤镜图按编码器调整后的 (输入前参数, 滤镜图, 视频编码参数)
+
+    硬件编码器需要滤镜尾部（vaapi 上传）时，接在每个输出标签之前
+    """
+    if not hw_encoder:
+        return [], filter_complex, SOFTWARE_ENCODE_PROFILES[EncodeQuality(quality)]
+    input_args, filter_tail, _ = hw_encoder_args(hw_encoder, HW_ENCODE_QUALITY)
+    if filter_tail:
+        for label in out_labels:
+            sw_label = f"{label[:-1]}_sw]"
+            filter_complex = (f"{filter_complex.replace(label, sw_label, 1)};"
+                              f"{sw_label}{filter_tail}{label}")
+    return input_args, filter_complex, _hw_encode_args(hw_encoder)
+
+
+# 滤镜线程数上限：分支并行和切片线程超过8个收益很小
+FILTER_MAX_THREADS = 8
+
+
+def _ffmpeg_prefix(threads: int = 0) -> List[str]:
+    """
+    ffmpeg 命令开头：只输出错误 + 滤镜图多线程 + 解码自动线程 + 加大输入队列
+
+    threads>0 时滤镜线程数与之相同（批量并行时限制单个进程的线程）
+    """
+    n = str(threads if threads > 0 else min(FILTER_MAX_THREADS, os.cpu_count() or 1))
+    return ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-nostats',
+            '-filter_threads', n, '-filter_complex_threads', n,
+            '-threads', '0', '-thread_queue_size', '512']
+
+
+# ============================================================
+# GPU (CUDA) 模糊背景
+# ============================================================
+
+# GPU 管线需要的滤镜：NPP缩放 + CUDA叠加 + 显存上传
+CUDA_BLUR_FILTERS = ("scale_npp", "overlay_cuda", "hwupload_cuda")
+
+CUDA_INPUT_ARGS = ['-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda']
+
+# 本进程内 CUDA 滤镜图失败过（CPU 滤镜回退成功）后不再尝试，避免每个文件多跑一次ffmpeg
+_cuda_blur_failed = threading.Event()
+
+
+def cuda_blur_available() -> bool:
+    """ffmpeg 是否支持 CUDA 解码 + NPP/CUDA 滤镜，NVENC 试编码可用，且本进程内没有失败过"""
+    if _cuda_blur_failed.is_set():
+        return False
+    caps = ffmpeg_caps()
     return (
-        video_stream.get('width', 720),
-        video_stream.get('height', 1280)
+        "cuda" in caps.hwaccels
+        and all(name in caps.filters for name in CUDA_BLUR_FILTERS)
+        and hw_encoder_works("nvenc")
     )
 
 
-def detect_aspect_mode(width: int, height: int, target_vertical: bool = True) -> AspectMode:
-    """自动检测画幅转换模式"""
-    ratio = width / height
+def build_cuda_blur_background_filter(
+    orig_width: int,
+    orig_height: int,
+    target_width: int = 720,
+    target_height: int = 1280,
+    blur_strength: int = 20,
+    background_filter: str = ""
+) -> str:
+    """
+    构建GPU版模糊背景滤镜（输入为CUDA帧 [0:v]，输出CUDA帧 [v]，直接交给 h264_nvenc）
 
-    if ratio > 1.2:  # 横屏
-        return AspectMode.HORIZONTAL_TO_VERTICAL if target_vertical else AspectMode.VERTICAL_TO_HORIZONTAL
-    elif ratio < 0.8:  # 竖屏
-        return AspectMode.VERTICAL_TO_HORIZONTAL if not target_vertical else AspectMode.HORIZONTAL_TO_VERTICAL
-    else:  # 接近方形
-        return AspectMode.SQUARE_TO_VERTICAL if target_vertical else AspectMode.SQUARE_TO_HORIZONTAL
+    ffmpeg 没有CUDA版均值模糊：背景用 scale_npp 缩小后下载到内存，按 _blur_bg_chain
+    同样的尺寸和半径模糊，再上传回显存放大；前景缩放和叠加全程在显存中完成
+
+    Args:
+        orig_width, orig_height: 原视频尺寸（overlay_cuda 需要具体坐标）
+        background_filter: 模糊后对背景追加的滤镜（在缩小的帧上执行）
+    """
+    small_w, small_h, radius = _blur_small_size(target_width, target_height, blur_strength)
+
+    scale = min(target_width / orig_width, target_height / orig_height)
+    fg_w = _even(orig_width * scale)
+    fg_h = _even(orig_height * scale)
+
+    bg_extra = f",{background_filter}" if background_filter else ""
+    return (
+        f"[0:v]split=2[blur][original];"
+        f"[blur]scale_npp={small_w}:{small_h}:force_original_aspect_ratio=increase:format=nv12,"
+        f"hwdownload,format=nv12,crop={small_w}:{small_h},"
+        f"{_blur(radius)}{bg_extra},"
+        f"hwupload_cuda,scale_npp={target_width}:{target_height}:format=yuv420p[blurred];"
+        f"[original]scale_npp={fg_w}:{fg_h}:format=yuv420p[scaled];"
+        f"[blurred][scaled]overlay_cuda=x={(target_width - fg_w) // 2}:y={(target_height - fg_h) // 2}[v]"
+    )
+
+
+# 失败时保留的 stderr 行数
+STDERR_TAIL_LINES = 40
+
+
+def _report(returncode: int, tail: str, verbose: bool, output_path: str) -> bool:
+    """按 verbose 输出执行结果，返回是否成功"""
+    if returncode == 0:
+        if verbose:
+            print(f"完成: {output_path}")
+        return True
+    if verbose:
+        print(f"失败: {tail[-300:]}")
+    return False
+
+
+def _run_ffmpeg(cmd: List[str], verbose: bool, output_path: str, timeout: float = 600) -> bool:
+    """执行ffmpeg命令并按 verbose 输出结果（stderr 只保留最后 STDERR_TAIL_LINES 行）"""
+    try:
+        returncode, tail = run_ffmpeg(cmd, timeout, tail_lines=STDERR_TAIL_LINES)
+    except OSError as e:
+        if verbose:
+            print(f"错误: {e}")
+        return False
+    except subprocess.TimeoutExpired:
+        if verbose:
+            print(f"错误: 处理超时 ({timeout:.0f}秒)")
+        return False
+    return _report(returncode, tail, verbose, output_path)
+
+
+def _blur_command_attempts(
+    input_path: str,
+    output_path: str,
+    filter_complex: str,
+    cuda_filter_complex: str = "",
+    hw_encoder: str = "",
+    threads: int = 0,
+    encode_quality: EncodeQuality = EncodeQuality.DEFAULT
+) -> List[Tuple[str, List[str]]]:
+    """
+    按顺序尝试的 (名称, ffmpeg命令) 列表
+
+    提供 cuda_filter_complex 时先走GPU管线；CPU滤镜按 hw_encoder 选择编码器，
+    最后一项总是 libx264。本进程内已失败过的GPU管线/硬件编码器不再加入。
+    threads>0 时限制ffmpeg线程数（批量并行时避免争抢CPU）
+    """
+    thread_args = ['-threads', str(threads)] if threads > 0 else []
+    if hw_encoder and not hw_encoder_works(hw_encoder):
+        hw_encoder = ""
+    attempts = []
+    if cuda_filter_complex and not _cuda_blur_failed.is_set():
+        attempts.append(("GPU", [
+            *_ffmpeg_prefix(threads), *CUDA_INPUT_ARGS,
+            '-i', input_path,
+            '-filter_complex', cuda_filter_complex,
+            '-map', '[v]', '-map', '0:a?',
+            *_hw_encode_args("nvenc", gpu_frames=True), *AUDIO_ENCODE_ARGS, *MUX_ARGS, *thread_args,
+            output_path
+        ]))
+    for encoder in ([hw_encoder] if hw_encoder else []) + [""]:
+        input_args, graph, encode_args = _encode_setup(encoder, filter_complex, ['[v]'], encode_quality)
+        attempts.append((encoder or "libx264", [
+            *_ffmpeg_prefix(threads), *input_args,
+            '-i', input_path,
+            '-filter_complex', graph,
+            '-map', '[v]', '-map', '0:a?',
+            *encode_args, *AUDIO_ENCODE_ARGS, *MUX_ARGS, *thread_args,
+            output_path
+        ]))
+    return attempts
+
+
+def _record_fallback(failed: List[str]) -> None:
+    """
+    回退后的尝试成功，说明问题在之前失败的GPU管线/硬件编码器而不在输入文件，
+    本进程之后的任务不再尝试它们
+    """
+    for name in failed:
+        if name == "GPU":
+            _cuda_blur_failed.set()
+        else:
+            mark_hw_encoder_failed(name)
+
+
+def _run_blur_command(
+    input_path: str,
+    output_path: str,
+    filter_complex: str,
+    verbose: bool,
+    cuda_filter_complex: str = "",
+    hw_encoder: str = "",
+    threads: int = 0,
+    encode_quality: EncodeQuality = EncodeQuality.DEFAULT
+) -> bool:
+    """执行模糊背景命令，GPU/硬件编码失败后依次回退（见 _blur_command_attempts）"""
+    attempts = _blur_command_attempts(input_path, output_path, filter_complex,
+                                      cuda_filter_complex, hw_encoder, threads, encode_quality)
+    failed = []
+    for name, cmd in attempts[:-1]:
+        if _run_ffmpeg(cmd, False, output_path):
+            if verbose:
+                print(f"完成({name}): {output_path}")
+            _record_fallback(failed)
+            return True
+        failed.append(name)
+        if verbose:
+            print(f"{name}处理失败，回退...")
+    ok = _run_ffmpeg(attempts[-1][1], verbose, output_path)
+    if ok:
+        _record_fallback(failed)
+    return ok
+
+
+def _prepare_blur_background(
+    input_path: str,
+    mode: AspectMode,
+    target_width: int,
+    target_height: int,
+    blur_strength: int,
+    blur_brightness: float,
+    verbose: bool,
+    hw_encoder: str
+) -> Tuple[str, str, str]:
+    """
+    探测原视频并构建滤镜
+
+    Returns:
+        (CPU滤镜图, CUDA滤镜图（不可用时为空）, 硬件编码器名称)
+    """
+    # 获取原视频尺寸
+    orig_w, orig_h = get_video_dimensions(input_path)
+
+    if verbose:
+        print(f"原视频尺寸: {orig_w}x{orig_h}")
+        print(f"目标尺寸: {target_width}x{target_height}")
+
+    # 自动检测模式（滤镜与模式无关，仅用于输出信息）
+    if verbose and mode == AspectMode.AUTO:
+        mode = detect_aspect_mode(orig_w, orig_h, target_height > target_width)
+        print(f"自动检测模式: {mode.value}")
+
+    # 构建滤镜
+    filter_complex = build_blur_background_filter(
+        target_width, target_height, blur_strength, blur_brightness
+    )
+
+    hw = resolve_hw_encoder(hw_encoder)
+    cuda_filter_complex = ""
+    if hw == "nvenc" and cuda_blur_available():
+        cuda_filter_complex = build_cuda_blur_background_filter(
+            orig_w, orig_h, target_width, target_height, blur_strength,
+            f"eq=brightness={blur_brightness - 1}"
+        )
+    return filter_complex, cuda_filter_complex, hw
 
 
 def create_blur_background(
@@ -58,7 +480,10 @@ def create_blur_background(
     target_height: int = 1280,
     blur_strength: int = 20,
     blur_brightness: float = 0.5,
-    verbose: bool = True
+    verbose: bool = True,
+    hw_encoder: str = "auto",
+    threads: int = 0,
+    encode_quality: EncodeQuality = EncodeQuality.DEFAULT
 ) -> bool:
     """
     创建模糊背景填充效果
@@ -72,6 +497,9 @@ def create_blur_background(
         blur_strength: 模糊强度 (5-50)
         blur_brightness: 背景亮度 (0-1)
         verbose: 是否输出详情
+        hw_encoder: auto/nvenc/qsv/vaapi/videotoolbox 时可用则用硬件编码（NVENC 支持时滤镜也走CUDA管线），none 用 libx264
+        threads: ffmpeg 线程数（0=ffmpeg自动）
+        encode_quality: libx264 编码档位（EncodeQuality 或其值）
 
     Returns:
         是否成功
@@ -80,64 +508,321 @@ def create_blur_background(
         print(f"文件不存在: {input_path}")
         return False
 
-    # 获取原视频尺寸
-    orig_w, orig_h = get_video_dimensions(input_path)
+    filter_complex, cuda_filter_complex, hw = _prepare_blur_background(
+        input_path, mode, target_width, target_height,
+        blur_strength, blur_brightness, verbose, hw_encoder
+    )
 
     if verbose:
-        print(f"原视频尺寸: {orig_w}x{orig_h}")
-        print(f"目标尺寸: {target_width}x{target_height}")
+        print("创建模糊背景填充...")
 
-    # 自动检测模式
-    if mode == AspectMode.AUTO:
-        target_is_vertical = target_height > target_width
-        mode = detect_aspect_mode(orig_w, orig_h, target_is_vertical)
-        if verbose:
-            print(f"自动检测模式: {mode.value}")
+    return _run_blur_command(input_path, output_path, filter_complex, verbose,
+                             cuda_filter_complex, hw, threads, encode_quality)
+
+
+# 预览: 低帧率 MJPEG（无音频）
+PREVIEW_ENCODE_ARGS = ['-c:v', 'mjpeg', '-q:v', '5', '-an']
+
+
+def create_blur_background_with_preview(
+    input_path: str,
+    output_path: str,
+    preview_path: str,
+    target_width: int = 720,
+    target_height: int = 1280,
+    blur_strength: int = 20,
+    blur_brightness: float = 0.5,
+    preview_fps: float = 1.0,
+    preview_width: int = 360,
+    verbose: bool = True,
+    hw_encoder: str = "auto",
+    encode_quality: EncodeQuality = EncodeQuality.DEFAULT
+) -> bool:
+    """
+    一次ffmpeg调用同时生成模糊背景视频和预览（源视频只解码一次）
+
+    成品画面分成两路：一路正常编码，一路降帧率、缩小后编码为 MJPEG 预览
+
+    Args:
+        preview_path: 预览输出路径（如 .mjpg/.avi/.mkv）
+        preview_fps: 预览帧率
+        preview_width: 预览宽度（高度按比例）
+        其余参数同 create_blur_background
+    """
+    if not os.path.exists(input_path):
+        print(f"文件不存在: {input_path}")
+        return False
 
-    # 构建滤镜
-    # 方法：先放大模糊作为背景，再叠加原视频居中
     filter_complex = (
-        # 分割视频流
-        f"[0:v]split=2[blur][original];"
-        # 背景：缩放到目标尺寸并模糊
-        f"[blur]scale={target_width}:{target_height}:force_original_aspect_ratio=increase,"
-        f"crop={target_width}:{target_height},"
-        f"boxblur={blur_strength}:{blur_strength},"
-        f"eq=brightness={blur_brightness - 1}[blurred];"
-        # 前景：保持比例缩放
-        f"[original]scale={target_width}:{target_height}:force_original_aspect_ratio=decrease[scaled];"
-        # 叠加：前景居中于背景上
-        f"[blurred][scaled]overlay=(W-w)/2:(H-h)/2[v]"
+        build_blur_background_filter(target_width, target_height, blur_strength, blur_brightness)
+        + ";[v]split=2[vmain][vprev];"
+        f"[vprev]fps={preview_fps},scale={preview_width}:-2[vpreview]"
     )
 
+    def build(encoder: str) -> List[str]:
+        input_args, graph, encode_args = _encode_setup(encoder, filter_complex, ['[vmain]'], encode_quality)
+        return [
+            *_ffmpeg_prefix(), *input_args,
+            '-i', input_path,
+            '-filter_complex', graph,
+            '-map', '[vmain]', '-map', '0:a?',
+            *encode_args, *AUDIO_ENCODE_ARGS, *MUX_ARGS,
+            output_path,
+            '-map', '[vpreview]', *PREVIEW_ENCODE_ARGS,
+            preview_path
+        ]
+
     if verbose:
-        print("创建模糊背景填充...")
+        print("创建模糊背景填充（含预览）...")
 
-    cmd = [
-        'ffmpeg', '-y',
-        '-i', input_path,
-        '-filter_complex', filter_complex,
-        '-map', '[v]', '-map', '0:a?',
-        '-c:v', 'libx264', '-preset', 'fast', '-crf', '18',
-        '-c:a', 'aac', '-b:a', '128k',
-        output_path
-    ]
+    output_names = f"{output_path}, {preview_path}"
+    hw = resolve_hw_encoder(hw_encoder)
+    if hw and _run_ffmpeg(build(hw), False, output_names):
+        if verbose:
+            print(f"完成: {output_names}")
+        return True
+    ok = _run_ffmpeg(build(""), verbose, output_names)
+    if ok and hw:
+        mark_hw_encoder_failed(hw)
+    return ok
 
-    try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-        if proc.returncode == 0:
-            if verbose:
-                print(f"完成: {output_path}")
-            return True
-        else:
-            if verbose:
-                print(f"失败: {proc.stderr[-300:]}")
-            return False
-    except Exception as e:
+
+# 批量处理时每个ffmpeg的线程数，进程数按 CPU核数/BATCH_THREADS 计算
+BATCH_THREADS = 4
+
+
+def _blur_job(job: Dict) -> bool:
+    """进程池任务（模块级函数，可被pickle）"""
+    return create_blur_background(**job)
+
+
+def create_blur_background_batch(jobs: List[Dict], workers: Optional[int] = None) -> List[bool]:
+    """
+    并行批量创建模糊背景
+
+    单个ffmpeg吃不满多核CPU，多个文件同时处理可以重叠解码和编码
+
+    Args:
+        jobs: 每项为 create_blur_background 的关键字参数（至少包含 input_path、output_path）
+        workers: 并行进程数，默认 CPU核数//4
+
+    Returns:
+        与 jobs 顺序一致的成功标记列表
+    """
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // BATCH_THREADS)
+    # 子进程默认不输出详情，并限制线程数避免互相争抢
+    jobs = [{"verbose": False, "threads": BATCH_THREADS, **job} for job in jobs]
+
+    if workers <= 1 or len(jobs) <= 1:
+        return [_blur_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        return list(executor.map(_blur_job, jobs))
+
+
+# ============================================================
+# 多版本模糊背景（一次解码，共享模糊背景子图）
+# ============================================================
+
+# 支持的模糊背景版本
+BLUR_VARIANTS = ("basic", "gradient", "color", "mirror")
+
+
+def _fan_out(chain: str, labels: List[str]) -> str:
+    """滤镜链输出分给多个标签（只有一个时直接输出到该标签）"""
+    if len(labels) == 1:
+        return chain + labels[0]
+    sep = "," if chain and not chain.endswith("]") else ""
+    return f"{chain}{sep}split={len(labels)}{''.join(labels)}"
+
+
+def _mirror_pad_width(orig_size: Tuple[int, int], target_width: int, target_height: int) -> Tuple[int, int, int]:
+    """镜像填充时原视频缩放后的宽高和单侧填充宽度（<=0 表示需要上下填充）"""
+    orig_w, orig_h = orig_size
+    scale_ratio = min(target_width / orig_w, target_height / orig_h)
+    scaled_w = int(orig_w * scale_ratio)
+    scaled_h = int(orig_h * scale_ratio)
+    return scaled_w, scaled_h, (target_width - scaled_w) // 2
+
+
+def _variant_tails(
+    name: str,
+    blur_brightness: float,
+    gradient_color: str,
+    gradient_opacity: float,
+    tint_color: str
+) -> Tuple[str, str]:
+    """各版本在模糊背景后、叠加后追加的滤镜 (post_blur, post_overlay)"""
+    if name == "basic":
+        return f",eq=brightness={blur_brightness - 1}", ""
+    if name == "color":
+        r, g, b = tint_color.split(':')
+        return f",colorbalance=rs={r}:gs={g}:bs={b}", ""
+    if name == "gradient":
+        # 上下渐变暗角
+        return "", (
+            f",drawbox=x=0:y=0:w=iw:h=150:c={gradient_color}@{gradient_opacity}:t=fill"
+            f",drawbox=x=0:y=ih-150:w=iw:h=150:c={gradient_color}@{gradient_opacity}:t=fill"
+        )
+    return "", ""
+
+
+def build_blur_variants_filter(
+    outputs: Dict[str, str],
+    target_width: int = 720,
+    target_height: int = 1280,
+    blur_strength: int = 20,
+    blur_brightness: float = 0.5,
+    gradient_color: str = "black",
+    gradient_opacity: float = 0.3,
+    tint_color: str = "0.1:0.1:0.2",
+    orig_size: Optional[Tuple[int, int]] = None
+) -> str:
+    """
+    构建一个或多个模糊背景版本的滤镜图（输入 [0:v]）
+
+    原视频只分割一次：模糊背景和缩放后的前景各计算一次，再分给各版本追加各自的处理
+
+    Args:
+        outputs: 版本名 -> 输出标签，版本名见 BLUR_VARIANTS
+        orig_size: 原视频宽高，包含 mirror 时必须提供
+    """
+    mirror_pad = None
+    if "mirror" in outputs:
+        mirror_pad = _mirror_pad_width(orig_size, target_width, target_height)
+        if mirror_pad[2] <= 0:
+            mirror_pad = None  # 需要上下填充，和普通模糊背景共用子图
+
+    overlay_variants = [name for name in outputs if name != "mirror" or mirror_pad is None]
+    tails = {
+        name: _variant_tails(name, blur_brightness, gradient_color, gradient_opacity, tint_color)
+        for name in overlay_variants
+    }
+
+    # 单个版本直接套用模板
+    if len(overlay_variants) == 1 and not mirror_pad:
+        name = overlay_variants[0]
+        return _format_bg_template(target_width, target_height, blur_strength,
+                                   *tails[name], out=outputs[name])
+
+    parts = []
+    mirror_src = "[msrc]"
+    if overlay_variants:
+        parts.append(_fan_out("[0:v]", ["[bgsrc]", "[fgsrc]"] + ([mirror_src] if mirror_pad else [])))
+    else:
+        mirror_src = "[0:v]"
+
+    if overlay_variants:
+        # 共享子图：模糊背景 + 保持比例缩放的前景
+        parts.append(_fan_out(
+            f"[bgsrc]{_blur_bg_chain(target_width, target_height, blur_strength)}",
+            [f"[bg_{name}]" for name in overlay_variants]
+        ))
+        parts.append(_fan_out(
+            f"[fgsrc]scale={target_width}:{target_height}:force_original_aspect_ratio=decrease",
+            [f"[fg_{name}]" for name in overlay_variants]
+        ))
+
+    for name in overlay_variants:
+        post_blur, post_overlay = tails[name]
+        bg, fg = f"[bg_{name}]", f"[fg_{name}]"
+        if post_blur:
+            parts.append(f"{bg}{post_blur[1:]}[bgp_{name}]")
+            bg = f"[bgp_{name}]"
+        parts.append(f"{bg}{fg}overlay=(W-w)/2:(H-h)/2{post_overlay}{outputs[name]}")
+
+    if mirror_pad:
+        # 左右填充 - 使用镜像+模糊
+        scaled_w, scaled_h, pad_w = mirror_pad
+        parts.append(
+            f"{mirror_src}split=3[left][right][center];"
+            # 左边镜像
+            f"[left]scale={scaled_w}:{scaled_h},hflip,"
+            f"crop={pad_w}:{scaled_h}:w-{pad_w}:0,"
+            f"{_blur(blur_strength)}[l];"
+            # 右边镜像
+            f"[right]scale={scaled_w}:{scaled_h},hflip,"
+            f"crop={pad_w}:{scaled_h}:0:0,"
+            f"{_blur(blur_strength)}[r];"
+            # 中间原视频
+            f"[center]scale={scaled_w}:{scaled_h}[c];"
+            # 水平拼接
+            f"[l][c][r]hstack=inputs=3,"
+            f"scale={target_width}:{target_height}{outputs['mirror']}"
+        )
+
+    return ";".join(parts)
+
+
+def create_all_blur_variants(
+    input_path: str,
+    outputs: Dict[str, str],
+    target_width: int = 720,
+    target_height: int = 1280,
+    blur_strength: int = 20,
+    blur_brightness: float = 0.5,
+    gradient_color: str = "black",
+    gradient_opacity: float = 0.3,
+    tint_color: str = "0.1:0.1:0.2",
+    verbose: bool = True,
+    hw_encoder: str = "auto",
+    encode_quality: EncodeQuality = EncodeQuality.DEFAULT
+) -> bool:
+    """
+    一次ffmpeg调用生成多个模糊背景版本（源视频只解码一次）
+
+    Args:
+        input_path: 输入视频
+        outputs: 版本名 -> 输出路径，版本名见 BLUR_VARIANTS
+        hw_encoder: auto/nvenc/qsv/vaapi/videotoolbox 时可用则用硬件编码，失败后回退到 libx264
+        其余参数同各 create_*_blur_background
+
+    Returns:
+        是否全部成功
+    """
+    if not os.path.exists(input_path):
+        print(f"文件不存在: {input_path}")
+        return False
+    unknown = [name for name in outputs if name not in BLUR_VARIANTS]
+    if unknown or not outputs:
         if verbose:
-            print(f"错误: {e}")
+            print(f"未知的模糊背景版本: {unknown}")
         return False
 
+    orig_size = get_video_dimensions(input_path) if "mirror" in outputs else None
+    filter_complex = build_blur_variants_filter(
+        {name: f"[v_{name}]" for name in outputs},
+        target_width, target_height, blur_strength, blur_brightness,
+        gradient_color, gradient_opacity, tint_color, orig_size
+    )
+
+    def build(encoder: str) -> List[str]:
+        input_args, graph, encode_args = _encode_setup(
+            encoder, filter_complex, [f"[v_{name}]" for name in outputs], encode_quality
+        )
+        cmd = [*_ffmpeg_prefix(), *input_args, '-i', input_path, '-filter_complex', graph]
+        for name, output_path in outputs.items():
+            cmd.extend([
+                '-map', f'[v_{name}]', '-map', '0:a?',
+                *encode_args, *AUDIO_ENCODE_ARGS, *MUX_ARGS,
+                output_path
+            ])
+        return cmd
+
+    if verbose:
+        print(f"创建模糊背景: {', '.join(outputs)}...")
+
+    output_names = ", ".join(outputs.values())
+    hw = resolve_hw_encoder(hw_encoder)
+    if hw and _run_ffmpeg(build(hw), False, output_names):
+        if verbose:
+            print(f"完成: {output_names}")
+        return True
+    ok = _run_ffmpeg(build(""), verbose, output_names)
+    if ok and hw:
+        mark_hw_encoder_failed(hw)
+    return ok
+
 
 def create_gradient_blur_background(
     input_path: str,
@@ -147,7 +832,9 @@ def create_gradient_blur_background(
     blur_strength: int = 25,
     gradient_color: str = "black",
     gradient_opacity: float = 0.3,
-    verbose: bool = True
+    verbose: bool = True,
+    hw_encoder: str = "auto",
+    encode_quality: EncodeQuality = EncodeQuality.DEFAULT
 ) -> bool:
     """
     创建带渐变遮罩的模糊背景
@@ -161,50 +848,22 @@ def create_gradient_blur_background(
         gradient_color: 渐变颜色
         gradient_opacity: 渐变不透明度
         verbose: 是否输出详情
+        hw_encoder: auto/nvenc/qsv/vaapi/videotoolbox 时可用则用硬件编码，none 用 libx264
+        encode_quality: libx264 编码档位
     """
     if not os.path.exists(input_path):
         return False
 
-    # 构建滤镜 - 添加边缘渐变效果
-    filter_complex = (
-        f"[0:v]split=2[blur][original];"
-        f"[blur]scale={target_width}:{target_height}:force_original_aspect_ratio=increase,"
-        f"crop={target_width}:{target_height},"
-        f"boxblur={blur_strength}:{blur_strength}[blurred];"
-        f"[original]scale={target_width}:{target_height}:force_original_aspect_ratio=decrease[scaled];"
-        f"[blurred][scaled]overlay=(W-w)/2:(H-h)/2,"
-        # 添加上下渐变暗角
-        f"drawbox=x=0:y=0:w=iw:h=150:c={gradient_color}@{gradient_opacity}:t=fill,"
-        f"drawbox=x=0:y=ih-150:w=iw:h=150:c={gradient_color}@{gradient_opacity}:t=fill[v]"
+    filter_complex = build_blur_variants_filter(
+        {"gradient": "[v]"}, target_width, target_height, blur_strength,
+        gradient_color=gradient_color, gradient_opacity=gradient_opacity
     )
 
     if verbose:
         print("创建渐变模糊背景...")
 
-    cmd = [
-        'ffmpeg', '-y',
-        '-i', input_path,
-        '-filter_complex', filter_complex,
-        '-map', '[v]', '-map', '0:a?',
-        '-c:v', 'libx264', '-preset', 'fast', '-crf', '18',
-        '-c:a', 'aac', '-b:a', '128k',
-        output_path
-    ]
-
-    try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-        if proc.returncode == 0:
-            if verbose:
-                print(f"完成: {output_path}")
-            return True
-        else:
-            if verbose:
-                print(f"失败: {proc.stderr[-300:]}")
-            return False
-    except Exception as e:
-        if verbose:
-            print(f"错误: {e}")
-        return False
+    return _run_blur_command(input_path, output_path, filter_complex, verbose,
+                             hw_encoder=resolve_hw_encoder(hw_encoder), encode_quality=encode_quality)
 
 
 def create_color_blur_background(
@@ -214,7 +873,9 @@ def create_color_blur_background(
     target_height: int = 1280,
     blur_strength: int = 30,
     tint_color: str = "0.1:0.1:0.2",  # R:G:B 色调偏移
-    verbose: bool = True
+    verbose: bool = True,
+    hw_encoder: str = "auto",
+    encode_quality: EncodeQuality = EncodeQuality.DEFAULT
 ) -> bool:
     """
     创建带色调的模糊背景
@@ -222,49 +883,31 @@ def create_color_blur_background(
     Args:
         input_path: 输入视频
         tint_color: 色调偏移 R:G:B (每个值-1到1)
+        hw_encoder: auto/nvenc/qsv/vaapi/videotoolbox 时可用则用硬件编码（NVENC 支持时滤镜也走CUDA管线），none 用 libx264
+        encode_quality: libx264 编码档位
     """
     if not os.path.exists(input_path):
         return False
 
-    r, g, b = tint_color.split(':')
-
-    filter_complex = (
-        f"[0:v]split=2[blur][original];"
-        f"[blur]scale={target_width}:{target_height}:force_original_aspect_ratio=increase,"
-        f"crop={target_width}:{target_height},"
-        f"boxblur={blur_strength}:{blur_strength},"
-        f"colorbalance=rs={r}:gs={g}:bs={b}[blurred];"
-        f"[original]scale={target_width}:{target_height}:force_original_aspect_ratio=decrease[scaled];"
-        f"[blurred][scaled]overlay=(W-w)/2:(H-h)/2[v]"
+    filter_complex = build_blur_variants_filter(
+        {"color": "[v]"}, target_width, target_height, blur_strength, tint_color=tint_color
     )
 
+    hw = resolve_hw_encoder(hw_encoder)
+    cuda_filter_complex = ""
+    if hw == "nvenc" and cuda_blur_available():
+        r, g, b = tint_color.split(':')
+        orig_w, orig_h = get_video_dimensions(input_path)
+        cuda_filter_complex = build_cuda_blur_background_filter(
+            orig_w, orig_h, target_width, target_height, blur_strength,
+            f"colorbalance=rs={r}:gs={g}:bs={b}"
+        )
+
     if verbose:
         print("创建彩色模糊背景...")
 
-    cmd = [
-        'ffmpeg', '-y',
-        '-i', input_path,
-        '-filter_complex', filter_complex,
-        '-map', '[v]', '-map', '0:a?',
-        '-c:v', 'libx264', '-preset', 'fast', '-crf', '18',
-        '-c:a', 'aac', '-b:a', '128k',
-        output_path
-    ]
-
-    try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-        if proc.returncode == 0:
-            if verbose:
-                print(f"完成: {output_path}")
-            return True
-        else:
-            if verbose:
-                print(f"失败: {proc.stderr[-300:]}")
-            return False
-    except Exception as e:
-        if verbose:
-            print(f"错误: {e}")
-        return False
+    return _run_blur_command(input_path, output_path, filter_complex, verbose,
+                             cuda_filter_complex, hw, encode_quality=encode_quality)
 
 
 def create_mirror_blur_background(
@@ -273,81 +916,117 @@ def create_mirror_blur_background(
     target_width: int = 720,
     target_height: int = 1280,
     blur_strength: int = 20,
-    verbose: bool = True
+    verbose: bool = True,
+    hw_encoder: str = "auto",
+    encode_quality: EncodeQuality = EncodeQuality.DEFAULT
 ) -> bool:
     """
-    创建镜像模糊背景（左右镜像填充边缘）
+    创建镜像模糊背景（左右镜像填充边缘，需要上下填充时使用普通模糊背景）
+
+    hw_encoder: auto/nvenc/qsv/vaapi/videotoolbox 时可用则用硬件编码，none 用 libx264
+    encode_quality: libx264 编码档位
     """
     if not os.path.exists(input_path):
         return False
 
-    # 获取原视频尺寸计算填充区域
-    orig_w, orig_h = get_video_dimensions(input_path)
-
-    # 计算缩放后的尺寸
-    scale_ratio = min(target_width / orig_w, target_height / orig_h)
-    scaled_w = int(orig_w * scale_ratio)
-    scaled_h = int(orig_h * scale_ratio)
-
-    # 左右需要填充的宽度
-    pad_w = (target_width - scaled_w) // 2
-
-    if pad_w > 0:
-        # 需要左右填充 - 使用镜像+模糊
-        filter_complex = (
-            f"[0:v]split=3[left][right][center];"
-            # 左边镜像
-            f"[left]scale={scaled_w}:{scaled_h},hflip,"
-            f"crop={pad_w}:{scaled_h}:w-{pad_w}:0,"
-            f"boxblur={blur_strength}:{blur_strength}[l];"
-            # 右边镜像
-            f"[right]scale={scaled_w}:{scaled_h},hflip,"
-            f"crop={pad_w}:{scaled_h}:0:0,"
-            f"boxblur={blur_strength}:{blur_strength}[r];"
-            # 中间原视频
-            f"[center]scale={scaled_w}:{scaled_h}[c];"
-            # 水平拼接
-            f"[l][c][r]hstack=inputs=3,"
-            f"scale={target_width}:{target_height}[v]"
-        )
-    else:
-        # 需要上下填充 - 使用普通模糊背景
-        filter_complex = (
-            f"[0:v]split=2[blur][original];"
-            f"[blur]scale={target_width}:{target_height}:force_original_aspect_ratio=increase,"
-            f"crop={target_width}:{target_height},"
-            f"boxblur={blur_strength}:{blur_strength}[blurred];"
-            f"[original]scale={target_width}:{target_height}:force_original_aspect_ratio=decrease[scaled];"
-            f"[blurred][scaled]overlay=(W-w)/2:(H-h)/2[v]"
-        )
+    # 原视频尺寸决定填充方向
+    filter_complex = build_blur_variants_filter(
+        {"mirror": "[v]"}, target_width, target_height, blur_strength,
+        orig_size=get_video_dimensions(input_path)
+    )
 
     if verbose:
         print("创建镜像模糊背景...")
 
-    cmd = [
-        'ffmpeg', '-y',
-        '-i', input_path,
-        '-filter_complex', filter_complex,
-        '-map', '[v]', '-map', '0:a?',
-        '-c:v', 'libx264', '-preset', 'fast', '-crf', '18',
-        '-c:a', 'aac', '-b:a', '128k',
-        output_path
-    ]
+    return _run_blur_command(input_path, output_path, filter_complex, verbose,
+                             hw_encoder=resolve_hw_encoder(hw_encoder), encode_quality=encode_quality)
+
 
+# ============================================================
+# 异步接口（一个事件循环同时管理多个ffmpeg进程）
+# ============================================================
+
+async def _run_ffmpeg_async(cmd: List[str], verbose: bool, output_path: str, timeout: float = 600) -> bool:
+    """_run_ffmpeg 的异步版本"""
     try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-        if proc.returncode == 0:
-            if verbose:
-                print(f"完成: {output_path}")
-            return True
-        else:
-            if verbose:
-                print(f"失败: {proc.stderr[-300:]}")
-            return False
-    except Exception as e:
+        returncode, tail = await run_ffmpeg_async(cmd, timeout, tail_lines=STDERR_TAIL_LINES)
+    except OSError as e:
         if verbose:
             print(f"错误: {e}")
         return False
+    except subprocess.TimeoutExpired:
+        if verbose:
+            print(f"错误: 处理超时 ({timeout:.0f}秒)")
+        return False
+    return _report(returncode, tail, verbose, output_path)
+
+
+async def create_blur_background_async(
+    input_path: str,
+    output_path: str,
+    mode: AspectMode = AspectMode.AUTO,
+    target_width: int = 720,
+    target_height: int = 1280,
+    blur_strength: int = 20,
+    blur_brightness: float = 0.5,
+    verbose: bool = True,
+    hw_encoder: str = "auto",
+    threads: int = 0,
+    encode_quality: EncodeQuality = EncodeQuality.DEFAULT
+) -> bool:
+    """create_blur_background 的异步版本，参数相同"""
+    if not os.path.exists(input_path):
+        print(f"文件不存在: {input_path}")
+        return False
+
+    # 探测（ffprobe/能力缓存）是同步调用，放到线程池中执行
+    loop = asyncio.get_running_loop()
+    filter_complex, cuda_filter_complex, hw = await loop.run_in_executor(None, functools.partial(
+        _prepare_blur_background, input_path, mode, target_width, target_height,
+        blur_strength, blur_brightness, verbose, hw_encoder
+    ))
+
+    if verbose:
+        print("创建模糊背景填充...")
+
+    attempts = _blur_command_attempts(input_path, output_path, filter_complex,
+                                      cuda_filter_complex, hw, threads, encode_quality)
+    failed = []
+    for name, cmd in attempts[:-1]:
+        if await _run_ffmpeg_async(cmd, False, output_path):
+            if verbose:
+                print(f"完成({name}): {output_path}")
+            _record_fallback(failed)
+            return True
+        failed.append(name)
+        if verbose:
+            print(f"{name}处理失败，回退...")
+    ok = await _run_ffmpeg_async(attempts[-1][1], verbose, output_path)
+    if ok:
+        _record_fallback(failed)
+    return ok
+
+
+async def create_blur_background_batch_async(jobs: List[Dict], workers: Optional[int] = None) -> List[bool]:
+    """
+    异步批量创建模糊背景，同时运行的ffmpeg不超过 workers 个
+
+    Args:
+        jobs: 每项为 create_blur_background 的关键字参数
+        workers: 并发数，默认 CPU核数//4
+
+    Returns:
+        与 jobs 顺序一致的成功标记列表
+    """
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // BATCH_THREADS)
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    async def _one(job: Dict) -> bool:
+        async with semaphore:
+            return await create_blur_background_async(**{"verbose": False, "threads": BATCH_THREADS, **job})
+
+    return list(await asyncio.gather(*(_one(job) for job in jobs)))
 
 
 # 命令行入口
@@ -361,3 +1040,7 @@ if __name__ == "__main__":
     print("  - create_gradient_blur_background: 带渐变的模糊背景")
     print("  - create_color_blur_background: 带色调的模糊背景")
     print("  - create_mirror_blur_background: 镜像模糊背景")
+    print("  - create_all_blur_variants: 一次生成多个模糊背景版本")
+    print("  - create_blur_background_batch: 并行批量模糊背景")
+    print("  - create_blur_background_with_preview: 模糊背景 + 预览（一次解码）")
+    print("  - create_blur_background_async / create_blur_background_batch_async: 异步接口")
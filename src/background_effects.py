@@ -4,6 +4,7 @@ VideoMixer - 高级背景效果模块
 """
 
 import os
+import math
 import random
 from dataclasses import dataclass, field
 from typing import List, Tuple, Optional
@@ -84,58 +85,88 @@ class BackgroundConfig:
 # 滤镜构建函数
 # ============================================================
 
+# 半径不超过该值时用单次滑动窗口的 avgblur，更大时用与半径无关的 gblur
+AVGBLUR_MAX_RADIUS = 30
+
+
+def blur_filter(radius: int) -> str:
+    """
+    均值模糊滤镜
+
+    avgblur 是可分离的单次滑动窗口均值（boxblur=r:r 相当于同半径重复r次）；
+    大半径时 gblur 的IIR实现耗时与半径无关
+    """
+    radius = max(1, int(radius))
+    if radius <= AVGBLUR_MAX_RADIUS:
+        return f"avgblur=sizeX={radius}:sizeY={radius}"
+    return f"gblur=sigma={radius / 3:.1f}:steps=1"
+
+
+# 径向波纹位移图按 1/RIPPLE_MAP_DOWNSCALE 尺寸计算后放大
+RIPPLE_MAP_DOWNSCALE = 4
+
+
 def build_water_ripple_filter(config: WaterRippleConfig, video_width: int, video_height: int) -> str:
-    """构建水波纹效果滤镜"""
+    """
+    构建水波纹效果滤镜（filter_complex 片段，调用方补充输入/输出标签）
+
+    用 displace 按位移图搬移像素（128 = 不位移），sin 只在位移图上计算：
+    水平/垂直波纹的位移只随一个坐标变化，在单行/单列上计算后拉伸；
+    径向波纹在缩小的图上计算后放大。位移图由源视频分出的一路生成，帧时间戳与源一致
+    """
     amp = config.amplitude
     freq = config.frequency
     speed = config.speed
+    w, h = video_width, video_height
 
     if config.direction == "horizontal":
-        # 水平波纹
-        filter_str = (
-            f"geq="
-            f"lum='lum(X,Y+{amp}*sin(2*PI*{freq}*X/W+T*{speed}))':"
-            f"cb='cb(X,Y+{amp}*sin(2*PI*{freq}*X/W+T*{speed}))':"
-            f"cr='cr(X,Y+{amp}*sin(2*PI*{freq}*X/W+T*{speed}))'"
-        )
+        # 水平波纹：纵向位移随 X 变化
+        map_size = f"{w}:2"
+        x_expr = "128"
+        y_expr = f"128+{amp}*sin(2*PI*{freq}*X/W+T*{speed})"
+        upscale = f"scale={w}:{h}:flags=neighbor"
     elif config.direction == "vertical":
-        # 垂直波纹
-        filter_str = (
-            f"geq="
-            f"lum='lum(X+{amp}*sin(2*PI*{freq}*Y/H+T*{speed}),Y)':"
-            f"cb='cb(X+{amp}*sin(2*PI*{freq}*Y/H+T*{speed}),Y)':"
-            f"cr='cr(X+{amp}*sin(2*PI*{freq}*Y/H+T*{speed}),Y)'"
-        )
+        # 垂直波纹：横向位移随 Y 变化
+        map_size = f"2:{h}"
+        x_expr = f"128+{amp}*sin(2*PI*{freq}*Y/H+T*{speed})"
+        y_expr = "128"
+        upscale = f"scale={w}:{h}:flags=neighbor"
     else:
-        # 径向波纹
-        filter_str = (
-            f"geq="
-            f"lum='lum(X+{amp}*sin(2*PI*{freq}*sqrt((X-W/2)*(X-W/2)+(Y-H/2)*(Y-H/2))/W+T*{speed}),Y)':"
-            f"cb='cb(X+{amp}*sin(2*PI*{freq}*sqrt((X-W/2)*(X-W/2)+(Y-H/2)*(Y-H/2))/W+T*{speed}),Y)':"
-            f"cr='cr(X+{amp}*sin(2*PI*{freq}*sqrt((X-W/2)*(X-W/2)+(Y-H/2)*(Y-H/2))/W+T*{speed}),Y)'"
-        )
-
-    return filter_str
+        # 径向波纹：横向位移随到中心的距离变化
+        small_w = max(2, w // RIPPLE_MAP_DOWNSCALE // 2 * 2)
+        small_h = max(2, h // RIPPLE_MAP_DOWNSCALE // 2 * 2)
+        map_size = f"{small_w}:{small_h}"
+        x_expr = f"128+{amp}*sin(2*PI*{freq}*hypot(X-W/2,Y-H/2)/W+T*{speed})"
+        y_expr = "128"
+        upscale = f"scale={w}:{h}:flags=bilinear"
+
+    return (
+        f"format=yuv420p,split[rsrc][rmap];"
+        f"[rmap]scale={map_size},split[rmx][rmy];"
+        f"[rmx]geq=lum='{x_expr}':cb='{x_expr}':cr='{x_expr}',{upscale}[rx];"
+        f"[rmy]geq=lum='{y_expr}':cb='{y_expr}':cr='{y_expr}',{upscale}[ry];"
+        f"[rsrc][rx][ry]displace=edge=smear"
+    )
 
 
 def build_ink_flow_filter(config: InkFlowConfig) -> str:
-    """构建墨迹流动效果滤镜"""
+    """
+    构建墨迹流动效果滤镜
+
+    噪点 + 高斯晕染 + 压暗中间调模拟墨迹，全部是原生滤镜；
+    逐像素 geq 扭曲（几个像素的横向摆动）视觉贡献很小已去掉，需要明显的流动形变时用 displace（参考水波纹）
+    """
     intensity = config.intensity
-    speed = config.speed
 
-    # 使用噪点和扭曲模拟墨迹效果
+    # 使用噪点和晕染模拟墨迹效果
     filters = []
 
     # 添加噪点
     filters.append(f"noise=alls={int(intensity * 30)}:allf=t")
 
-    # 添加轻微扭曲
-    filters.append(
-        f"geq="
-        f"lum='lum(X+{intensity*3}*sin(T*{speed}+Y/30),Y)':"
-        f"cb='cb(X,Y)':"
-        f"cr='cr(X,Y)'"
-    )
+    # 噪点晕开成墨迹，中间调略微压暗
+    filters.append(f"gblur=sigma={max(0.1, intensity * 2):.2f}:steps=1")
+    filters.append(f"curves=all='0/0 0.5/{0.5 - intensity * 0.1:.3f} 1/1'")
 
     # 色彩偏移（可选）
     if config.color_shift:
@@ -156,27 +187,35 @@ def build_blur_border_filter(config: BlurBorderConfig, video_width: int, video_h
         filter_str = (
             f"split[a][b];"
             f"[a]crop={center_width}:{video_height}:{border_px}:0[center];"
-            f"[b]boxblur={blur}:{blur}[blur];"
+            f"[b]{blur_filter(blur)}[blur];"
             f"[blur][center]overlay={(video_width-center_width)//2}:0"
         )
     elif config.side == "left":
         filter_str = (
             f"split[a][b];"
             f"[a]crop={video_width-border_px}:{video_height}:{border_px}:0[right];"
-            f"[b]crop={border_px}:{video_height}:0:0,boxblur={blur}:{blur}[left_blur];"
+            f"[b]crop={border_px}:{video_height}:0:0,{blur_filter(blur)}[left_blur];"
             f"[left_blur][right]hstack"
         )
     else:  # right
         filter_str = (
             f"split[a][b];"
             f"[a]crop={video_width-border_px}:{video_height}:0:0[left];"
-            f"[b]crop={border_px}:{video_height}:{video_width-border_px}:0,boxblur={blur}:{blur}[right_blur];"
+            f"[b]crop={border_px}:{video_height}:{video_width-border_px}:0,{blur_filter(blur)}[right_blur];"
             f"[left][right_blur]hstack"
         )
 
     return filter_str
 
 
+# DynamicBackgroundConfig.transition -> xfade transition 名称
+XFADE_TRANSITIONS = {
+    "fade": "fade",
+    "dissolve": "dissolve",
+    "wipe": "wipeleft",
+}
+
+
 def build_dynamic_background_filter(config: DynamicBackgroundConfig,
                                      video_duration: float,
                                      video_width: int,
@@ -184,6 +223,10 @@ def build_dynamic_background_filter(config: DynamicBackgroundConfig,
     """
     构建动态背景切换滤镜
 
+    每张图片只解码并缩放自己的时间片，再用 concat（无过渡）或 xfade 串联，
+    避免逐帧全画面 RGBA overlay 合成。第 i 张图片从 i*switch_interval 开始显示，
+    最后一张持续到视频结束。输出标签为 [bg]
+
     Returns:
         inputs: 需要添加的输入参数列表
         filter_complex: 滤镜复合字符串
@@ -191,60 +234,42 @@ def build_dynamic_background_filter(config: DynamicBackgroundConfig,
     if not config.image_paths:
         return [], ""
 
+    interval = config.switch_interval
+    # 开始时间超出视频时长的图片不会显示
+    num_images = max(1, min(len(config.image_paths), math.ceil(video_duration / interval)))
+    xfade = XFADE_TRANSITIONS.get(config.transition)
+    overlap = config.transition_duration if xfade and num_images > 1 else 0.0
+    overlap = max(0.0, min(overlap, interval))
+
     inputs = []
     filter_parts = []
-    current_label = "[bg0]"
-
-    # 添加所有背景图片作为输入
-    for i, img_path in enumerate(config.image_paths):
-        inputs.extend(['-loop', '1', '-t', str(video_duration), '-i', img_path])
-
-    # 计算切换时间点
-    num_images = len(config.image_paths)
-    switch_times = []
-    t = 0
-    while t < video_duration:
-        switch_times.append(t)
-        t += config.switch_interval
-
-    # 构建切换滤镜
-    # 首先缩放所有背景图
-    for i in range(num_images):
-        input_idx = i + 1  # 假设视频是输入0
-        filter_parts.append(f"[{input_idx}:v]scale={video_width}:{video_height},setsar=1[bg{i}]")
-
-    # 使用overlay和enable实现切换
-    bg_labels = [f"[bg{i}]" for i in range(num_images)]
-
-    # 创建背景切换
-    if num_images == 1:
-        filter_complex = f"{filter_parts[0]}"
-        return inputs, filter_complex
-
-    # 多背景切换使用条件enable
-    overlay_filters = []
-    for i, img_path in enumerate(config.image_paths):
-        start_t = i * config.switch_interval
-        end_t = (i + 1) * config.switch_interval
+    for i, img_path in enumerate(config.image_paths[:num_images]):
         if i == num_images - 1:
-            end_t = video_duration + 1
-
-        overlay_filters.append(
-            f"[bg{i}]trim=0:{video_duration},setpts=PTS-STARTPTS,"
-            f"format=rgba,colorchannelmixer=aa='between(t,{start_t},{end_t})'[bg{i}e]"
+            slot = max(video_duration - i * interval, overlap)
+        else:
+            # 非最后一张多保留 overlap 秒给过渡
+            slot = interval + overlap
+        inputs.extend(['-loop', '1', '-t', f"{slot:.3f}", '-i', img_path])
+        input_idx = i + 1  # 视频是输入0
+        filter_parts.append(
+            f"[{input_idx}:v]scale={video_width}:{video_height},setsar=1,"
+            f"trim=0:{slot:.3f},setpts=PTS-STARTPTS[s{i}]"
         )
 
-    filter_parts.extend(overlay_filters)
-
-    # 合并所有背景
-    if num_images >= 2:
-        filter_parts.append(f"[bg0e][bg1e]overlay=enable='between(t,{config.switch_interval},{video_duration})'[bgmix]")
-        current = "[bgmix]"
-        for i in range(2, num_images):
-            start_t = i * config.switch_interval
-            new_label = f"[bgmix{i}]"
-            filter_parts.append(f"{current}[bg{i}e]overlay=enable='gte(t,{start_t})'{new_label}")
-            current = new_label
+    if num_images == 1:
+        filter_parts[0] = filter_parts[0].replace("[s0]", "[bg]")
+    elif overlap <= 0:
+        labels = "".join(f"[s{i}]" for i in range(num_images))
+        filter_parts.append(f"{labels}concat=n={num_images}:v=1:a=0[bg]")
+    else:
+        current = "[s0]"
+        for i in range(1, num_images):
+            out = "[bg]" if i == num_images - 1 else f"[x{i}]"
+            filter_parts.append(
+                f"{current}[s{i}]xfade=transition={xfade}:"
+                f"duration={overlap:.3f}:offset={i * interval:.3f}{out}"
+            )
+            current = out
 
     filter_complex = ";".join(filter_parts)
     return inputs, filter_complex
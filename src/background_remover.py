@@ -4,13 +4,16 @@ VideoMixer - AI 视频背景替换模块
 """
 
 import os
+import json
+import functools
+import queue
+import threading
 import subprocess
-import tempfile
-import shutil
+import multiprocessing
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 try:
     from rembg import remove, new_session
@@ -20,6 +23,25 @@ try:
 except ImportError:
     REMBG_AVAILABLE = False
 
+try:
+    import onnxruntime as ort
+    from rembg.sessions import sessions_class
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 
 @dataclass
 class BackgroundConfig:
@@ -46,6 +68,109 @@ class BackgroundConfig:
     frame_skip: int = 2  # fast模式下每N帧处理一次
 
 
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _blend_color(fg, alpha, bg_r, bg_g, bg_b, out):
+        """纯色背景合成: 每像素一次 alpha 读取，三通道一起计算"""
+        for i in prange(fg.shape[0]):
+            for j in range(fg.shape[1]):
+                a = np.uint16(alpha[i, j])
+                b = np.uint16(255) - a
+                out[i, j, 0] = (fg[i, j, 0] * a + bg_r * b + 127) // 255
+                out[i, j, 1] = (fg[i, j, 1] * a + bg_g * b + 127) // 255
+                out[i, j, 2] = (fg[i, j, 2] * a + bg_b * b + 127) // 255
+        return out
+
+
+def alpha_blend(rgb: "np.ndarray", alpha: "np.ndarray", bg, out: Optional["np.ndarray"] = None) -> "np.ndarray":
+    """
+    按 alpha 将前景合成到背景上
+
+    Args:
+        rgb: 前景 (HxWx3 uint8)
+        alpha: 透明度 (HxW uint8)
+        bg: 背景颜色 (R, G, B) 或同尺寸背景图 (HxWx3 uint8)
+        out: 可选的输出缓冲区 (HxWx3 uint8)，纯色背景且 numba 可用时原地写入
+
+    Returns:
+        RGB 结果 (HxWx3 uint8)
+    """
+    if NUMBA_AVAILABLE and np.ndim(bg) == 1:
+        if out is None:
+            out = np.empty(rgb.shape, np.uint8)
+        r, g, b = (np.uint16(c) for c in bg)
+        return _blend_color(rgb, alpha, r, g, b, out)
+
+    a = alpha[..., None].astype(np.uint16)
+    bg = np.asarray(bg, dtype=np.uint16)
+    result = (rgb * a + bg * (255 - a) + 127) // 255
+    if out is None:
+        return result.astype(np.uint8)
+    out[...] = result
+    return out
+
+
+# ONNX Runtime 执行提供者优先级，按本机可用情况过滤，CPU 兜底
+ORT_PROVIDER_PRIORITY = [
+    "CUDAExecutionProvider",
+    "CoreMLExecutionProvider",
+    "DmlExecutionProvider",
+    "CPUExecutionProvider",
+]
+# CUDA 提供者参数: 卷积算法用启发式选择，避免首次推理时耗时的穷举搜索
+CUDA_PROVIDER_OPTIONS = {"device_id": 0, "cudnn_conv_algo_search": "HEURISTIC"}
+
+
+def _session_providers() -> list:
+    """本机可用的执行提供者（按 ORT_PROVIDER_PRIORITY 排序）"""
+    available = set(ort.get_available_providers())
+    providers = [p for p in ORT_PROVIDER_PRIORITY if p in available] or ["CPUExecutionProvider"]
+    return [(p, CUDA_PROVIDER_OPTIONS) if p == "CUDAExecutionProvider" else p for p in providers]
+
+
+def _cuda_available() -> bool:
+    """ONNX Runtime 是否可以使用 CUDA"""
+    return ORT_AVAILABLE and "CUDAExecutionProvider" in ort.get_available_providers()
+
+
+def _session_options(threads: int = 0) -> "ort.SessionOptions":
+    """开启全部图优化与内存池，线程数默认取一半核数（留给 ffmpeg 解码/编码）"""
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    opts.enable_cpu_mem_arena = True
+    opts.intra_op_num_threads = threads if threads > 0 else max(1, (os.cpu_count() or 2) // 2)
+    return opts
+
+
+def _new_session(model: str, threads: int = 0):
+    """创建 rembg session，可用时使用自定义 SessionOptions 和执行提供者"""
+    if not ORT_AVAILABLE:
+        return new_session(model)
+    providers = _session_providers()
+    for session_class in sessions_class:
+        if session_class.name() == model:
+            try:
+                return session_class(model, _session_options(threads), providers=providers)
+            except TypeError:
+                break
+    return new_session(model, providers=providers)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_session(model: str):
+    """
+    按模型名缓存 rembg session（模型加载耗时数百毫秒）
+
+    首次创建时用一张 320x320 空图推理一次，完成 ONNX Runtime 图优化与线程池初始化
+    """
+    session = _new_session(model)
+    try:
+        remove(Image.new("RGB", (320, 320)), session=session, only_mask=True)
+    except Exception:
+        pass
+    return session
+
+
 def check_rembg():
     """检查 rembg 是否可用"""
     return REMBG_AVAILABLE
@@ -78,26 +203,24 @@ def remove_background_image(
         # 读取图片
         input_img = Image.open(input_path)
 
-        # 创建 session (可复用提高性能)
-        session = new_session(config.model)
+        # 获取缓存的 session
+        session = _get_session(config.model)
 
         # 移除背景
         output_img = remove(input_img, session=session)
 
         # 应用新背景
-        if config.bg_type == "transparent":
-            # 保持透明
-            result = output_img
-        elif config.bg_type == "color":
+        if config.bg_type == "color":
             # 纯色背景
-            bg = Image.new("RGBA", output_img.size, (*config.bg_color, 255))
-            result = Image.alpha_composite(bg, output_img)
+            arr = np.asarray(output_img if output_img.mode == "RGBA" else output_img.convert("RGBA"))
+            result = Image.fromarray(alpha_blend(arr[..., :3], arr[..., 3], config.bg_color))
         elif config.bg_type == "image" and config.bg_path:
             # 图片背景
-            bg = Image.open(config.bg_path).convert("RGBA")
-            bg = bg.resize(output_img.size)
-            result = Image.alpha_composite(bg, output_img)
+            arr = np.asarray(output_img if output_img.mode == "RGBA" else output_img.convert("RGBA"))
+            bg = Image.open(config.bg_path).convert("RGB").resize(output_img.size)
+            result = Image.fromarray(alpha_blend(arr[..., :3], arr[..., 3], np.asarray(bg)))
         else:
+            # 透明背景保持 RGBA
             result = output_img
 
         # 保存
@@ -109,6 +232,247 @@ def remove_background_image(
         return False
 
 
+# ffmpeg 管道缓冲区大小
+PIPE_BUFFER_SIZE = 1 << 20
+# 解码硬件加速: auto 按平台尝试可用的 NVDEC/VideoToolbox/D3D11VA/VAAPI，
+# 都不可用时 ffmpeg 自动回退软件解码；帧自动下载到内存后转 rgb24
+DECODE_HWACCEL_ARGS = ['-hwaccel', 'auto']
+# 解码与编码之间最多排队的帧数（背压，内存占用恒定）
+FRAME_QUEUE_SIZE = 64
+# rembg 并行线程数（CUDA 会话）
+REMBG_WORKERS = 4
+# 纯 CPU 推理时改用进程池，避开 GIL 下的前后处理串行
+REMBG_USE_PROCESSES = True
+# 进程池中每个进程的 ONNX Runtime 线程数
+REMBG_PROCESS_THREADS = 2
+# 每次 rembg 推理的帧数
+REMBG_BATCH_SIZE = 8
+# 会话运行在 CUDA 上时的批量大小
+REMBG_GPU_BATCH_SIZE = 16
+# 帧队列结束标记
+_END_OF_FRAMES = object()
+
+# U2Net 系列模型: 320x320 输入，ImageNet 均值/方差归一化，可直接批量调用 ONNX 会话
+U2NET_MODELS = {"u2net", "u2netp", "u2net_human_seg", "silueta"}
+U2NET_INPUT_SIZE = 320
+U2NET_MEAN = (0.485, 0.456, 0.406)
+U2NET_STD = (0.229, 0.224, 0.225)
+# 导出时批量维度固定为1的模型，记录后逐帧推理
+_SINGLE_BATCH_MODELS = set()
+
+
+def _probe_video(input_video: str) -> Tuple[int, int, str, int]:
+    """
+    获取视频流信息
+
+    Returns:
+        (宽, 高, 帧率字符串, 帧数估计（未知时为0）)
+    """
+    probe_cmd = [
+        'ffprobe', '-v', 'quiet', '-print_format', 'json',
+        '-show_streams', '-show_format', '-select_streams', 'v:0', input_video
+    ]
+    result = subprocess.run(probe_cmd, capture_output=True, text=True)
+    info = json.loads(result.stdout or "{}")
+
+    streams = info.get('streams') or [{}]
+    stream = streams[0]
+    width = int(stream.get('width', 0))
+    height = int(stream.get('height', 0))
+
+    r_frame_rate = stream.get('r_frame_rate', '30/1')
+    if '/' in r_frame_rate:
+        num, den = r_frame_rate.split('/')
+        fps = str(int(num) / int(den)) if int(den) else "30"
+    else:
+        fps = r_frame_rate
+
+    # 容器未记录帧数时（MKV/WebM 等）按时长×帧率估计，不做 -count_frames 全量解码
+    nb_frames = stream.get('nb_frames', '')
+    if str(nb_frames).isdigit():
+        total_frames = int(nb_frames)
+    else:
+        try:
+            duration = float(stream.get('duration') or info.get('format', {}).get('duration') or 0)
+            total_frames = round(duration * float(fps))
+        except ValueError:
+            total_frames = 0
+    return width, height, fps, total_frames
+
+
+def _read_frame(stream, width: int, height: int) -> Optional["np.ndarray"]:
+    """从 rawvideo rgb24 管道读取一帧，流结束时返回 None"""
+    frame_size = width * height * 3
+    data = stream.read(frame_size)
+    if len(data) < frame_size:
+        return None
+    return np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+
+
+# 每个工作线程复用的批量输入张量
+_scratch = threading.local()
+
+
+def _batch_buffer(n: int) -> "np.ndarray":
+    """当前线程的 (n, 3, 320, 320) float32 输入缓冲区，只在批量变大时重新分配"""
+    buf = getattr(_scratch, "batch", None)
+    if buf is None or buf.shape[0] < n:
+        buf = np.empty((n, 3, U2NET_INPUT_SIZE, U2NET_INPUT_SIZE), np.float32)
+        _scratch.batch = buf
+    return buf[:n]
+
+
+def _on_cuda(session) -> bool:
+    """rembg session 是否运行在 CUDA 执行提供者上"""
+    inner = getattr(session, "inner_session", None)
+    return inner is not None and "CUDAExecutionProvider" in inner.get_providers()
+
+
+def _batch_size(session) -> int:
+    """每次推理的帧数"""
+    return REMBG_GPU_BATCH_SIZE if _on_cuda(session) else REMBG_BATCH_SIZE
+
+
+def _run_inner(session, batch: "np.ndarray") -> "np.ndarray":
+    """执行一次 ONNX 推理；CUDA 上用 IoBinding，整批只做一次主机→显存拷贝"""
+    inner = session.inner_session
+    input_name = inner.get_inputs()[0].name
+    if not _on_cuda(session):
+        return inner.run(None, {input_name: batch})[0]
+    binding = inner.io_binding()
+    binding.bind_ortvalue_input(input_name, ort.OrtValue.ortvalue_from_numpy(
+        np.ascontiguousarray(batch), "cuda", CUDA_PROVIDER_OPTIONS["device_id"]))
+    binding.bind_output(inner.get_outputs()[0].name, "cpu")
+    inner.run_with_iobinding(binding)
+    return binding.copy_outputs_to_cpu()[0]
+
+
+def _u2net_masks(frames: List["np.ndarray"], session, model: str) -> List["np.ndarray"]:
+    """U2Net 系列: 整批归一化后一次 session.run，返回每帧原尺寸的 alpha (HxW uint8)"""
+    size = U2NET_INPUT_SIZE
+    batch = _batch_buffer(len(frames))
+    inv_std = 1.0 / np.array(U2NET_STD, np.float32)[:, None, None]
+    offset = np.array(U2NET_MEAN, np.float32)[:, None, None] * inv_std
+    for i, frame in enumerate(frames):
+        # (im / max - mean) / std 直接写入批量张量，不产生中间数组
+        im = np.asarray(Image.fromarray(frame).resize((size, size), Image.LANCZOS)).transpose(2, 0, 1)
+        np.multiply(im, inv_std / max(int(im.max()), 1), out=batch[i])
+        batch[i] -= offset
+
+    if model in _SINGLE_BATCH_MODELS:
+        preds = [_run_inner(session, batch[i:i + 1])[0, 0] for i in range(len(frames))]
+    else:
+        try:
+            preds = _run_inner(session, batch)[:, 0]
+        except Exception:
+            _SINGLE_BATCH_MODELS.add(model)
+            return _u2net_masks(frames, session, model)
+
+    masks = []
+    for frame, pred in zip(frames, preds):
+        lo, hi = float(pred.min()), float(pred.max())
+        pred = (pred - lo) / max(hi - lo, 1e-8)
+        mask = Image.fromarray((pred * 255).astype(np.uint8), mode="L")
+        mask = mask.resize((frame.shape[1], frame.shape[0]), Image.LANCZOS)
+        masks.append(np.asarray(mask))
+    return masks
+
+
+def remove_batch(frames: List["np.ndarray"], session, model: str) -> List["np.ndarray"]:
+    """
+    批量计算前景 alpha
+
+    Args:
+        frames: RGB 帧列表 (HxWx3 uint8)
+        session: rembg session
+        model: 模型名（U2Net 系列走批量推理，其余逐帧调用 rembg）
+
+    Returns:
+        每帧的 alpha (HxW uint8)
+    """
+    if model in U2NET_MODELS and hasattr(session, "inner_session"):
+        return _u2net_masks(frames, session, model)
+    return [np.asarray(remove(Image.fromarray(frame), session=session, only_mask=True))
+            for frame in frames]
+
+
+# fast模式光流计算的缩小倍数
+FLOW_DOWNSCALE = 4
+
+
+def _warp_mask(ref: "np.ndarray", frame: "np.ndarray", mask: "np.ndarray") -> "np.ndarray":
+    """用 ref→frame 的稠密光流（1/FLOW_DOWNSCALE 分辨率）把 ref 的 mask 变换到 frame 上"""
+    h, w = mask.shape
+    small = (max(1, w // FLOW_DOWNSCALE), max(1, h // FLOW_DOWNSCALE))
+    ref_gray = cv2.cvtColor(cv2.resize(ref, small, interpolation=cv2.INTER_AREA), cv2.COLOR_RGB2GRAY)
+    cur_gray = cv2.cvtColor(cv2.resize(frame, small, interpolation=cv2.INTER_AREA), cv2.COLOR_RGB2GRAY)
+    # 当前帧每个像素在参考帧中的位置
+    flow = cv2.calcOpticalFlowFarneback(cur_gray, ref_gray, None, 0.5, 3, 15, 3, 5, 1.2, 0)
+    flow = cv2.resize(flow, (w, h), interpolation=cv2.INTER_LINEAR)
+    map_x = flow[..., 0] * (w / small[0]) + np.arange(w, dtype=np.float32)[None, :]
+    map_y = flow[..., 1] * (h / small[1]) + np.arange(h, dtype=np.float32)[:, None]
+    return cv2.remap(mask, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def _remove_group_background(frames: List["np.ndarray"], is_key: List[bool],
+                             session, config: BackgroundConfig) -> List["np.ndarray"]:
+    """
+    对一组 RGB 帧做背景移除，合成到纯色背景上，返回 RGB 帧（出错时返回原帧）
+
+    只对关键帧（组内第一帧总是关键帧）批量推理 mask；其余帧有 cv2 时用光流把
+    前一关键帧的 mask 变换过来再与当前帧合成，否则复用上一帧结果
+    """
+    try:
+        masks = iter(remove_batch([f for f, key in zip(frames, is_key) if key], session, config.model))
+        results = []
+        for frame, key in zip(frames, is_key):
+            if key:
+                ref, mask = frame, next(masks)
+                # 视频合成需要 RGB: 前景按 alpha 合成到背景色上
+                results.append(alpha_blend(frame, mask, config.bg_color))
+            elif CV2_AVAILABLE:
+                results.append(alpha_blend(frame, _warp_mask(ref, frame, mask), config.bg_color))
+            else:
+                results.append(results[-1])
+        return results
+    except Exception as e:
+        print(f"Error processing frames: {e}")
+        return frames
+
+
+# ============================================================
+# 进程池推理（纯 CPU）
+# ============================================================
+
+# 工作进程用 spawn 启动: 主进程此时已有解码/编码管道和读帧线程，fork 会复制
+# 线程持有的锁和管道句柄（子进程可能死锁，编码器 stdin 也不会随主进程关闭而 EOF）
+
+# 工作进程内的 rembg session，由 _worker_init 创建
+_WORKER_SESSION = None
+
+
+def _process_workers() -> int:
+    """进程池大小: 所有进程的推理线程合计约占一半核数"""
+    return max(1, (os.cpu_count() or 2) // (2 * REMBG_PROCESS_THREADS))
+
+
+def _worker_init(model: str):
+    """进程池初始化: 每个工作进程加载一次模型"""
+    global _WORKER_SESSION
+    _WORKER_SESSION = _new_session(model, REMBG_PROCESS_THREADS)
+
+
+def _worker_remove_group(frames: List["np.ndarray"], is_key: List[bool],
+                         config: BackgroundConfig) -> List["np.ndarray"]:
+    """
+    工作进程中执行 _remove_group_background（ndarray 按原始缓冲区序列化）
+
+    每组的全分辨率原帧发送到工作进程、合成后的全分辨率帧再传回主进程，
+    1080p 下每帧往返约 12MB；进程池省下的 GIL 争用需大于这部分拷贝开销
+    """
+    return _remove_group_background(frames, is_key, _WORKER_SESSION, config)
+
+
 def remove_background_video(
     input_video: str,
     output_video: str,
@@ -118,6 +482,8 @@ def remove_background_video(
     """
     移除视频背景并替换
 
+    解码和编码都通过 ffmpeg rawvideo 管道进行，中间帧不落盘
+
     Args:
         input_video: 输入视频路径
         output_video: 输出视频路径
@@ -134,118 +500,37 @@ def remove_background_video(
     if config is None:
         config = BackgroundConfig()
 
-    # 创建临时目录
-    temp_dir = tempfile.mkdtemp(prefix="bg_remove_")
-    frames_dir = os.path.join(temp_dir, "frames")
-    output_frames_dir = os.path.join(temp_dir, "output_frames")
-    os.makedirs(frames_dir)
-    os.makedirs(output_frames_dir)
-
+    decoder = None
+    encoder = None
     try:
-        # 1. 提取视频帧
-        print("Extracting frames...")
-        extract_cmd = [
-            'ffmpeg', '-y', '-i', input_video,
-            '-qscale:v', '2',
-            os.path.join(frames_dir, 'frame_%06d.png')
-        ]
-        subprocess.run(extract_cmd, capture_output=True, check=True)
-
-        # 获取帧列表
-        frames = sorted([f for f in os.listdir(frames_dir) if f.endswith('.png')])
-        total_frames = len(frames)
-        print(f"Total frames: {total_frames}")
-
-        if total_frames == 0:
-            raise ValueError("No frames extracted")
-
-        # 2. 创建 rembg session
-        session = new_session(config.model)
-
-        # 3. 处理每一帧
-        print("Processing frames...")
-
-        def process_frame(frame_info):
-            idx, frame_name = frame_info
-            input_frame = os.path.join(frames_dir, frame_name)
-            output_frame = os.path.join(output_frames_dir, frame_name)
-
-            # fast模式下跳帧处理
-            if config.quality == "fast" and idx > 0 and idx % config.frame_skip != 0:
-                # 复用上一个处理过的帧
-                prev_idx = (idx // config.frame_skip) * config.frame_skip
-                prev_frame = f"frame_{prev_idx+1:06d}.png"
-                prev_path = os.path.join(output_frames_dir, prev_frame)
-                if os.path.exists(prev_path):
-                    shutil.copy(prev_path, output_frame)
-                    return True
-
-            try:
-                input_img = Image.open(input_frame)
-                output_img = remove(input_img, session=session)
-
-                # 应用背景
-                if config.bg_type == "color":
-                    bg = Image.new("RGBA", output_img.size, (*config.bg_color, 255))
-                    result = Image.alpha_composite(bg, output_img)
-                elif config.bg_type == "transparent":
-                    result = output_img
-                else:
-                    result = output_img
-
-                # 转为 RGB 保存 (PNG支持RGBA但视频合成需要RGB)
-                if result.mode == "RGBA":
-                    rgb_result = Image.new("RGB", result.size, config.bg_color)
-                    rgb_result.paste(result, mask=result.split()[3])
-                    result = rgb_result
-
-                result.save(output_frame)
-                return True
-            except Exception as e:
-                print(f"Error processing {frame_name}: {e}")
-                # 出错时复制原帧
-                shutil.copy(input_frame, output_frame)
-                return False
-
-        # 使用多线程处理
-        processed = 0
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = {executor.submit(process_frame, (i, f)): f
-                      for i, f in enumerate(frames)}
-
-            for future in as_completed(futures):
-                processed += 1
-                if progress_callback:
-                    progress_callback(processed, total_frames)
-                elif processed % 50 == 0:
-                    print(f"Progress: {processed}/{total_frames}")
-
-        # 4. 获取原视频信息
-        probe_cmd = [
-            'ffprobe', '-v', 'quiet', '-print_format', 'json',
-            '-show_streams', input_video
+        # 1. 获取原视频信息
+        width, height, fps, total_frames = _probe_video(input_video)
+        if width <= 0 or height <= 0:
+            raise ValueError("No video stream")
+        print(f"Video: {width}x{height} @ {fps}fps")
+
+        # 2. CUDA 可用时线程池共享缓存的 session；纯 CPU 时每个工作进程各自加载模型
+        use_processes = REMBG_USE_PROCESSES and not _cuda_available()
+        if use_processes:
+            executor = ProcessPoolExecutor(max_workers=_process_workers(),
+                                           mp_context=multiprocessing.get_context("spawn"),
+                                           initializer=_worker_init, initargs=(config.model,))
+            batch_size = REMBG_BATCH_SIZE
+        else:
+            session = _get_session(config.model)
+            executor = ThreadPoolExecutor(max_workers=REMBG_WORKERS)
+            batch_size = _batch_size(session)
+
+        # 3. 打开解码/编码管道
+        decode_cmd = [
+            'ffmpeg', '-v', 'error', *DECODE_HWACCEL_ARGS, '-i', input_video,
+            '-map', '0:v:0', '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'
         ]
-        result = subprocess.run(probe_cmd, capture_output=True, text=True)
-        import json
-        info = json.loads(result.stdout)
-
-        fps = "30"
-        for stream in info.get('streams', []):
-            if stream.get('codec_type') == 'video':
-                r_frame_rate = stream.get('r_frame_rate', '30/1')
-                if '/' in r_frame_rate:
-                    num, den = r_frame_rate.split('/')
-                    fps = str(int(num) / int(den))
-                else:
-                    fps = r_frame_rate
-                break
-
-        # 5. 合成视频
-        print("Encoding video...")
         encode_cmd = [
-            'ffmpeg', '-y',
-            '-framerate', fps,
-            '-i', os.path.join(output_frames_dir, 'frame_%06d.png'),
+            'ffmpeg', '-y', '-v', 'error',
+            '-f', 'rawvideo', '-pixel_format', 'rgb24',
+            '-video_size', f'{width}x{height}', '-framerate', fps,
+            '-i', '-',
             '-i', input_video,
             '-map', '0:v', '-map', '1:a?',
             '-c:v', 'libx264', '-preset', 'fast', '-crf', '23',
@@ -253,7 +538,87 @@ def remove_background_video(
             '-pix_fmt', 'yuv420p',
             output_video
         ]
-        subprocess.run(encode_cmd, capture_output=True, check=True)
+        decoder = subprocess.Popen(decode_cmd, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, bufsize=PIPE_BUFFER_SIZE)
+        encoder = subprocess.Popen(encode_cmd, stdin=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, bufsize=PIPE_BUFFER_SIZE)
+
+        # 4. 流水线: 解码线程读帧并提交 rembg，主线程按顺序取结果写入编码器
+        print("Processing frames...")
+        skip = config.frame_skip if config.quality == "fast" and config.frame_skip > 1 else 1
+        frame_queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    frame_queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def produce():
+            # fast模式下每 skip 帧推理一次 mask；帧按组提交，每组以关键帧开头、
+            # 含一批（_batch_size）关键帧及其后的跳过帧，入队 (future, 组内序号)
+            try:
+                index = 0
+                group, is_key = [], []
+                while not stop.is_set():
+                    frame = _read_frame(decoder.stdout, width, height)
+                    if frame is None:
+                        break
+                    key = index % skip == 0
+                    if key and sum(is_key) == batch_size:
+                        flush(group, is_key)
+                        group, is_key = [], []
+                    group.append(frame)
+                    is_key.append(key)
+                    index += 1
+                if group:
+                    flush(group, is_key)
+            finally:
+                put(_END_OF_FRAMES)
+
+        def flush(group, is_key):
+            if use_processes:
+                future = executor.submit(_worker_remove_group, group, is_key, config)
+            else:
+                future = executor.submit(_remove_group_background, group, is_key, session, config)
+            for slot in range(len(group)):
+                put((future, slot))
+
+        processed = 0
+        with executor:
+            producer = threading.Thread(target=produce, daemon=True)
+            producer.start()
+            try:
+                while True:
+                    item = frame_queue.get()
+                    if item is _END_OF_FRAMES:
+                        break
+                    future, slot = item
+                    encoder.stdin.write(future.result()[slot].tobytes())
+                    processed += 1
+                    if progress_callback:
+                        progress_callback(processed, max(total_frames, processed))
+                    elif processed % 50 == 0:
+                        print(f"Progress: {processed}/{total_frames or '?'}")
+            finally:
+                stop.set()
+                if producer.is_alive():
+                    # 提前退出（编码失败等）时结束解码，避免读帧阻塞
+                    decoder.kill()
+                producer.join()
+
+        if processed == 0:
+            raise ValueError("No frames decoded")
+
+        # 5. 结束编码
+        print("Encoding video...")
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            raise RuntimeError(f"ffmpeg encode failed ({encoder.returncode})")
+        decoder.wait()
 
         print("Done!")
         return os.path.exists(output_video)
@@ -263,8 +628,10 @@ def remove_background_video(
         return False
 
     finally:
-        # 清理临时文件
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        for proc in (decoder, encoder):
+            if proc is not None and proc.poll() is None:
+                proc.kill()
+                proc.wait()
 
 
 def remove_background_video_fast(
@@ -9,17 +9,61 @@ VideoMixer - 平衡去重处理器
 """
 
 import os
-import subprocess
+import sys
 import random
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Callable, Dict, Optional, List
 
 from .video_classifier_v2 import analyze_video_v2
 from .asset_dedup import (
-    list_assets, OverlayPosition, calculate_position,
-    get_random_timestamps
+    list_assets, OverlayPosition, calculate_position, alpha_filter,
+    get_random_timestamps, FILTER_SCRIPT_THRESHOLD,
+    write_filter_script, remove_filter_script
 )
+from .compat import DATACLASS_SLOTS
+from .ffmpeg_utils import run_ffmpeg
+
+
+# 叠加滤镜模板: 每个叠加项一次 format_map 生成（{ov.*} 取 Overlay 预先算好的字段）
+STATIC_OVERLAY_TMPL = (
+    "movie='{path}',scale={ov.sw}:-1,format=rgba{ov.alpha}[stk{i}];"
+    "{src}[stk{i}]overlay={ov.x}:{ov.y}:enable='{ov.enable}'{out}"
+)
+DYNAMIC_OVERLAY_TMPL = (
+    "[{idx}:v]{ov.scale},format=rgba{ov.alpha}[dyn{i}];"
+    "{src}[dyn{i}]overlay={ov.x}:{ov.y}:enable='{ov.enable}':shortest=1{out}"
+)
+
+
+@dataclass(**DATACLASS_SLOTS)
+class Overlay:
+    """叠加项（滤镜参数在构造时算好）"""
+    path: Path
+    kind: str           # static/gif/video
+    x: str
+    y: str
+    sw: int             # 缩放后宽度
+    scale: str          # 缩放滤镜
+    start: float
+    end: float
+    enable: str         # enable 表达式
+    alpha: str          # 不透明度滤镜片段（不透明时为空）
+
+
+def _make_overlay(path: Path, kind: str, x: str, y: str, scale: float,
+                  start: float, duration: float, width: int, height: int,
+                  opacity: float = 1.0) -> Overlay:
+    """创建叠加项；scale<1 时按宽度等比缩放，否则铺满画面"""
+    sw = int(width * scale)
+    end = start + duration
+    return Overlay(
+        path=path, kind=kind, x=x, y=y, sw=sw,
+        scale=f"scale={sw}:-1" if scale < 1.0 else f"scale={width}:{height}",
+        start=start, end=end,
+        enable=f"between(t,{start:.2f},{end:.2f})",
+        alpha=f",{alpha_filter(opacity)}" if opacity < 1.0 else "",
+    )
 
 
 @dataclass
@@ -41,14 +85,42 @@ def get_specific_asset(category: str, name_contains: str) -> Optional[Path]:
     return None
 
 
+# 固定角落贴纸: 缓存键 -> 文件名关键字
+FIXED_STICKERS = ("coffee", "strawberry", "orange_star", "top_bar")
+
+
+def load_balanced_assets() -> Dict[str, object]:
+    """
+    扫描一次平衡去重用到的全部素材
+
+    批量生成多个版本时只需调用一次，结果通过 asset_cache 传给 process_balanced_dedup
+
+    Returns:
+        {固定贴纸名: 路径或None, "floating": 浮动贴纸列表, "gifs": GIF列表, "particles": 粒子视频列表}
+    """
+    cache: Dict[str, object] = {name: get_specific_asset("stickers", name) for name in FIXED_STICKERS}
+    cache["floating"] = [a for a in list_assets("stickers", [".png"])
+                         if "floating" in a.name.lower() or "corner" in a.name.lower()]
+    cache["gifs"] = list_assets("animated", [".gif"])
+    cache["particles"] = list_assets("particles", [".mp4", ".mov"])
+    return cache
+
+
 def process_balanced_dedup(
     input_path: str,
     output_path: str,
     version: int = 1,
-    verbose: bool = True
+    verbose: bool = True,
+    progress_callback: Optional[Callable[[float, float], None]] = None,
+    *,
+    asset_cache: Optional[Dict[str, object]] = None
 ) -> BalancedDedupResult:
     """
     平衡去重处理 - 保持画面清晰
+
+    Args:
+        progress_callback: 编码进度回调 (已处理秒数, 视频总时长)
+        asset_cache: load_balanced_assets() 的结果，省略时现场扫描素材目录
     """
     result = BalancedDedupResult(input_path=input_path, output_path=output_path)
 
@@ -78,65 +150,44 @@ def process_balanced_dedup(
         if verbose:
             print("[2/4] 准备素材...")
 
+        assets = asset_cache if asset_cache is not None else load_balanced_assets()
         overlays = []
 
         # ======== 固定角落贴纸（小尺寸）========
         # 左下角: 咖啡杯
-        coffee = get_specific_asset("stickers", "coffee")
+        coffee = assets["coffee"]
         if coffee:
-            overlays.append({
-                "path": coffee,
-                "x": "20",
-                "y": str(height - 120),
-                "scale": 0.12,
-                "start": 0,
-                "duration": duration,
-                "type": "static"
-            })
+            overlays.append(_make_overlay(
+                coffee, "static", x="20", y=str(height - 120), scale=0.12,
+                start=0, duration=duration, width=width, height=height
+            ))
 
         # 右下角: 草莓
-        strawberry = get_specific_asset("stickers", "strawberry")
+        strawberry = assets["strawberry"]
         if strawberry:
-            overlays.append({
-                "path": strawberry,
-                "x": str(width - 80),
-                "y": str(height - 130),
-                "scale": 0.10,
-                "start": 0,
-                "duration": duration,
-                "type": "static"
-            })
+            overlays.append(_make_overlay(
+                strawberry, "static", x=str(width - 80), y=str(height - 130), scale=0.10,
+                start=0, duration=duration, width=width, height=height
+            ))
 
         # ======== 右侧小星星 ========
-        orange_star = get_specific_asset("stickers", "orange_star")
+        orange_star = assets["orange_star"]
         if orange_star:
-            overlays.append({
-                "path": orange_star,
-                "x": str(width - 70),
-                "y": str(int(height * 0.35)),
-                "scale": 0.08,
-                "start": 0,
-                "duration": duration,
-                "type": "static"
-            })
+            overlays.append(_make_overlay(
+                orange_star, "static", x=str(width - 70), y=str(int(height * 0.35)), scale=0.08,
+                start=0, duration=duration, width=width, height=height
+            ))
 
         # ======== 顶部小装饰（不要太大）========
-        top_bar = get_specific_asset("stickers", "top_bar")
+        top_bar = assets["top_bar"]
         if top_bar:
-            overlays.append({
-                "path": top_bar,
-                "x": "(W-w)/2",
-                "y": "0",
-                "scale": 0.9,
-                "start": 0,
-                "duration": duration,
-                "type": "static",
-                "opacity": 0.85
-            })
+            overlays.append(_make_overlay(
+                top_bar, "static", x="(W-w)/2", y="0", scale=0.9,
+                start=0, duration=duration, width=width, height=height, opacity=0.85
+            ))
 
         # ======== 随机浮动贴纸（小尺寸，角落位置）========
-        floating_stickers = [a for a in list_assets("stickers", [".png"])
-                           if "floating" in a.name.lower() or "corner" in a.name.lower()]
+        floating_stickers = assets["floating"]
         if floating_stickers:
             # 每个版本选择不同的贴纸
             random.seed(version * 12345)
@@ -154,18 +205,13 @@ def process_balanced_dedup(
                 show_duration = random.uniform(15, 30)
 
                 if start_time + show_duration < duration:
-                    overlays.append({
-                        "path": sticker,
-                        "x": str(pos[0]),
-                        "y": str(pos[1]),
-                        "scale": random.uniform(0.08, 0.12),
-                        "start": start_time,
-                        "duration": show_duration,
-                        "type": "static"
-                    })
+                    overlays.append(_make_overlay(
+                        sticker, "static", x=str(pos[0]), y=str(pos[1]), scale=random.uniform(0.08, 0.12),
+                        start=start_time, duration=show_duration, width=width, height=height
+                    ))
 
         # ======== 动态GIF（小尺寸，角落）========
-        gifs = list_assets("animated", [".gif"])
+        gifs = assets["gifs"]
         if gifs:
             random.seed(version * 54321)
             selected_gif = random.choice(gifs)
@@ -173,34 +219,23 @@ def process_balanced_dedup(
             # 在视频中段出现一次
             gif_start = random.uniform(duration * 0.3, duration * 0.6)
 
-            overlays.append({
-                "path": selected_gif,
-                "x": str(width - 100),
-                "y": "100",
-                "scale": 0.12,
-                "start": gif_start,
-                "duration": min(8.0, duration - gif_start - 5),
-                "type": "gif"
-            })
+            overlays.append(_make_overlay(
+                selected_gif, "gif", x=str(width - 100), y="100", scale=0.12,
+                start=gif_start, duration=min(8.0, duration - gif_start - 5), width=width, height=height
+            ))
 
         # ======== 粒子效果（低透明度）========
-        particles = list_assets("particles", [".mp4", ".mov"])
+        particles = assets["particles"]
         if particles:
             random.seed(version * 11111)
             selected_particle = random.choice(particles)
 
             particle_start = random.uniform(duration * 0.4, duration * 0.7)
 
-            overlays.append({
-                "path": selected_particle,
-                "x": "0",
-                "y": "0",
-                "scale": 1.0,
-                "start": particle_start,
-                "duration": min(6.0, duration - particle_start - 3),
-                "type": "video",
-                "opacity": 0.35  # 低透明度
-            })
+            overlays.append(_make_overlay(
+                selected_particle, "video", x="0", y="0", scale=1.0,
+                start=particle_start, duration=min(6.0, duration - particle_start - 3), width=width, height=height, opacity=0.35
+            ))
 
         result.overlays_count = len(overlays)
 
@@ -212,87 +247,57 @@ def process_balanced_dedup(
             print("[3/4] 构建滤镜...")
 
         # 分离素材类型
-        static_overlays = [o for o in overlays if o["type"] == "static"]
-        gif_overlays = [o for o in overlays if o["type"] == "gif"]
-        video_overlays = [o for o in overlays if o["type"] == "video"]
+        static_overlays = [o for o in overlays if o.kind == "static"]
+        gif_overlays = [o for o in overlays if o.kind == "gif"]
+        video_overlays = [o for o in overlays if o.kind == "video"]
         dynamic_overlays = gif_overlays + video_overlays
 
         cmd = ['ffmpeg', '-y', '-i', input_path]
 
         # 添加动态素材输入
         for ov in dynamic_overlays:
-            if ov["type"] == "video":
-                cmd.extend(['-stream_loop', '-1', '-i', str(ov["path"])])
+            if ov.kind == "video":
+                cmd.extend(['-stream_loop', '-1', '-i', str(ov.path)])
             else:
-                cmd.extend(['-ignore_loop', '0', '-i', str(ov["path"])])
+                cmd.extend(['-ignore_loop', '0', '-i', str(ov.path)])
 
-        # 构建filter_complex
+        # 构建filter_complex（不添加任何颜色滤镜，保持原始画面）
+        # 先静态后动态依次叠加，最后一个叠加输出 [vout]
         filter_parts = []
         current_stream = "[0:v]"
-
-        # 不添加任何颜色滤镜，保持原始画面
+        total = len(static_overlays) + len(dynamic_overlays)
 
         # 叠加静态素材
         for i, ov in enumerate(static_overlays):
-            asset_path = str(ov["path"]).replace("'", "'\\''").replace(":", "\\:")
-            scaled_width = int(width * ov["scale"])
-
-            x_expr = ov["x"]
-            y_expr = ov["y"]
-            end_time = ov["start"] + ov["duration"]
-            opacity = ov.get("opacity", 1.0)
-
-            # movie滤镜链
-            movie_chain = f"movie='{asset_path}',scale={scaled_width}:-1,format=rgba"
-            if opacity < 1.0:
-                movie_chain += f",colorchannelmixer=aa={opacity}"
-
-            out_label = f"[vs{i}]"
-            filter_parts.append(
-                f"{movie_chain}[stk{i}];"
-                f"{current_stream}[stk{i}]overlay={x_expr}:{y_expr}"
-                f":enable='between(t,{ov['start']:.2f},{end_time:.2f})'{out_label}"
-            )
+            out_label = "[vout]" if i == total - 1 else f"[vs{i}]"
+            filter_parts.append(STATIC_OVERLAY_TMPL.format_map({
+                "ov": ov,
+                "path": str(ov.path).replace("'", "'\\''").replace(":", "\\:"),
+                "i": i,
+                "src": current_stream,
+                "out": out_label,
+            }))
             current_stream = out_label
 
         # 叠加动态素材
         for i, ov in enumerate(dynamic_overlays):
-            input_idx = i + 1
-
-            if ov["scale"] < 1.0:
-                scaled_width = int(width * ov["scale"])
-                scale_filter = f"[{input_idx}:v]scale={scaled_width}:-1,format=rgba"
-            else:
-                scale_filter = f"[{input_idx}:v]scale={width}:{height},format=rgba"
-
-            opacity = ov.get("opacity", 1.0)
-            if opacity < 1.0:
-                scale_filter += f",colorchannelmixer=aa={opacity}"
-
-            proc_label = f"[dyn{i}]"
-            filter_parts.append(f"{scale_filter}{proc_label}")
-
-            end_time = ov["start"] + ov["duration"]
-            is_last = (i == len(dynamic_overlays) - 1)
-            out_label = "[vout]" if is_last else f"[vd{i}]"
-
-            filter_parts.append(
-                f"{current_stream}{proc_label}overlay={ov['x']}:{ov['y']}"
-                f":enable='between(t,{ov['start']:.2f},{end_time:.2f})'"
-                f":shortest=1{out_label}"
-            )
+            out_label = "[vout]" if len(static_overlays) + i == total - 1 else f"[vd{i}]"
+            filter_parts.append(DYNAMIC_OVERLAY_TMPL.format_map({
+                "ov": ov,
+                "idx": i + 1,
+                "i": i,
+                "src": current_stream,
+                "out": out_label,
+            }))
             current_stream = out_label
 
-        # 如果没有动态素材，修正最终输出
-        if not dynamic_overlays and filter_parts:
-            last = filter_parts[-1]
-            import re
-            last = re.sub(r'\[vs\d+\]$', '[vout]', last)
-            filter_parts[-1] = last
-
         if filter_parts:
             filter_complex = ";".join(filter_parts)
-            cmd.extend(['-filter_complex', filter_complex])
+            if len(filter_complex) > FILTER_SCRIPT_THRESHOLD:
+                # 滤镜图过大时写入脚本文件，避免命令行超过 ARG_MAX
+                cmd.extend(['-filter_complex_script', write_filter_script(filter_complex)])
+            else:
+                cmd.extend(['-filter_complex', filter_complex])
             cmd.extend(['-map', '[vout]', '-map', '0:a?'])
 
         cmd.extend([
@@ -308,15 +313,18 @@ def process_balanced_dedup(
         if verbose:
             print("[4/4] 处理视频...")
 
-        process = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=1800
-        )
+        on_progress = None
+        if progress_callback:
+            def on_progress(seconds: float):
+                progress_callback(min(seconds, duration), duration)
+
+        try:
+            returncode, stderr_tail = run_ffmpeg(cmd, timeout=1800, progress_callback=on_progress)
+        finally:
+            remove_filter_script(cmd)
 
-        if process.returncode != 0:
-            result.error_message = process.stderr[-800:] if process.stderr else "未知错误"
+        if returncode != 0:
+            result.error_message = stderr_tail[-800:] if stderr_tail else "未知错误"
             if verbose:
                 print(f"处理失败: {result.error_message}")
             return result
@@ -353,11 +361,13 @@ def batch_balanced_dedup(
     input_name = Path(input_path).stem
 
     print(f"\n生成 {count} 个去重版本...")
+    asset_cache = load_balanced_assets()
 
     for i in range(1, count + 1):
         print(f"\n>>> 版本 {i}/{count}")
         output_path = os.path.join(output_dir, f"{input_name}_dedup_v{i}.mp4")
-        result = process_balanced_dedup(input_path, output_path, version=i, verbose=verbose)
+        result = process_balanced_dedup(input_path, output_path, version=i, verbose=verbose,
+                                        asset_cache=asset_cache)
         results.append(result)
 
     success_count = sum(1 for r in results if r.success)
@@ -0,0 +1,11 @@
+"""
+VideoMixer - Python 版本兼容
+各模块共用的按解释器版本启用的特性
+"""
+
+import sys
+
+
+# Python 3.10+ 的 dataclass 使用 __slots__，省去每个实例的 __dict__
+# 用法: @dataclass(**DATACLASS_SLOTS)
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
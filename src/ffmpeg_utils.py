@@ -0,0 +1,300 @@
+"""
+VideoMixer - ffmpeg 能力探测与进程执行
+各处理器共用的能力探测，以及 Popen + stderr 末尾缓冲 + 超时 + 进度回调
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+import functools
+import subprocess
+import collections
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# ============================================================
+# ffmpeg 能力探测
+# ============================================================
+
+# 探测结果按 ffmpeg -version 的哈希缓存到磁盘，后续进程省去 -filters/-hwaccels/-encoders 三次调用
+FFMPEG_CAPS_CACHE = Path.home() / ".cache" / "videomixer" / "ffmpeg_caps.json"
+
+
+def _probe_ffmpeg(flag: str) -> str:
+    """ffmpeg -hwaccels / -filters 等列表输出，失败时返回空字符串"""
+    try:
+        r = subprocess.run(['ffmpeg', '-hide_banner', flag],
+                           capture_output=True, text=True, timeout=5)
+        return r.stdout or ""
+    except Exception:
+        return ""
+
+
+def _list_names(output: str) -> List[str]:
+    """-filters/-encoders 输出每行第二列是名称"""
+    return [parts[1] for parts in (line.split() for line in output.splitlines()) if len(parts) > 1]
+
+
+@functools.lru_cache(maxsize=1)
+def ffmpeg_caps() -> SimpleNamespace:
+    """
+    ffmpeg 支持的滤镜、硬件解码和编码器（每个进程只探测一次）
+
+    各模块的能力判断（模糊滤镜、硬件编解码、rubberband 等）都使用这一份结果；
+    ffmpeg 不可用时各集合为空
+    """
+    version = _probe_ffmpeg('-version')
+    key = hashlib.sha1(version.encode()).hexdigest() if version else ""
+
+    if key:
+        try:
+            with open(FFMPEG_CAPS_CACHE, encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("version") == key:
+                return SimpleNamespace(filters=set(cached["filters"]),
+                                       hwaccels=set(cached["hwaccels"]),
+                                       encoders=set(cached["encoders"]))
+        except (OSError, ValueError, KeyError):
+            pass
+
+    hwaccels = _probe_ffmpeg('-hwaccels').splitlines()[1:]
+    caps = SimpleNamespace(
+        filters=set(_list_names(_probe_ffmpeg('-filters'))),
+        hwaccels={line.strip() for line in hwaccels if line.strip()},
+        encoders=set(_list_names(_probe_ffmpeg('-encoders'))),
+    )
+
+    if key and caps.filters:
+        try:
+            FFMPEG_CAPS_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{FFMPEG_CAPS_CACHE}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": key, "filters": sorted(caps.filters),
+                           "hwaccels": sorted(caps.hwaccels),
+                           "encoders": sorted(caps.encoders)}, f)
+            os.replace(tmp_path, FFMPEG_CAPS_CACHE)
+        except OSError:
+            pass
+    return caps
+
+
+# ============================================================
+# 硬件编码器
+# ============================================================
+
+# 硬件编码器（所有处理器共用）: 名称 -> (ffmpeg编码器, 输入前参数, 滤镜尾部, 编码参数)
+# 编码参数中的 {q} 由 hw_encoder_args 替换为质量值（大致对应 libx264 crf）
+# 解码在GPU上进行；滤镜仍在CPU上执行，帧下载到内存处理后由编码器上传，
+# vaapi 需在滤镜末尾显式上传到GPU（滤镜尾部不带前导逗号，由调用方拼接）
+HW_ENCODERS: Dict[str, Tuple[str, List[str], str, List[str]]] = {
+    "nvenc": ("h264_nvenc", ['-hwaccel', 'cuda'], "",
+              ['-c:v', 'h264_nvenc', '-preset', 'p4', '-tune', 'hq',
+               '-rc', 'vbr', '-cq', '{q}', '-b:v', '0']),
+    "qsv": ("h264_qsv", ['-hwaccel', 'qsv'], "",
+            ['-c:v', 'h264_qsv', '-global_quality', '{q}', '-preset', 'veryfast']),
+    "vaapi": ("h264_vaapi",
+              ['-init_hw_device', 'vaapi=va:/dev/dri/renderD128', '-filter_hw_device', 'va',
+               '-hwaccel', 'vaapi', '-hwaccel_device', 'va'],
+              "format=nv12,hwupload",
+              ['-c:v', 'h264_vaapi', '-qp', '{q}']),
+    "videotoolbox": ("h264_videotoolbox", [], "",
+                     ['-c:v', 'h264_videotoolbox', '-b:v', '4000k', '-profile:v', 'high']),
+}
+
+
+def hw_encoder_args(name: str, quality: int) -> Tuple[List[str], str, List[str]]:
+    """
+    硬件编码器的 (输入前参数, 滤镜尾部, 编码参数)
+
+    Args:
+        name: resolve_hw_encoder 返回的名称
+        quality: 质量值，大致对应 libx264 crf（videotoolbox 按码率编码，忽略）
+    """
+    _, input_args, filter_tail, encode_args = HW_ENCODERS[name]
+    return input_args, filter_tail, [arg.format(q=quality) for arg in encode_args]
+
+
+# auto 模式下的检测顺序
+HW_ENCODER_PRIORITY = ("nvenc", "qsv", "vaapi", "videotoolbox")
+
+
+# 编译进 ffmpeg 不代表有可用设备（常见发行版同时带 nvenc/qsv/vaapi）；
+# 本进程内试编码或实际编码失败过的编码器之后不再选用
+_failed_hw_encoders = set()
+
+
+@functools.lru_cache(maxsize=None)
+def _trial_encode(name: str) -> bool:
+    """用一帧空白画面试编码，确认设备和驱动可用（每个进程每个编码器只试一次）"""
+    input_args, filter_tail, encode_args = hw_encoder_args(name, 23)
+    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error', *input_args,
+           '-f', 'lavfi', '-i', 'nullsrc=s=256x256', '-frames:v', '1',
+           '-vf', filter_tail or 'format=yuv420p', *encode_args, '-f', 'null', '-']
+    try:
+        r = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           stdin=subprocess.DEVNULL, timeout=15)
+        return r.returncode == 0
+    except Exception:
+        return False
+
+
+def hw_encoder_works(name: str) -> bool:
+    """硬件编码器是否可用：ffmpeg 编译了该编码器、试编码成功且本进程内没有失败过"""
+    if name not in HW_ENCODERS or name in _failed_hw_encoders:
+        return False
+    return HW_ENCODERS[name][0] in ffmpeg_caps().encoders and _trial_encode(name)
+
+
+def mark_hw_encoder_failed(name: str) -> None:
+    """记录硬件编码器实际编码失败（软件编码重试成功时调用），本进程之后不再选用"""
+    if name:
+        _failed_hw_encoders.add(name)
+
+
+def resolve_hw_encoder(name: str) -> str:
+    """
+    解析可用的硬件编码器
+
+    Args:
+        name: auto/nvenc/qsv/vaapi/videotoolbox/none
+
+    Returns:
+        HW_ENCODERS 中的名称，不可用时返回空字符串（使用 libx264）
+    """
+    if not name or name == "none":
+        return ""
+    candidates = HW_ENCODER_PRIORITY if name == "auto" else (name,)
+    for candidate in candidates:
+        if hw_encoder_works(candidate):
+            return candidate
+    return ""
+
+
+# ============================================================
+# ffmpeg 执行
+# ============================================================
+
+# 失败时保留的 stderr 行数（默认值，调用方可按需缩短）
+STDERR_TAIL_LINES = 100
+
+# 异步读取 stderr 的块大小和行分隔（进度行以 \r 结尾）
+STDERR_READ_SIZE = 65536
+_LINE_BREAK = re.compile(rb"\r\n|\r|\n")
+
+# ffmpeg 进度行中的已处理时间
+_PROGRESS_TIME = re.compile(r"time=(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def progress_seconds(line: str) -> Optional[float]:
+    """解析进度行中 time= 的已处理秒数，不是进度行时返回 None"""
+    match = _PROGRESS_TIME.search(line)
+    if match is None:
+        return None
+    h, m, sec = match.groups()
+    return int(h) * 3600 + int(m) * 60 + float(sec)
+
+
+def run_ffmpeg(
+    cmd: List[str],
+    timeout: float = 1200,
+    progress_callback: Optional[Callable[[float], None]] = None,
+    tail_lines: int = STDERR_TAIL_LINES
+) -> Tuple[int, str]:
+    """
+    执行ffmpeg命令，逐行读取stderr，只保留最后 tail_lines 行
+
+    内存占用与输出量无关，也不会因管道缓冲区写满而阻塞；
+    -loglevel 较高时 ffmpeg 可能长时间没有输出，用定时器强制超时
+
+    Args:
+        cmd: ffmpeg 命令
+        timeout: 超时秒数，超时后结束进程并抛出 subprocess.TimeoutExpired
+        progress_callback: 每个进度行回调已处理秒数
+        tail_lines: 保留的 stderr 行数
+
+    Returns:
+        (返回码, stderr末尾内容)
+    """
+    # 进度行以 \r 结尾，文本模式下同样按行拆分
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            text=True, errors='replace')
+    timed_out = threading.Event()
+
+    def _kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, _kill)
+    timer.start()
+    tail = collections.deque(maxlen=tail_lines)
+    try:
+        for line in proc.stderr:
+            tail.append(line)
+            if progress_callback:
+                seconds = progress_seconds(line)
+                if seconds is not None:
+                    progress_callback(seconds)
+        returncode = proc.wait()
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        timer.cancel()
+        proc.stderr.close()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return returncode, "".join(tail)
+
+
+async def run_ffmpeg_async(
+    cmd: List[str],
+    timeout: float = 1200,
+    tail_lines: int = STDERR_TAIL_LINES
+) -> Tuple[int, str]:
+    """
+    run_ffmpeg 的异步版本（一个事件循环同时管理多个ffmpeg进程）
+
+    超时后结束进程并抛出 subprocess.TimeoutExpired
+
+    Returns:
+        (返回码, stderr末尾内容)
+    """
+    import asyncio  # 只有异步接口需要，同步调用方（命令行入口等）不必导入
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    tail = collections.deque(maxlen=tail_lines)
+
+    async def _drain() -> int:
+        # 按块读取：进度行以 \r 结尾，按 \n 读行时整个进度输出会成为一行，
+        # 超过 StreamReader 的行长度上限（64KB）就会出错
+        pending = b""
+        while True:
+            chunk = await proc.stderr.read(STDERR_READ_SIZE)
+            if not chunk:
+                break
+            lines = _LINE_BREAK.split(pending + chunk)
+            pending = lines.pop()
+            tail.extend(line for line in lines if line)
+        if pending:
+            tail.append(pending)
+        return await proc.wait()
+
+    try:
+        returncode = await asyncio.wait_for(_drain(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    return returncode, b"\n".join(tail).decode(errors='replace')
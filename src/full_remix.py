@@ -56,6 +56,9 @@ class FullRemixConfig:
     # 输出质量
     crf: int = 23
 
+    # 中间文件目录（空则使用系统临时目录，可设为 /dev/shm 使用内存盘）
+    temp_dir: str = ""
+
 
 def full_remix(
     input_video: str,
@@ -84,7 +87,7 @@ def full_remix(
         config = FullRemixConfig()
 
     # 创建临时目录
-    temp_dir = tempfile.mkdtemp(prefix="full_remix_")
+    temp_dir = tempfile.mkdtemp(prefix="full_remix_", dir=config.temp_dir or None)
 
     try:
         current_video = input_video
@@ -216,62 +216,24 @@ def build_resolution_filter(config: DedupConfig, width: int, height: int) -> str
     return f"scale={small_w}:{small_h},scale={width}:{height}"
 
 
-def apply_dedup(
-    input_path: str,
-    output_path: Optional[str] = None,
-    config: Optional[DedupConfig] = None,
-    verbose: bool = True
-) -> dict:
+def build_dedup_filter_chain(config: DedupConfig, info: dict) -> Tuple[str, str, int, List[str]]:
     """
-    应用视频去重处理
+    构建去重滤镜链
 
     Args:
-        input_path: 输入视频路径
-        output_path: 输出路径
         config: 去重配置
-        verbose: 是否输出详情
+        info: 视频信息 (get_video_info 的返回值)
 
     Returns:
-        处理结果字典
+        (视频滤镜链, 音频滤镜链, 目标帧率, 应用的技术列表)
     """
-    result = {
-        "success": False,
-        "input": input_path,
-        "output": "",
-        "error": "",
-        "applied": []
-    }
-
-    if not os.path.exists(input_path):
-        result["error"] = "文件不存在"
-        return result
-
-    if config is None:
-        config = DedupConfig()
-
-    if output_path is None:
-        p = Path(input_path)
-        output_path = str(p.parent / f"{p.stem}_dedup.mp4")
-    result["output"] = output_path
-
-    # 获取视频信息
-    info = get_video_info(input_path)
     width, height = info['width'], info['height']
     duration = info['duration']
     fps = info['fps']
 
-    if verbose:
-        print(f"\n{'='*60}")
-        print(f"视频去重处理 (强度: {config.level.value})")
-        print(f"{'='*60}")
-        print(f"输入: {Path(input_path).name}")
-        print(f"分辨率: {width}x{height}")
-        print(f"时长: {duration:.1f}秒")
-        print(f"帧率: {fps:.1f}fps")
-
-    # 构建滤镜链
     video_filters = []
     audio_filters = []
+    applied = []
 
     # 1. 掐头去尾
     if config.trim_enabled:
@@ -279,21 +241,21 @@ def apply_dedup(
         if trim_f:
             video_filters.append(trim_f)
             audio_filters.append(f"atrim=start={config.trim_head}:end={duration-config.trim_tail},asetpts=PTS-STARTPTS")
-            result["applied"].append(f"掐头{config.trim_head}s去尾{config.trim_tail}s")
+            applied.append(f"掐头{config.trim_head}s去尾{config.trim_tail}s")
 
     # 2. 智能抽帧
     if config.frame_extraction_enabled:
         frame_f = build_frame_extraction_filter(config, fps)
         if frame_f:
             video_filters.append(frame_f)
-            result["applied"].append(f"抽帧(每{config.frame_interval}帧删1帧)")
+            applied.append(f"抽帧(每{config.frame_interval}帧删1帧)")
 
     # 3. 变速
     if config.speed_combo_enabled:
         speed_v, speed_a = build_speed_filter(config)
         if speed_v:
             video_filters.append(speed_v)
-            result["applied"].append(f"变速({config.slow_speed}x*{config.fast_speed}x)")
+            applied.append(f"变速({config.slow_speed}x*{config.fast_speed}x)")
         if speed_a:
             audio_filters.append(speed_a)
 
@@ -302,49 +264,43 @@ def apply_dedup(
         mirror_f = build_mirror_filter(config)
         if mirror_f:
             video_filters.append(mirror_f)
-            result["applied"].append("镜像翻转")
+            applied.append("镜像翻转")
 
     # 5. 微旋转
     if config.rotation_enabled:
         rot_f = build_rotation_filter(config)
         if rot_f:
             video_filters.append(rot_f)
-            result["applied"].append(f"旋转{config.rotation_angle}°")
+            applied.append(f"旋转{config.rotation_angle}°")
 
     # 6. 分辨率微调
     if config.resolution_adjust_enabled:
         res_f = build_resolution_filter(config, width, height)
         if res_f:
             video_filters.append(res_f)
-            result["applied"].append(f"分辨率微调({config.scale_factor}x)")
+            applied.append(f"分辨率微调({config.scale_factor}x)")
 
     # 7. 画中画噪点叠加
     if config.pip_overlay_enabled:
         pip_f = build_pip_overlay_filter(config, width, height)
         if pip_f:
             video_filters.append(pip_f)
-            result["applied"].append(f"噪点叠加({config.pip_opacity*100:.1f}%)")
+            applied.append(f"噪点叠加({config.pip_opacity*100:.1f}%)")
 
     # 8. 调色
     if config.color_adjust_enabled:
         color_f = build_color_filter(config)
         if color_f:
             video_filters.append(color_f)
-            result["applied"].append("调色")
+            applied.append("调色")
 
     # 9. 动态水印
     if config.dynamic_watermark_enabled and config.watermark_text:
         wm_f = build_dynamic_watermark_filter(config, width, height)
         if wm_f:
             video_filters.append(wm_f)
-            result["applied"].append("动态水印")
+            applied.append("动态水印")
 
-    if verbose:
-        print(f"\n应用去重技术:")
-        for i, tech in enumerate(result["applied"], 1):
-            print(f"  {i}. {tech}")
-
-    # 构建FFmpeg命令
     vf = ",".join(video_filters) if video_filters else "null"
     af = ",".join(audio_filters) if audio_filters else "anull"
 
@@ -354,6 +310,71 @@ def apply_dedup(
     else:
         target_fps = int(fps)
 
+    return vf, af, target_fps, applied
+
+
+def apply_dedup(
+    input_path: str,
+    output_path: Optional[str] = None,
+    config: Optional[DedupConfig] = None,
+    verbose: bool = True
+) -> dict:
+    """
+    应用视频去重处理
+
+    Args:
+        input_path: 输入视频路径
+        output_path: 输出路径
+        config: 去重配置
+        verbose: 是否输出详情
+
+    Returns:
+        处理结果字典
+    """
+    result = {
+        "success": False,
+        "input": input_path,
+        "output": "",
+        "error": "",
+        "applied": []
+    }
+
+    if not os.path.exists(input_path):
+        result["error"] = "文件不存在"
+        return result
+
+    if config is None:
+        config = DedupConfig()
+
+    if output_path is None:
+        p = Path(input_path)
+        output_path = str(p.parent / f"{p.stem}_dedup.mp4")
+    result["output"] = output_path
+
+    # 获取视频信息
+    info = get_video_info(input_path)
+    width, height = info['width'], info['height']
+    duration = info['duration']
+    fps = info['fps']
+
+    if verbose:
+        print(f"\n{'='*60}")
+        print(f"视频去重处理 (强度: {config.level.value})")
+        print(f"{'='*60}")
+        print(f"输入: {Path(input_path).name}")
+        print(f"分辨率: {width}x{height}")
+        print(f"时长: {duration:.1f}秒")
+        print(f"帧率: {fps:.1f}fps")
+
+    # 构建滤镜链
+    vf, af, target_fps, applied = build_dedup_filter_chain(config, info)
+    result["applied"].extend(applied)
+
+    if verbose:
+        print(f"\n应用去重技术:")
+        for i, tech in enumerate(result["applied"], 1):
+            print(f"  {i}. {tech}")
+
     cmd = [
         'ffmpeg', '-y', '-i', input_path,
         '-vf', vf,